@@ -1,8 +1,27 @@
+import uuid
 import streamlit as st
+from database import DEFAULT_USER, MULTI_USER
 
 #Function for the side navigation bar
 def Nav_bar():
     with st.sidebar:
         st.page_link('app.py', label='Job Search', icon='🔥')
         st.page_link('pages/Job_analysis.py', label='Job Analysis')
-        st.page_link('pages/selected_job.py', label='Resume Optimization')
\ No newline at end of file
+        st.page_link('pages/selected_job.py', label='Resume Optimization')
+        st.page_link('pages/Saved_jobs.py', label='Saved Jobs')
+        st.page_link('pages/Diagnostics.py', label='Diagnostics')
+        if MULTI_USER:
+            current_user()
+            st.text_input("👤 User", key="user_id", help="Your feedback and application status are kept under this name")
+
+
+# Whose feedback and statuses this session uses. In multi-user mode that is ?user=<name>
+# from the URL, else a name of the user's choosing; an unnamed session gets its own id.
+def current_user():
+    if not MULTI_USER:
+        return DEFAULT_USER
+    if "guest_id" not in st.session_state:
+        st.session_state["guest_id"] = f"guest-{uuid.uuid4().hex[:8]}"
+    if "user_id" not in st.session_state:
+        st.session_state["user_id"] = st.query_params.get("user") or st.session_state["guest_id"]
+    return st.session_state["user_id"].strip() or st.session_state["guest_id"]
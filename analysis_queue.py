@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from database import connection, transaction
+from jobScraper import analyze_single_job, single_job_prompt
+
+ANALYSIS_TOP_N = int(os.getenv("ANALYSIS_TOP_N", "10"))
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", "3"))
+ANALYSIS_MAX_ATTEMPTS = 3
+ANALYSIS_RETRY_DELAY = 30  # seconds, multiplied by the attempt number
+
+# Fields the single-job prompt is built from; only these are stored with the queued job
+JOB_FIELDS = ("job_title", "company", "location", "experience", "compensation", "description", "link")
+
+
+def prompt_hash(job: Dict) -> str:
+    return hashlib.sha256(single_job_prompt(job).encode("utf-8")).hexdigest()
+
+
+class AnalysisQueue:
+    """
+    Background queue of per-job analyses, stored in the job_analyses table.
+
+    Rows are keyed by job link, so the same job enqueued from several sessions
+    or reruns is analyzed once; it is queued again only when its prompt
+    changes (e.g. the description was updated) or the last attempt failed.
+    A daemon thread with its own event loop claims queued rows and runs them
+    under a concurrency limit. Claims are a single UPDATE ... RETURNING, so
+    several app processes sharing jobs.db never analyze the same job twice,
+    and rows left 'running' by a crashed worker are picked up again after
+    `stale_after` seconds.
+    """
+
+    def __init__(self, analyze_fn=analyze_single_job, db_path="jobs.db",
+                 max_concurrency: int = ANALYSIS_CONCURRENCY, stale_after: float = 600,
+                 max_attempts: int = ANALYSIS_MAX_ATTEMPTS):
+        self.analyze_fn = analyze_fn
+        self.db_path = db_path
+        self.max_concurrency = max_concurrency
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self._initialized = False
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def _ensure_table(self):
+        if self._initialized:
+            return
+        with transaction(self.db_path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_analyses (
+                link TEXT PRIMARY KEY,
+                job TEXT,
+                prompt_hash TEXT,
+                status TEXT,
+                analysis TEXT,
+                error TEXT,
+                attempts INTEGER DEFAULT 0,
+                queued_at REAL,
+                updated_at REAL
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_job_analyses_status ON job_analyses(status, queued_at)")
+        self._initialized = True
+
+    def enqueue(self, jobs: List[Dict]) -> int:
+        """Queues jobs (by link) that have no current analysis. Returns how many were queued."""
+        self._ensure_table()
+        now = time.time()
+        rows = []
+        for job in jobs:
+            if not job.get("link"):
+                continue
+            record = {field: job.get(field) for field in JOB_FIELDS}
+            rows.append((job["link"], json.dumps(record), prompt_hash(record), now, now))
+        if not rows:
+            return 0
+
+        with transaction(self.db_path) as conn:
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT INTO job_analyses (link, job, prompt_hash, status, attempts, queued_at, updated_at)
+                VALUES (?, ?, ?, 'queued', 0, ?, ?)
+                ON CONFLICT(link) DO UPDATE SET
+                    job = excluded.job,
+                    prompt_hash = excluded.prompt_hash,
+                    status = 'queued',
+                    analysis = NULL,
+                    error = NULL,
+                    attempts = 0,
+                    queued_at = excluded.queued_at,
+                    updated_at = excluded.updated_at
+                WHERE job_analyses.prompt_hash != excluded.prompt_hash OR job_analyses.status = 'failed'
+            """, rows)
+            queued = conn.total_changes - before
+
+        if queued:
+            self.start()
+            self._wakeup.set()
+        return queued
+
+    def get(self, link: str) -> Optional[Dict]:
+        """Status row for one job: status, analysis, error, attempts, updated_at."""
+        return self.get_many([link]).get(link)
+
+    def get_many(self, links: List[str]) -> Dict[str, Dict]:
+        self._ensure_table()
+        links = [l for l in links if l]
+        result = {}
+        with connection(self.db_path) as conn:
+            for i in range(0, len(links), 500):
+                batch = links[i:i + 500]
+                placeholders = ",".join("?" for _ in batch)
+                for link, status, analysis, error, attempts, updated_at in conn.execute(
+                    f"SELECT link, status, analysis, error, attempts, updated_at FROM job_analyses "
+                    f"WHERE link IN ({placeholders})", batch,
+                ):
+                    result[link] = {
+                        "status": status, "analysis": analysis, "error": error,
+                        "attempts": attempts, "updated_at": updated_at,
+                    }
+        return result
+
+    def counts(self) -> Dict[str, int]:
+        self._ensure_table()
+        with connection(self.db_path) as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM job_analyses GROUP BY status").fetchall())
+
+    def _claim(self, limit: int) -> List[tuple]:
+        now = time.time()
+        with transaction(self.db_path) as conn:
+            return conn.execute("""
+                UPDATE job_analyses SET status = 'running', attempts = attempts + 1, updated_at = ?
+                WHERE link IN (
+                    SELECT link FROM job_analyses
+                    WHERE (status = 'queued' AND queued_at <= ?) OR (status = 'running' AND updated_at < ?)
+                    ORDER BY queued_at
+                    LIMIT ?
+                )
+                RETURNING link, job, prompt_hash, attempts
+            """, (now, now, now - self.stale_after, limit)).fetchall()
+
+    def _finish(self, link: str, claimed_hash: str, attempts: int, analysis=None, error=None):
+        now = time.time()
+        queued_at = None
+        if error is None:
+            status = "done"
+        elif attempts >= self.max_attempts:
+            status = "failed"
+        else:
+            # Retry later, backing off with each attempt
+            status, queued_at = "queued", now + ANALYSIS_RETRY_DELAY * attempts
+        # A job re-queued with a new prompt while running keeps its new row
+        with transaction(self.db_path) as conn:
+            conn.execute("""
+                UPDATE job_analyses SET status = ?, analysis = ?, error = ?, updated_at = ?,
+                    queued_at = COALESCE(?, queued_at)
+                WHERE link = ? AND prompt_hash = ? AND status = 'running'
+            """, (status, analysis, error, now, queued_at, link, claimed_hash))
+
+    async def _analyze(self, link, job_json, claimed_hash, attempts):
+        try:
+            analysis = await self.analyze_fn(json.loads(job_json), [])
+        except Exception as e:
+            print(f"⚠️ Background analysis failed for {link}: {e}")
+            await asyncio.to_thread(self._finish, link, claimed_hash, attempts, error=str(e))
+        else:
+            await asyncio.to_thread(self._finish, link, claimed_hash, attempts, analysis=analysis)
+
+    async def _run(self, until_empty: bool = False):
+        running = set()
+        while True:
+            self._wakeup.clear()
+            free = self.max_concurrency - len(running)
+            try:
+                claimed = await asyncio.to_thread(self._claim, free) if free > 0 else []
+            except Exception as e:
+                print(f"⚠️ Analysis queue could not claim work: {e}")
+                claimed = []
+            for row in claimed:
+                running.add(asyncio.create_task(self._analyze(*row)))
+
+            if running:
+                _, running = await asyncio.wait(running, timeout=1.0, return_when=asyncio.FIRST_COMPLETED)
+            elif until_empty:
+                return
+            else:
+                # Idle: sleep until new work is queued (or periodically, for stale claims)
+                await asyncio.to_thread(self._wakeup.wait, 5.0)
+
+    def start(self):
+        """Starts the worker thread once per process; safe to call on every rerun."""
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._ensure_table()
+            self._thread = threading.Thread(
+                target=asyncio.run, args=(self._run(),), name="analysis-queue", daemon=True
+            )
+            self._thread.start()
+            print("🧵 Started background analysis worker")
+
+    async def drain(self):
+        """Runs queued analyses in the current event loop until none are left (for scripts)."""
+        self._ensure_table()
+        await self._run(until_empty=True)
+
+
+# Module-level queue, shared by every Streamlit session in this process
+analysis_queue = AnalysisQueue()
@@ -1,42 +1,41 @@
 import asyncio
+import time
 import streamlit as st
-from jobScraper import scrape_jobs, display_jobs, analyze_jobs, filter_jobs
-from Nav_bar import Nav_bar
-from database import init_db, save_jobs_to_db
-import os
-
-FEEDBACK_FILE = "agent_feedback.txt"
+from jobScraper import iter_multi_scrape_jobs, display_jobs, analyze_jobs, filter_jobs, merge_ranked, unique_terms
+from Nav_bar import Nav_bar, current_user
+from database import MULTI_USER, save_jobs_to_db
+from semantic import default_store, semantic_rank
+from dedup import Deduplicator
+from analysis_queue import analysis_queue, ANALYSIS_TOP_N
+from ui_cache import ensure_db, cached_search_jobs, invalidate_job_queries
+from feedback_store import feedback_store
+from rescrape import saved_searches
+from tracing import span, trace
+from job_store import job_store
+from search_worker import search_tasks
 
 Nav_bar()
-init_db()
-
-# Helper functions for agent memory
-def load_agent_feedback():
-    """Read stored feedback memory."""
-    if os.path.exists(FEEDBACK_FILE):
-        with open(FEEDBACK_FILE, "r", encoding="utf-8") as f:
-            return f.read().strip()
-    return ""
+ensure_db()
+user_id = current_user()
 
+# Helper functions for agent memory (stored in jobs.db, parsed into ranking preferences)
 def save_agent_feedback(feedback: str):
-    """Append new feedback to agent memory."""
-    feedback = feedback.strip()
-    if feedback:
-        with open(FEEDBACK_FILE, "a", encoding="utf-8") as f:
-            f.write(f"\n{feedback}")
+    """Store new feedback and show what the agent understood from it."""
+    parsed = feedback_store.add(feedback, user_id)
     st.success("✅ Feedback saved! Agent will remember this next time.")
+    if not parsed:
+        st.caption("No ranking rule recognized; it will be passed to the AI analysis as a note.")
 
 def reset_agent_feedback():
     """Clear all saved feedback."""
-    if os.path.exists(FEEDBACK_FILE):
-        os.remove(FEEDBACK_FILE)
-        st.success("🧹 Agent memory reset!")
-
-# Session state setup
-if "jobs" not in st.session_state:
-    st.session_state["jobs"] = []
-if "selected_job" not in st.session_state:
-    st.session_state["selected_job"] = None
+    feedback_store.reset(user_id)
+    st.success("🧹 Agent memory reset!")
+
+# Session state setup: results are kept as jobs.db row ids, the records live in the shared job_store
+if "job_ids" not in st.session_state:
+    st.session_state["job_ids"] = []
+if "selected_job_id" not in st.session_state:
+    st.session_state["selected_job_id"] = None
 if "analysis" not in st.session_state:
     st.session_state["analysis"] = ""
 
@@ -45,35 +44,151 @@ st.header("🔍 Job Search")
 
 job_title = st.text_input("Job Title", "Software Engineer")
 location = st.text_input("Location", "Austin, TX")
+with st.expander("➕ More titles and locations (searched together)"):
+    more_titles = st.text_area("Other title variants (one per line)", placeholder="Backend Developer\nPython Developer")
+    more_locations = st.text_area("Other locations (one per line)", placeholder="Seattle, WA\nRemote")
+# Every title is searched in every location; the results are merged into one ranked list
+job_titles = unique_terms([job_title, *more_titles.splitlines()])
+locations = unique_terms([location, *more_locations.splitlines()])
 skills = st.text_area("Your Skills (comma separated)", "Python, Django, APIs, Cloud").split(",")
 experience_years = st.number_input("Years of Experience", min_value=0, max_value=20, value=3)
+use_semantic = st.checkbox("🧠 Semantic match (rank by meaning, not just keywords)")
+keep_fresh = st.checkbox("🔁 Keep this search fresh (re-scraped in the background by rescrape.py)")
+
+# Render a compact preview of the ranked jobs while the search is still running
+def render_job_preview(placeholder, jobs, limit=30):
+    with placeholder.container():
+        for i, job in enumerate(jobs[:limit], start=1):
+            st.markdown(
+                f"{i}. **{job.get('job_title', 'N/A')}** at {job.get('company', 'Unknown')} "
+                f"· 📍 {job.get('location', 'N/A')} · [🔗 Link]({job.get('link', '#')})"
+            )
+
+
+# Scrape -> dedupe -> rank -> save each chunk as it arrives, updating the UI per batch.
+# All title/location pairs are scraped concurrently and deduplicated against each other.
+async def stream_search(job_titles, locations, skills, experience_years, status, preview):
+    ranked = []
+    scraped = 0
+    dedup = Deduplicator()
+    preferences = feedback_store.preferences(user_id)
+    async for batch in iter_multi_scrape_jobs(job_titles, locations, skills, pages=3):
+        scraped += len(batch)
+        with span("dedup", jobs=len(batch)):
+            new_jobs, merged_jobs = dedup.add(batch)
+        batch_ranked = filter_jobs(new_jobs, job_titles, skills, experience_years, preferences=preferences)
+        # Merged records are already ranked; re-save them so their extra source links are stored.
+        # Each posting is saved under the title and location it was scraped for.
+        save_jobs_to_db(batch_ranked + merged_jobs)
+        ranked = merge_ranked(ranked, batch_ranked)
+        st.session_state["job_ids"] = job_store.add(ranked)
+
+        status.info(f"⏳ {scraped} jobs scraped so far ({len(ranked)} unique), still searching...")
+        render_job_preview(preview, ranked)
+    return ranked
+
+
+def remember_search_context():
+    # Search context for the analysis and resume pages
+    st.session_state["job_title"] = job_title
+    st.session_state["skills"] = [s.strip() for s in skills if s.strip()]
+    st.session_state["experience_years"] = experience_years
+    if keep_fresh:
+        for title in job_titles:
+            for place in locations:
+                saved_searches.add(title, place, skills, experience_years)
+
+
+# Multi-user mode: the search runs in search_worker.py; this polls its progress until it finishes
+@st.fragment(run_every=1.0)
+def show_search_task(task_id):
+    task = search_tasks.get(task_id)
+    if task is None:
+        return
+    if task["status"] == "queued":
+        waited = time.time() - task["created_at"]
+        st.info("⏳ Search queued..." + (" (is `python search_worker.py` running?)" if waited > 15 else ""))
+    elif task["status"] == "running":
+        stage = "Analyzing jobs with AI" if task["stage"] == "analyzing" else "Scraping job postings"
+        st.info(f"⏳ {stage}... {task['scraped']} jobs scraped so far ({len(task['job_ids'])} unique)")
+        render_job_preview(st.empty(), job_store.get_many(task["job_ids"][:30]))
+    else:
+        # Finished: hand the results to the session and rerun the whole page once
+        st.session_state["search_task_id"] = None
+        st.session_state["job_ids"] = task["job_ids"]
+        st.session_state["analysis"] = task["analysis"] or ""
+        if task["status"] == "failed":
+            st.session_state["analysis"] = f"❌ Search failed: {task['error']}"
+        invalidate_job_queries()
+        st.rerun()
 
-# Load memory context
-agent_memory = load_agent_feedback()
 
 if st.button("Search Jobs"):
-    with st.spinner("Scraping job postings..."):
-        raw_jobs = asyncio.run(scrape_jobs(job_title, location, skills, pages=3))
-
-    # Filter jobs
-    filtered_jobs = filter_jobs(raw_jobs, job_title, skills, experience_years)
-    save_jobs_to_db(filtered_jobs)
-    st.session_state["jobs"] = filtered_jobs
-
-    st.success(f"✅ Found {len(filtered_jobs)} filtered jobs.")
-    display_jobs(filtered_jobs, limit=30)
-
-    # Combine feedback memory into AI analysis prompt
-    st.info("🤖 Agent is considering your previous feedback...")
-    combined_skills = skills + agent_memory.split(",") if agent_memory else skills
-
-    with st.spinner("Analyzing jobs with AI..."):
-        final_analysis = asyncio.run(
-            analyze_jobs(filtered_jobs, job_title, location, experience_years, combined_skills)
+    if MULTI_USER:
+        st.session_state["search_task_id"] = search_tasks.submit(
+            user_id, job_titles, locations, skills, experience_years, use_semantic
         )
-
+        st.session_state["job_ids"] = []
+        st.session_state["analysis"] = ""
+        remember_search_context()
+    else:
+        # One trace per search; see the Diagnostics page for the waterfall
+        with trace("search", job_title=job_title, location=location, queries=len(job_titles) * len(locations),
+                   semantic=use_semantic) as search_span:
+            status = st.empty()
+            preview = st.empty()
+            status.info("⏳ Scraping job postings...")
+            filtered_jobs = asyncio.run(
+                stream_search(job_titles, locations, skills, experience_years, status, preview)
+            )
+            search_span.set(jobs=len(filtered_jobs))
+            invalidate_job_queries()
+            if use_semantic and filtered_jobs:
+                with st.spinner("Ranking jobs by semantic similarity..."), span("semantic_rank", jobs=len(filtered_jobs)):
+                    query_text = f"{' / '.join(job_titles)}. Skills: {', '.join(s.strip() for s in skills)}"
+                    filtered_jobs = semantic_rank(filtered_jobs, query_text, default_store())
+            st.session_state["job_ids"] = job_store.add(filtered_jobs)
+            remember_search_context()
+
+            status.success(f"✅ Found {len(filtered_jobs)} filtered jobs.")
+            # Precompute per-job analyses for the best matches while the user reads the results
+            queued = analysis_queue.enqueue(filtered_jobs[:ANALYSIS_TOP_N])
+            if queued:
+                st.caption(f"🧵 Analyzing {queued} of the top jobs in the background (see Job Analysis).")
+            display_jobs(filtered_jobs, limit=30)
+
+            # Feedback preferences already shaped the ranking; analyze_jobs adds their summary to the prompt
+            if feedback_store.summary(user_id):
+                st.info("🤖 Agent is considering your previous feedback...")
+
+            with st.spinner("Analyzing jobs with AI..."), span("analyze_jobs", jobs=len(filtered_jobs)):
+                final_analysis = asyncio.run(
+                    analyze_jobs(filtered_jobs, job_title, location, experience_years, skills, user_id=user_id)
+                )
+
+            # The selection tiles below take over from the live preview
+            preview.empty()
+            st.subheader("📄 Final Job Analysis")
+            st.markdown(final_analysis)
+
+if MULTI_USER and st.session_state.get("search_task_id"):
+    show_search_task(st.session_state["search_task_id"])
+elif MULTI_USER and st.session_state.get("analysis"):
     st.subheader("📄 Final Job Analysis")
-    st.markdown(final_analysis)
+    st.markdown(st.session_state["analysis"])
+
+# Full-text search over every job saved so far
+st.divider()
+st.subheader("🔎 Search Saved Jobs")
+saved_query = st.text_input("Search titles, companies and descriptions", placeholder="e.g. kubernetes remote")
+if saved_query:
+    matches = cached_search_jobs(saved_query, limit=20, user_id=user_id)
+    if not matches:
+        st.info("No saved jobs match that search.")
+    for job in matches:
+        with st.container(border=True):
+            st.markdown(f"**{job['job_title']}** at {job['company']} · 📍 {job['location']} · [🔗 Link]({job['link']})")
+            st.caption(job["snippet"])
 
 # Feedback section
 
@@ -81,9 +196,12 @@ st.divider()
 st.subheader("Agent Feedback (Persistent Memory)")
 
 with st.expander("🪄 View Agent Memory"):
-    memory = load_agent_feedback()
-    if memory:
-        st.text_area("Agent's current memory:", memory, height=100, disabled=True)
+    entries = feedback_store.entries(user_id=user_id)
+    if entries:
+        st.markdown("**What the agent applies:**\n" + (feedback_store.summary(user_id) or "- (no preferences recognized)"))
+        st.text_area(
+            "Feedback given (newest first):", "\n".join(e["text"] for e in entries), height=100, disabled=True
+        )
     else:
         st.info("No feedback stored yet.")
 
@@ -103,16 +221,19 @@ with col2:
 # ----------------------------
 # 📋 Job selection section
 # ----------------------------
-if st.session_state["jobs"]:
+if st.session_state["job_ids"]:
     st.subheader("📋 Select a Job for Resume Optimization")
-    for i, job in enumerate(st.session_state["jobs"][:30]):
+    for i, job in enumerate(job_store.get_many(st.session_state["job_ids"][:30])):
         with st.container(border=True):
             st.markdown(f"### {job['job_title']}")
             st.write(f"**Company:** {job['company']}")
             st.write(f"**Location:** {job['location']}")
             st.write(f"**Compensation:** {job.get('compensation', 'N/A')}")
             st.write(f"[🔗 Job Link]({job.get('link')})")
+            other_links = [l for l in job.source_links if l != job.link]
+            if other_links:
+                st.caption("Also posted at: " + " · ".join(f"[{i}]({l})" for i, l in enumerate(other_links, start=2)))
 
             if st.button(f"Select Job {i+1}", key=f"select_{i}"):
-                st.session_state["selected_job"] = job
+                st.session_state["selected_job_id"] = job.id
                 st.success(f"✅ Selected: {job['job_title']} at {job['company']}")
@@ -0,0 +1,163 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from database import iter_jobs
+from semantic import ALIASES, PHRASE_ALIASES, TOKEN_RE
+
+# Skills and tools an ATS typically keys on; the user's own skills are added per run
+SKILL_TERMS = (
+    "python", "java", "javascript", "typescript", "rust", "c++", "c#", "ruby", "php", "scala", "kotlin",
+    "swift", "sql", "nosql", "bash", "html", "css",
+    "django", "flask", "fastapi", "spring boot", "rails", "node.js", "express.js", "react", "angular", "vue",
+    "next.js", "graphql", "restful", "rest api", "apis", "grpc", "microservices",
+    "aws", "azure", "gcp", "amazon web services", "cloud", "docker", "kubernetes", "terraform", "ansible",
+    "linux", "ci/cd", "jenkins", "github actions", "git", "serverless", "lambda",
+    "postgres", "mysql", "mongodb", "redis", "elasticsearch", "kafka", "rabbitmq", "spark", "hadoop",
+    "airflow", "snowflake", "dbt", "etl", "data pipelines", "data warehouse",
+    "machine learning", "deep learning", "nlp", "computer vision", "pytorch", "tensorflow", "scikit-learn",
+    "pandas", "numpy", "llm", "artificial intelligence", "statistics", "a/b testing",
+    "distributed systems", "system design", "scalability", "performance", "security", "oauth",
+    "testing", "unit testing", "tdd", "agile", "scrum", "jira", "observability", "monitoring",
+    "prometheus", "grafana", "datadog", "mobile", "ios", "android", "embedded",
+    "leadership", "mentoring", "communication", "stakeholder management", "product management",
+)
+
+
+def _tokens(text: str) -> List[str]:
+    text = (text or "").lower()
+    for phrase, alias in PHRASE_ALIASES.items():
+        text = text.replace(phrase, alias)
+    tokens = TOKEN_RE.findall(text)
+    if ALIASES.keys().isdisjoint(tokens):
+        return tokens
+    return [word for token in tokens for word in ALIASES.get(token, token).split()]
+
+
+def normalize_term(term: str) -> str:
+    """Puts a vocabulary term through the same tokenizer as the documents ("Node.js" -> "node javascript")."""
+    return " ".join(_tokens(term))
+
+
+class Vocabulary:
+    def __init__(self, terms: Iterable[str]):
+        normalized = dict.fromkeys(t for t in (normalize_term(term) for term in terms) if t)
+        self.terms = list(normalized)
+        self.index = {term: i for i, term in enumerate(self.terms)}
+        # Multi-word terms, grouped by first word so only plausible ones are searched for
+        self.phrases = {}
+        for term in self.terms:
+            if " " in term:
+                self.phrases.setdefault(term.split(" ", 1)[0], []).append(term)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def presence(self, text: str) -> List[int]:
+        """Vocabulary indices of the terms that occur in text."""
+        tokens = _tokens(text)
+        token_set = set(tokens)
+        found = token_set & self.index.keys()
+        starts = token_set & self.phrases.keys()
+        if starts:
+            joined = f" {' '.join(tokens)} "
+            found.update(
+                phrase for word in starts for phrase in self.phrases[word] if f" {phrase} " in joined
+            )
+        return [self.index[term] for term in found]
+
+    def matrix(self, texts: Sequence[str]) -> np.ndarray:
+        """Boolean (documents x terms) presence matrix."""
+        matrix = np.zeros((len(texts), len(self)), dtype=bool)
+        for row, text in enumerate(texts):
+            matrix[row, self.presence(text)] = True
+        return matrix
+
+
+@dataclass
+class ATSResult:
+    rows: List[Dict]
+    jobs_scored: int
+    resume_terms: List[str]
+    elapsed: float = 0.0
+    vocabulary_size: int = 0
+    scores: np.ndarray = field(default=None, repr=False)
+
+
+def ats_scores(resume_vector: np.ndarray, job_matrix: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted keyword coverage per job, 0-100: the share of each job's terms
+    (weighted by rarity across the jobs) that the resume also mentions.
+    """
+    required = job_matrix @ weights
+    covered = (job_matrix & resume_vector) @ weights
+    return np.divide(covered * 100.0, required, out=np.zeros_like(required), where=required > 0)
+
+
+def idf_weights(job_matrix: np.ndarray) -> np.ndarray:
+    docs = job_matrix.shape[0]
+    df = job_matrix.sum(axis=0)
+    return (np.log((1 + docs) / (1 + df)) + 1.0).astype(np.float64)
+
+
+def score_resume(resume_text: str, job_batches: Iterable[List[Dict]], skills: Sequence[str] = (),
+                 max_rows: int = 500, missing_terms: int = 8) -> ATSResult:
+    """
+    Scores one resume against every job in job_batches (lists of job dicts with a
+    description). Descriptions are reduced to term-presence rows as each batch
+    arrives, then all jobs are scored at once. Returns the best max_rows jobs,
+    each with its matched and most important missing terms.
+    """
+    start = time.perf_counter()
+    vocabulary = Vocabulary(list(SKILL_TERMS) + [s for s in skills if s.strip()])
+    resume_vector = np.zeros(len(vocabulary), dtype=bool)
+    resume_vector[vocabulary.presence(resume_text)] = True
+
+    meta, blocks = [], []
+    for batch in job_batches:
+        blocks.append(vocabulary.matrix([
+            f"{job.get('job_title') or ''} {job.get('description') or ''}" for job in batch
+        ]))
+        meta.extend(
+            {k: job.get(k) for k in ("id", "job_title", "company", "location", "link", "exp_ok")}
+            for job in batch
+        )
+
+    if not meta:
+        return ATSResult([], 0, [vocabulary.terms[i] for i in np.flatnonzero(resume_vector)],
+                         time.perf_counter() - start, len(vocabulary))
+
+    job_matrix = np.vstack(blocks)
+    weights = idf_weights(job_matrix)
+    scores = ats_scores(resume_vector, job_matrix, weights)
+    # Ties (e.g. several jobs at 100%) go to the job where the resume covers more weighted terms
+    covered = (job_matrix & resume_vector) @ weights
+    top = np.lexsort((-covered, -scores))[:max_rows]
+    rows = []
+    for i in top:
+        present = job_matrix[i]
+        matched = np.flatnonzero(present & resume_vector)
+        missing = np.flatnonzero(present & ~resume_vector)
+        missing = missing[np.argsort(-weights[missing], kind="stable")][:missing_terms]
+        rows.append(dict(
+            meta[i],
+            ats_score=round(float(scores[i]), 1),
+            matched_terms=[vocabulary.terms[t] for t in matched],
+            missing_terms=[vocabulary.terms[t] for t in missing],
+            terms_required=int(present.sum()),
+        ))
+
+    return ATSResult(
+        rows, len(meta), [vocabulary.terms[i] for i in np.flatnonzero(resume_vector)],
+        time.perf_counter() - start, len(vocabulary), scores,
+    )
+
+
+def score_stored_jobs(resume_text: str, skills: Sequence[str] = (), max_rows: int = 500,
+                      db_path="jobs.db", **filters) -> ATSResult:
+    """score_resume over every job in jobs.db that matches the query_jobs filters."""
+    result = score_resume(resume_text, iter_jobs(db_path=db_path, **filters), skills, max_rows)
+    print(f"📊 ATS-scored {result.jobs_scored} jobs against the resume in {result.elapsed:.2f}s")
+    return result
@@ -0,0 +1,47 @@
+"""
+Benchmark for ats.score_stored_jobs: one resume against every saved job.
+
+    python benchmarks/bench_ats.py --jobs 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ats import score_stored_jobs
+from database import init_db, save_jobs_to_db
+from bench_db import synthetic_jobs
+
+RESUME = """
+Backend engineer, 5 years. Python, Django and FastAPI services behind REST APIs on AWS.
+Docker, Kubernetes, Terraform, CI/CD with GitHub Actions. PostgreSQL and Redis.
+Mentoring junior engineers, system design reviews, on-call and monitoring with Grafana.
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench_jobs.db")
+        init_db(db_path)
+        jobs = synthetic_jobs(args.jobs)
+        for i in range(0, len(jobs), 5000):
+            save_jobs_to_db(jobs[i:i + 5000], db_path=db_path)
+
+        start = time.perf_counter()
+        result = score_stored_jobs(RESUME, ["Python", "Django"], db_path=db_path)
+        elapsed = time.perf_counter() - start
+        print(f"{result.jobs_scored} jobs, {result.vocabulary_size} terms: {elapsed:.2f} s "
+              f"({result.jobs_scored / elapsed:,.0f} jobs/s)")
+        for row in result.rows[:5]:
+            print(f"  {row['ats_score']:5.1f}  {row['job_title']} at {row['company']}  missing: {row['missing_terms']}")
+
+
+if __name__ == "__main__":
+    main()
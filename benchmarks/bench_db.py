@@ -0,0 +1,86 @@
+"""
+Benchmark for database.save_jobs_to_db.
+
+Inserts synthetic postings into a throwaway database, then re-saves them
+to measure the upsert (update) path.
+
+    python benchmarks/bench_db.py --jobs 100000 --batch 1000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import connection, init_db, save_jobs_to_db
+
+
+SKILLS = (
+    "python django flask fastapi apis rest graphql cloud aws azure gcp kubernetes docker terraform "
+    "sql postgres mysql redis kafka spark airflow pandas numpy pytorch tensorflow react typescript "
+    "javascript node java kotlin go rust scala linux ci/cd git testing microservices security"
+).split()
+FILLER = (
+    "we are looking for an engineer to join our team and build scalable systems with strong "
+    "ownership collaborate across product design data teams you will ship features mentor others "
+    "improve reliability performance and quality of our platform benefits include health dental "
+    "vision equity remote flexible hours learning budget"
+).split()
+
+
+def synthetic_jobs(n, seed=0, start=0):
+    rng = random.Random(seed)
+    titles = ["Software Engineer", "Backend Developer", "Data Engineer", "ML Engineer", "DevOps Engineer"]
+    cities = ["Austin, TX", "Seattle, WA", "New York, NY", "Remote", "Denver, CO"]
+    return [
+        {
+            "job_title": rng.choice(titles),
+            "company": f"Company {rng.randrange(5000)}",
+            "location": rng.choice(cities),
+            "experience": f"{rng.randrange(0, 10)}+ years",
+            "compensation": "N/A",
+            "link": f"https://example.com/jobs/{start + i}",
+            "description": " ".join(rng.sample(SKILLS, rng.randint(3, 8)) + rng.choices(FILLER, k=100)),
+            "title_score": rng.randrange(3),
+            "skill_score": rng.randrange(5),
+            "exp_ok": rng.random() > 0.3,
+        }
+        for i in range(n)
+    ]
+
+
+def timed_save(jobs, batch, db_path):
+    start = time.perf_counter()
+    for i in range(0, len(jobs), batch):
+        save_jobs_to_db(jobs[i:i + batch], db_path=db_path)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=1000, help="jobs per save_jobs_to_db call")
+    args = parser.parse_args()
+
+    jobs = synthetic_jobs(args.jobs)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench_jobs.db")
+        init_db(db_path)
+
+        elapsed = timed_save(jobs, args.batch, db_path)
+        print(f"insert: {args.jobs} jobs in {elapsed:.2f}s ({args.jobs / elapsed:,.0f} jobs/s)")
+
+        for job in jobs:
+            job["skill_score"] += 1
+        elapsed = timed_save(jobs, args.batch, db_path)
+        print(f"upsert: {args.jobs} jobs in {elapsed:.2f}s ({args.jobs / elapsed:,.0f} jobs/s)")
+
+        with connection(db_path) as conn:
+            print("rows:", conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0])
+
+
+if __name__ == "__main__":
+    main()
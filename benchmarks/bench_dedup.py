@@ -0,0 +1,55 @@
+"""
+Benchmark for dedup.Deduplicator on synthetic postings where a share of
+jobs is re-posted on other boards with small edits.
+
+    python benchmarks/bench_dedup.py --jobs 20000 --dup-rate 0.3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import Deduplicator
+from bench_db import synthetic_jobs
+
+
+def with_reposts(jobs, dup_rate, seed=1):
+    rng = random.Random(seed)
+    reposts = []
+    for job in rng.sample(jobs, int(len(jobs) * dup_rate)):
+        words = job["description"].split()
+        # Drop a few words and change the title casing/location format, like another board would
+        for _ in range(3):
+            words.pop(rng.randrange(len(words)))
+        reposts.append({
+            **job,
+            "job_title": job["job_title"].upper() + " (Remote)",
+            "location": job["location"].split(",")[0],
+            "link": job["link"] + "?board=other",
+            "description": " ".join(words),
+        })
+    mixed = jobs + reposts
+    rng.shuffle(mixed)
+    return mixed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=20_000)
+    parser.add_argument("--dup-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    for n in (args.jobs // 4, args.jobs // 2, args.jobs):
+        postings = with_reposts(synthetic_jobs(n), args.dup_rate)
+        start = time.perf_counter()
+        unique, _ = Deduplicator().add(postings)
+        elapsed = time.perf_counter() - start
+        print(f"{len(postings):7} postings -> {len(unique):7} unique in {elapsed:.2f}s "
+              f"({len(postings) / elapsed:,.0f} postings/s)")
+
+
+if __name__ == "__main__":
+    main()
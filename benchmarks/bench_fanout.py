@@ -0,0 +1,134 @@
+"""
+Benchmark for multi-query searches: several title variants across several
+locations run one after another (one scrape_jobs per pair) versus the fan-out
+in jobScraper.multi_search_jobs, which extracts every distinct search page of
+every pair in one engine run and ranks the merged, deduplicated results once.
+
+Search pages are synthetic and replayed with simulated extract latency
+(FixtureExtractor); a share of each title variant's postings repeat the first
+title's, the way the same job shows up under "Software Engineer" and
+"Backend Developer". Board rate limits are scaled with the latency. The
+fan-out stays close to the slowest query until it needs more than
+SCRAPE_MAX_FANOUT extract calls at once.
+
+    python benchmarks/bench_fanout.py
+    python benchmarks/bench_fanout.py --titles 3 --locations 3 --latency-scale 0.1
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from corpus import synthetic_fixture
+from database import init_db
+from dedup import Deduplicator
+from jobScraper import (BOARD_RATE_LIMITS, build_engine, build_multi_search_targets, build_search_targets,
+                        fanout_concurrency, filter_jobs, multi_search_jobs, scrape_jobs)
+from scrape_engine import FixtureExtractor
+
+TITLES = ["Software Engineer", "Backend Developer", "Python Developer", "Platform Engineer"]
+LOCATIONS = ["Austin, TX", "Seattle, WA", "Remote"]
+SKILLS = ["Python", "Django", "AWS", "SQL"]
+
+
+def build_fixture(titles, locations, args):
+    """Synthetic pages for every pair; other titles' pages repeat some of the first title's postings."""
+    pages = {(t, loc): build_search_targets(t, loc, args.pages) for t in titles for loc in locations}
+    fixture = synthetic_fixture([target["url"] for targets in pages.values() for target in targets],
+                                per_page=args.per_page, latency=args.scrape_latency, jitter=args.jitter)
+    repeated = int(args.per_page * args.overlap)
+    for (title, location), targets in pages.items():
+        if title == titles[0]:
+            continue
+        for target, first in zip(targets, pages[(titles[0], location)]):
+            postings = fixture[target["url"]]["job_postings"]
+            postings[:repeated] = [dict(post) for post in fixture[first["url"]]["job_postings"][:repeated]]
+    return fixture
+
+
+def scaled_engine(extractor, max_concurrency, scale):
+    engine = build_engine(extractor, max_concurrency=max_concurrency)
+    engine.board_intervals = {board: interval * scale for board, interval in BOARD_RATE_LIMITS.items()}
+    return engine
+
+
+async def sequential(titles, locations, extractor, args):
+    """Before: one search per pair, one after another, then a merge of everything."""
+    dedup, unique = Deduplicator(), []
+    for title in titles:
+        for location in locations:
+            engine = scaled_engine(extractor, None, args.latency_scale)
+            unique.extend(dedup.add(await scrape_jobs(title, location, SKILLS, args.pages, engine, use_cache=False))[0])
+    return filter_jobs(unique, titles, SKILLS, 3)
+
+
+async def timed(make):
+    start = time.perf_counter()
+    result = await make()
+    return result, time.perf_counter() - start
+
+
+async def run(args):
+    titles, locations = TITLES[:args.titles], LOCATIONS[:args.locations]
+    queries = len(titles) * len(locations)
+    fixture = build_fixture(titles, locations, args)
+    targets = build_multi_search_targets(titles, locations, args.pages)
+
+    def extractor():
+        return FixtureExtractor(fixture, replay_latency=True, latency_scale=args.latency_scale)
+
+    # Slowest single query on its own: the target for the fan-out
+    slowest = 0.0
+    for title in titles:
+        for location in locations:
+            engine = scaled_engine(extractor(), None, args.latency_scale)
+            _, elapsed = await timed(lambda: scrape_jobs(title, location, SKILLS, args.pages, engine, use_cache=False))
+            slowest = max(slowest, elapsed)
+
+    seq_extractor = extractor()
+    seq_jobs, seq_time = await timed(lambda: sequential(titles, locations, seq_extractor, args))
+
+    fan_extractor = extractor()
+    engine = scaled_engine(fan_extractor, fanout_concurrency(queries), args.latency_scale)
+    fan_jobs, fan_time = await timed(lambda: multi_search_jobs(titles, locations, SKILLS, 3, args.pages, engine,
+                                                               use_cache=False))
+
+    print(f"\n{len(titles)} titles x {len(locations)} locations = {queries} queries, {len(targets)} distinct pages "
+          f"(latency x{args.latency_scale}, fan-out runs {engine.max_concurrency} extracts at a time)")
+    print(f"  slowest single query: {slowest:6.2f}s")
+    print(f"  one after another:    {seq_time:6.2f}s  {seq_extractor.calls} extract calls, {len(seq_jobs)} ranked jobs")
+    print(f"  fan-out:              {fan_time:6.2f}s  {fan_extractor.calls} extract calls, {len(fan_jobs)} ranked jobs "
+          f"({seq_time / fan_time:.1f}x faster, {fan_time / slowest:.2f}x the slowest query)")
+    scraped = sum(len(fixture[t["url"]]["job_postings"]) for t in targets)
+    print(f"  merged:               {scraped} postings scraped, {scraped - len(fan_jobs)} repeated across queries")
+    # Which of two near-duplicates is kept depends on the order pages arrive in
+    common = len({job["link"] for job in fan_jobs} & {job["link"] for job in seq_jobs})
+    print(f"  same results:         {common}/{len(fan_jobs)} ranked jobs found by both")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, default=2)
+    parser.add_argument("--locations", type=int, default=2)
+    parser.add_argument("--pages", type=int, default=3, help="search pages per board")
+    parser.add_argument("--per-page", type=int, default=20, help="postings per search page")
+    parser.add_argument("--overlap", type=float, default=0.3, help="share of a page repeated by other title variants")
+    parser.add_argument("--scrape-latency", type=float, default=20.0, help="seconds per extract call")
+    parser.add_argument("--jitter", type=float, default=10.0)
+    parser.add_argument("--latency-scale", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Scraped pages are cached in jobs.db relative to the working directory
+        os.chdir(tmp)
+        init_db("jobs.db")
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Load test for the multi-user deployment: many concurrent sessions each queue a
+search and poll it the way the app's progress fragment does, while one
+search_worker.SearchWorker runs them.
+
+Scraping replays synthetic search pages (FixtureExtractor) and the analysis
+talks to the stub LLM server, both with simulated latency, so no keys are
+needed. Sessions are spread over a few title/location pairs, the way real
+users overlap, and some users give feedback excluding a company that is in
+their results, which checks that one user's feedback never shapes another's.
+
+    python benchmarks/bench_multi_user.py --sessions 50
+    python benchmarks/bench_multi_user.py --sessions 50 --latency-scale 0.2 --concurrency 8
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from corpus import synthetic_fixture
+from database import get_jobs, init_db
+from feedback_store import feedback_store
+from jobScraper import BOARD_RATE_LIMITS, build_engine, build_search_targets
+from llm_service import llm
+from scrape_engine import FixtureExtractor
+from search_worker import SearchTasks, SearchWorker
+import stub_llm_server
+
+TITLES = ["Software Engineer", "Backend Developer", "Data Engineer", "ML Engineer", "DevOps Engineer"]
+LOCATIONS = ["Austin, TX", "Seattle, WA"]
+SKILLS = ["Python", "Django", "AWS", "SQL"]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))] if ordered else 0.0
+
+
+class Session:
+    """One simulated browser session: queue a search, then poll until it finishes."""
+
+    def __init__(self, number, job_title, location, excluded_company=None):
+        self.user_id = f"user-{number}"
+        self.job_title = job_title
+        self.location = location
+        self.excluded_company = excluded_company
+        self.first_results_s = None
+        self.done_s = None
+        self.status = None
+        self.job_ids = []
+        self.polls = []
+
+    def run(self, tasks: SearchTasks, poll: float, timeout: float):
+        if self.excluded_company:
+            feedback_store.add(f"no jobs from {self.excluded_company}", self.user_id)
+        start = time.perf_counter()
+        task_id = tasks.submit(self.user_id, self.job_title, self.location, SKILLS, 3)
+        while time.perf_counter() - start < timeout:
+            poll_start = time.perf_counter()
+            task = tasks.get(task_id)
+            self.polls.append(time.perf_counter() - poll_start)
+            if task["job_ids"] and self.first_results_s is None:
+                self.first_results_s = time.perf_counter() - start
+            if task["status"] in ("done", "failed"):
+                self.done_s = time.perf_counter() - start
+                self.status, self.job_ids = task["status"], task["job_ids"]
+                return
+            time.sleep(poll)
+        self.status = "timeout"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16, help="searches the worker runs at once")
+    parser.add_argument("--pages", type=int, default=2, help="search pages per board")
+    parser.add_argument("--per-page", type=int, default=20, help="postings per search page")
+    parser.add_argument("--scrape-latency", type=float, default=3.0, help="seconds per extract call")
+    parser.add_argument("--llm-latency", type=float, default=4.0, help="seconds per LLM response")
+    parser.add_argument("--latency-scale", type=float, default=0.25)
+    parser.add_argument("--feedback-share", type=float, default=0.5, help="share of users that exclude a company")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds between a session's progress checks")
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    searches = [(title, location) for title in TITLES for location in LOCATIONS]
+    urls = {search: [t["url"] for t in build_search_targets(*search, args.pages)] for search in searches}
+    fixture = synthetic_fixture([url for search in searches for url in urls[search]], per_page=args.per_page,
+                                latency=args.scrape_latency, jitter=1.0)
+    extractor = FixtureExtractor(fixture, replay_latency=True, latency_scale=args.latency_scale)
+
+    sessions = []
+    for number in range(args.sessions):
+        search = searches[number % len(searches)]
+        excluded = None
+        if rng.random() < args.feedback_share:
+            excluded = rng.choice(fixture[urls[search][0]]["job_postings"])["company"]
+        sessions.append(Session(number, *search, excluded_company=excluded))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app's caches and stores open jobs.db relative to the working directory
+        os.chdir(tmp)
+        db_path = os.path.join(tmp, "jobs.db")
+        init_db(db_path)
+
+        server = stub_llm_server.serve(0, args.llm_latency * args.latency_scale)
+        os.environ["OPENAI_API_KEY"] = "stub"
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+        tasks = SearchTasks(db_path)
+        # Every search shares the engine's board rate limits; scale them with the replayed latency
+        engine = build_engine(extractor)
+        engine.board_intervals = {board: interval * args.latency_scale for board, interval in BOARD_RATE_LIMITS.items()}
+        worker = SearchWorker(tasks, engine=engine, max_concurrency=args.concurrency, poll=0.1, pages=args.pages)
+        worker_thread = worker.start()
+
+        print(f"{args.sessions} sessions over {len(searches)} distinct searches, worker runs {args.concurrency} at a time "
+              f"(latency x{args.latency_scale})")
+        start = time.perf_counter()
+        threads = [threading.Thread(target=s.run, args=(tasks, args.poll, args.timeout)) for s in sessions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+        worker.stop()
+        worker_thread.join()
+
+        # Isolation: a user's excluded company never appears in that user's results
+        leaks = 0
+        for s in sessions:
+            if s.excluded_company and s.job_ids:
+                leaks += sum(job["company"] == s.excluded_company for job in get_jobs(s.job_ids, db_path=db_path))
+        excluded_elsewhere = sum(
+            any(job["company"] == s.excluded_company for job in get_jobs(o.job_ids, db_path=db_path))
+            for s in sessions if s.excluded_company
+            for o in sessions if o.user_id != s.user_id and o.job_title == s.job_title and o.location == s.location
+            and not o.excluded_company
+        )
+        llm_rows = llm.summary()
+        server.shutdown()
+
+    finished = [s for s in sessions if s.status == "done"]
+    first = [s.first_results_s for s in sessions if s.first_results_s is not None]
+    done = [s.done_s for s in finished]
+    polls = [p for s in sessions for p in s.polls]
+    print(f"  finished:        {len(finished)}/{len(sessions)} "
+          f"({sum(s.status == 'failed' for s in sessions)} failed, {sum(s.status == 'timeout' for s in sessions)} timed out)")
+    print(f"  wall time:       {wall:.1f}s ({sum(done):.1f}s summed over sessions)")
+    print(f"  first results:   p50 {percentile(first, 0.5):.2f}s  p95 {percentile(first, 0.95):.2f}s")
+    print(f"  search done:     p50 {percentile(done, 0.5):.2f}s  p95 {percentile(done, 0.95):.2f}s")
+    print(f"  progress poll:   p50 {percentile(polls, 0.5) * 1000:.1f}ms  p95 {percentile(polls, 0.95) * 1000:.1f}ms "
+          f"({len(polls)} polls)")
+    print(f"  extract calls:   {extractor.calls} ({worker.shared_scrapes} searches joined a running scrape)")
+    print(f"  LLM requests:    {stub_llm_server.StubHandler.requests_seen} sent, "
+          f"{sum(g['cache_hits'] for g in llm_rows)} served from cache or a shared in-flight call")
+    print(f"  isolation:       {leaks} excluded jobs leaked into their user's results; "
+          f"{excluded_elsewhere} exclusions correctly left other users' results alone")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Offline benchmark of the whole search pipeline, no Firecrawl or OpenAI keys needed.
+
+    scrape (replayed)  -> dedup -> filter_jobs -> save_jobs_to_db -> pack_jobs -> analyze_jobs (replayed)
+
+Scraping replays recorded extract responses (FixtureExtractor) and the analysis
+talks to the stub LLM server replaying recorded responses, both with their
+recorded latencies times --latency-scale. Dedup, ranking, saving and prompt
+building run over synthetic corpora from 1k to 1M postings, fed in batches the
+way the app feeds scraped chunks. Every stage reports throughput, p50/p95 per
+call and peak traced memory (from a separate run, so tracing doesn't skew the
+timings).
+
+    python benchmarks/bench_pipeline.py --sizes 1k,10k,100k
+    python benchmarks/bench_pipeline.py --sizes 1k --latency-scale 0.02 --json results.json --baseline baseline.json
+
+With --baseline, the run exits with status 1 if any stage's throughput fell
+(or p95 rose) by more than --max-regression against the saved results.
+Recording real responses once (needs FIRECRAWL_API_KEY and OPENAI_API_KEY):
+
+    python benchmarks/bench_pipeline.py --record --stages scrape,analyze
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from corpus import iter_corpus, parse_size, synthetic_fixture
+from database import init_db, save_jobs_to_db
+from dedup import Deduplicator
+from feedback_store import Preferences
+from jobScraper import analyze_jobs, build_engine, build_search_targets, filter_jobs, firecrawl_extract, iter_scrape_jobs
+from llm_cache import llm_cache
+from prompt_builder import pack_jobs
+from scrape_cache import ScrapeCache
+from scrape_engine import FixtureExtractor, RecordingExtractor
+import stub_llm_server
+
+CORPUS_STAGES = ["dedup", "rank", "save", "prompt"]
+REPLAY_STAGES = ["scrape", "analyze"]
+SCRAPE_FIXTURES = os.path.join(BENCH_DIR, "fixtures", "search_pages.json")
+LLM_FIXTURES = os.path.join(BENCH_DIR, "fixtures", "llm_responses.json")
+
+JOB_TITLE = "Software Engineer"
+LOCATION = "Austin, TX"
+SKILLS = ["Python", "Django", "APIs", "Cloud", "AWS", "Kubernetes", "Docker", "SQL"]
+EXPERIENCE = 3
+PREFERENCES = Preferences(seniority=-1, remote=1, terms={"kafka": 1})
+
+
+@dataclass
+class StageResult:
+    stage: str
+    size: int
+    items: int
+    calls: int
+    total_s: float
+    p50_ms: float
+    p95_ms: float
+    peak_mb: float = 0.0
+
+    @property
+    def throughput(self):
+        return self.items / self.total_s if self.total_s else 0.0
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))] if ordered else 0.0
+
+
+def run_calls(calls):
+    """Runs (prepare, call, items) triples; only call() is timed. Returns (durations, items)."""
+    durations, items = [], 0
+    for prepare, call, count in calls():
+        arg = prepare()
+        start = time.perf_counter()
+        call(arg)
+        durations.append(time.perf_counter() - start)
+        items += count
+    return durations, items
+
+
+def measure(stage, size, calls, trace_memory=True):
+    durations, items = run_calls(calls)
+    result = StageResult(
+        stage, size, items, len(durations), sum(durations),
+        percentile(durations, 0.5) * 1000, percentile(durations, 0.95) * 1000,
+    )
+    if trace_memory:
+        tracemalloc.start()
+        run_calls(calls)
+        result.peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    peak = f"peak {result.peak_mb:8.1f} MB" if trace_memory else "peak        - MB"
+    print(f"  {stage:8} {size:>9,}  {result.throughput:>12,.0f} items/s  p50 {result.p50_ms:9.1f} ms  "
+          f"p95 {result.p95_ms:9.1f} ms  {peak}  ({result.calls} calls)")
+    return result
+
+
+# Each stage is a factory of (prepare, call, items) triples over the corpus batches
+
+def dedup_calls(size, batch_size):
+    def calls():
+        dedup = Deduplicator()
+        for batch in iter_corpus(size, batch_size):
+            yield (lambda b=batch: b), dedup.add, len(batch)
+    return calls
+
+
+def rank_calls(size, batch_size):
+    def calls():
+        for batch in iter_corpus(size, batch_size):
+            yield (lambda b=batch: b), lambda b: filter_jobs(b, JOB_TITLE, SKILLS, EXPERIENCE, preferences=PREFERENCES), len(batch)
+    return calls
+
+
+def save_calls(size, batch_size, db_path, rows_per_save=1000):
+    def calls():
+        for batch in iter_corpus(size, batch_size):
+            for i in range(0, len(batch), rows_per_save):
+                rows = batch[i:i + rows_per_save]
+                yield (lambda r=rows: r), lambda r: save_jobs_to_db(r, db_path=db_path), len(rows)
+    return calls
+
+
+def prompt_calls(size, batch_size):
+    def calls():
+        for batch in iter_corpus(size, batch_size):
+            yield (
+                lambda b=batch: filter_jobs(b, JOB_TITLE, SKILLS, EXPERIENCE),
+                lambda ranked: pack_jobs(ranked, SKILLS, budget_tokens=6000, top_k=40),
+                len(batch),
+            )
+    return calls
+
+
+def scrape_calls(extract_fn, pages, repeat, db_path):
+    cache = ScrapeCache(db_path)
+    postings = []
+
+    async def scrape():
+        postings.clear()
+        engine = build_engine(extract_fn)
+        async for batch in iter_scrape_jobs(JOB_TITLE, LOCATION, SKILLS, pages, engine, cache, use_cache=False):
+            postings.extend(batch)
+
+    def calls():
+        for _ in range(repeat):
+            yield (lambda: None), lambda _: asyncio.run(scrape()), pages * 4
+    return calls, postings
+
+
+def analyze_calls(jobs, repeat):
+    def calls():
+        for _ in range(repeat):
+            # Cleared first so every call reaches the (replayed) API instead of the response cache
+            yield llm_cache.clear, lambda _: asyncio.run(
+                analyze_jobs(jobs, JOB_TITLE, LOCATION, EXPERIENCE, SKILLS, mode="single")
+            ), len(jobs)
+    return calls
+
+
+def compare(results, baseline_path, max_regression):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["stage"], r["size"]): r for r in json.load(f)["results"]}
+    failures = []
+    for result in results:
+        base = baseline.get((result.stage, result.size))
+        if not base:
+            continue
+        base_throughput = base["items"] / base["total_s"] if base["total_s"] else 0
+        if base_throughput and result.throughput < base_throughput * (1 - max_regression):
+            failures.append(f"{result.stage} @ {result.size:,}: throughput {result.throughput:,.0f}/s "
+                            f"vs {base_throughput:,.0f}/s")
+        if base["p95_ms"] and result.p95_ms > base["p95_ms"] * (1 + max_regression):
+            failures.append(f"{result.stage} @ {result.size:,}: p95 {result.p95_ms:.1f} ms vs {base['p95_ms']:.1f} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1k,10k", help="corpus sizes, e.g. 1k,10k,100k,1m")
+    parser.add_argument("--stages", default=",".join(REPLAY_STAGES + CORPUS_STAGES))
+    parser.add_argument("--batch", type=int, default=10_000, help="postings per scraped batch")
+    parser.add_argument("--pages", type=int, default=3, help="search pages per board for the scrape stage")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of the scrape and analyze stages")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier for replayed latencies")
+    parser.add_argument("--llm-latency", type=float, default=5.0, help="seconds for requests with no recording")
+    parser.add_argument("--scrape-fixtures", default=SCRAPE_FIXTURES)
+    parser.add_argument("--llm-fixtures", default=LLM_FIXTURES)
+    parser.add_argument("--record", action="store_true", help="call the live APIs and save their responses")
+    parser.add_argument("--llm-upstream", default="https://api.openai.com/v1", help="API recorded from")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced-memory runs")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    trace = not args.no_memory
+    # Resolved before switching to the scratch directory below
+    for name in ("scrape_fixtures", "llm_fixtures", "json", "baseline"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app's caches and stores open jobs.db relative to the working directory
+        os.chdir(tmp)
+        db_path = os.path.join(tmp, "jobs.db")
+        init_db(db_path)
+
+        postings = []
+        if "scrape" in stages:
+            if args.record:
+                extract_fn = RecordingExtractor(firecrawl_extract, args.scrape_fixtures)
+            elif os.path.exists(args.scrape_fixtures):
+                extract_fn = FixtureExtractor(args.scrape_fixtures, replay_latency=True, latency_scale=args.latency_scale)
+            else:
+                urls = [t["url"] for t in build_search_targets(JOB_TITLE, LOCATION, args.pages)]
+                extract_fn = FixtureExtractor(synthetic_fixture(urls), replay_latency=True,
+                                              latency_scale=args.latency_scale)
+            print(f"Replayed stages ({JOB_TITLE} in {LOCATION}, {args.pages} pages, latency x{args.latency_scale})")
+            calls, postings = scrape_calls(extract_fn, args.pages, args.repeat, db_path)
+            results.append(measure("scrape", args.pages * 4, calls, trace))
+
+        if "analyze" in stages:
+            if not postings:
+                postings = next(iter_corpus(200, 200))
+            jobs = filter_jobs(Deduplicator().add(postings)[0], JOB_TITLE, SKILLS, EXPERIENCE, top_k=40)
+            server = stub_llm_server.serve(
+                0, args.llm_latency * args.latency_scale,
+                replay=None if args.record else args.llm_fixtures,
+                record=args.llm_fixtures if args.record else None,
+                upstream=args.llm_upstream,
+                latency_scale=args.latency_scale,
+            )
+            if not args.record:
+                os.environ["OPENAI_API_KEY"] = "stub"
+            os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+            try:
+                results.append(measure("analyze", len(jobs), analyze_calls(jobs, args.repeat), trace))
+            finally:
+                server.shutdown()
+            print(f"  ({stub_llm_server.StubHandler.replayed}/{stub_llm_server.StubHandler.requests_seen} "
+                  f"LLM requests answered from recordings)")
+
+        corpus_stages = [s for s in stages if s in CORPUS_STAGES]
+        for size in sizes if corpus_stages else []:
+            print(f"\nCorpus of {size:,} postings (batches of {args.batch:,})")
+            for stage in corpus_stages:
+                if stage == "dedup":
+                    calls = dedup_calls(size, args.batch)
+                elif stage == "rank":
+                    calls = rank_calls(size, args.batch)
+                elif stage == "save":
+                    stage_db = os.path.join(tmp, f"save_{size}.db")
+                    init_db(stage_db)
+                    calls = save_calls(size, args.batch, stage_db)
+                else:
+                    calls = prompt_calls(size, args.batch)
+                results.append(measure(stage, size, calls, trace))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.time(), "args": vars(args),
+                       "results": [dict(asdict(r), throughput=r.throughput) for r in results]}, f, indent=1)
+    if args.baseline:
+        failures = compare(results, args.baseline, args.max_regression)
+        if failures:
+            print("\n❌ Regressions against " + args.baseline)
+            for failure in failures:
+                print("  " + failure)
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.max_regression:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark for the ranking engine behind jobScraper.filter_jobs.
+
+Compares the old per-job substring loop with RankingEngine on synthetic
+descriptions, for a full ranking and for top-k selection.
+
+    python benchmarks/bench_ranking.py --jobs 50000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ranking import RankingEngine
+from bench_db import synthetic_jobs
+
+SKILLS = ["Python", "Django", "APIs", "Cloud", "AWS", "Kubernetes", "Docker", "SQL", "React", "Kafka"]
+
+
+def legacy_filter(jobs, job_title, skills, experience_years):
+    results = []
+    job_title_keywords = [w.lower() for w in job_title.split() if len(w) > 2]
+    skills = [s.strip().lower() for s in skills if s.strip()]
+    for job in jobs:
+        title = (job.get("job_title") or "").lower()
+        desc = (job.get("description") or "").lower()
+        exp_text = (job.get("experience") or "").lower()
+        title_score = sum(1 for k in job_title_keywords if k in title)
+        skill_score = sum(1 for s in skills if s in desc)
+        exp_ok = True
+        exp_match = re.findall(r"(\d+)\+?\s*year", exp_text)
+        if exp_match:
+            exp_ok = int(exp_match[0]) <= (experience_years + 3)
+        results.append({**job, "title_score": title_score, "skill_score": skill_score, "exp_ok": exp_ok})
+    return sorted(results, key=lambda j: (j["title_score"], j["skill_score"], j["exp_ok"]), reverse=True)
+
+
+def timed(label, fn, n):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:32} {elapsed * 1000:8.1f} ms  ({n / elapsed:,.0f} jobs/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=50_000)
+    parser.add_argument("--top-k", type=int, default=30)
+    args = parser.parse_args()
+
+    jobs = synthetic_jobs(args.jobs)
+    engine = RankingEngine("Software Engineer", SKILLS, 3)
+
+    timed("legacy loop (full sort)", lambda: legacy_filter(jobs, "Software Engineer", SKILLS, 3), len(jobs))
+    timed("engine score only", lambda: engine.score(jobs), len(jobs))
+    scores = engine.score(jobs)
+    timed("engine full order", lambda: engine.order(scores), len(jobs))
+    timed(f"engine top-{args.top_k}", lambda: engine.order(scores, args.top_k), len(jobs))
+
+
+if __name__ == "__main__":
+    main()
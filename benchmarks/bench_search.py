@@ -0,0 +1,45 @@
+"""
+Benchmark for database.search_jobs (FTS5) over synthetic postings.
+
+    python benchmarks/bench_search.py --jobs 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import init_db, save_jobs_to_db, search_jobs
+from bench_db import synthetic_jobs
+
+QUERIES = ["python", "kubernetes docker", "django apis", "react typescript testing", "remote equity"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench_jobs.db")
+        init_db(db_path)
+        jobs = synthetic_jobs(args.jobs)
+        for i in range(0, len(jobs), 5000):
+            save_jobs_to_db(jobs[i:i + 5000], db_path=db_path)
+
+        for query in QUERIES:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results = search_jobs(query, limit=20, db_path=db_path)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{query!r:28} {len(results)} results  median {statistics.median(timings):.1f} ms  "
+                  f"max {max(timings):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark for the per-session memory of search results: full job dicts
+(descriptions included) versus row ids plus the shared job_store records.
+
+Saves synthetic postings to a throwaway database, then measures with
+tracemalloc what each session would hold.
+
+    python benchmarks/bench_session_memory.py --jobs 300 --sessions 50 --description-words 600
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import get_jobs, init_db, save_jobs_to_db
+from job_store import JobStore
+from bench_db import FILLER, synthetic_jobs
+
+
+def measure(build):
+    """Bytes still allocated by what build() returns."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=300, help="results per search")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--description-words", type=int, default=600)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        init_db(db_path)
+        rng = random.Random(0)
+        jobs = synthetic_jobs(args.jobs)
+        for job in jobs:
+            job["description"] += " " + " ".join(rng.choices(FILLER, k=args.description_words))
+        save_jobs_to_db(jobs, db_path=db_path)
+        ids = [job["id"] for job in jobs]
+
+        # Before: every session keeps its own list of full job dicts
+        _, dict_bytes = measure(lambda: [get_jobs(ids, include_description=True, db_path=db_path)
+                                         for _ in range(args.sessions)])
+
+        # After: sessions keep ids; the records are stored once per process
+        store = JobStore(db_path)
+        _, store_bytes = measure(lambda: store.get_many(ids))
+        _, id_bytes = measure(lambda: [list(ids) for _ in range(args.sessions)])
+
+    per_session_dicts = dict_bytes / args.sessions
+    per_session_ids = id_bytes / args.sessions
+    print(f"{args.jobs} jobs per search, {args.sessions} sessions, ~{args.description_words}-word descriptions")
+    print(f"  job dicts in session_state: {per_session_dicts / 1024:8.1f} KB/session, "
+          f"{dict_bytes / 1e6:7.2f} MB total")
+    print(f"  row ids in session_state:   {per_session_ids / 1024:8.1f} KB/session, "
+          f"{(id_bytes + store_bytes) / 1e6:7.2f} MB total (shared records: {store_bytes / 1024:.1f} KB)")
+    print(f"  per-session reduction: {per_session_dicts / per_session_ids:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Startup benchmark: cold import time per module, and first-run / rerun time per page.
+
+Each import is timed in a fresh interpreter, so module-level work (clients,
+SDK imports, dotenv) is counted the way a new Streamlit process pays for it.
+Page runs use Streamlit's AppTest harness against a throwaway jobs.db; the
+first run includes imports and cache_resource setup, reruns show what every
+widget interaction costs.
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "database", "llm_service", "prompt_builder", "ranking", "dedup", "semantic",
+    "scrape_engine", "jobScraper", "resume_opt", "analysis_queue",
+]
+PAGES = ["app.py", "pages/Job_analysis.py", "pages/selected_job.py", "pages/Saved_jobs.py", "pages/Diagnostics.py"]
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def time_import(module, repeat, cwd):
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+            cwd=cwd, capture_output=True, text=True,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.getenv("PYTHONPATH")]))),
+        )
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        timings.append(float(result.stdout.strip().splitlines()[-1]) * 1000)
+    return timings, None
+
+
+def time_page(page, repeat):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, page), default_timeout=60)
+    start = time.perf_counter()
+    app.run()
+    first = (time.perf_counter() - start) * 1000
+
+    reruns = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        app.run()
+        reruns.append((time.perf_counter() - start) * 1000)
+    return first, reruns, [e.value for e in app.exception]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-pages", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("Cold import time (fresh interpreter)")
+        for module in MODULES:
+            timings, error = time_import(module, args.repeat, tmp)
+            if error:
+                print(f"  {module:16} failed: {error}")
+            else:
+                print(f"  {module:16} median {statistics.median(timings):7.1f} ms  max {max(timings):7.1f} ms")
+
+        if args.skip_pages:
+            return
+        try:
+            import streamlit.testing.v1  # noqa: F401
+        except ImportError:
+            print("streamlit is not installed; skipping page timings")
+            return
+
+        # Pages open jobs.db relative to the working directory
+        sys.path.insert(0, ROOT)
+        os.chdir(tmp)
+        print("\nPage run time (AppTest)")
+        for page in PAGES:
+            first, reruns, errors = time_page(page, args.repeat)
+            note = f"  ({len(errors)} exceptions)" if errors else ""
+            print(f"  {page:24} first {first:7.1f} ms  rerun median {statistics.median(reruns):7.1f} ms  "
+                  f"max {max(reruns):7.1f} ms{note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Synthetic job corpora for the offline benchmarks, from a thousand to a million postings.
+
+Postings are generated in batches so a 1M corpus never has to be held in
+memory at once; a share of each batch is re-posted with small edits, the way
+the same role shows up on several boards. Search-page fixtures in the format
+FixtureExtractor replays can be generated the same way.
+"""
+import math
+import random
+from typing import Dict, Iterator, List
+
+from bench_db import synthetic_jobs
+from bench_dedup import with_reposts
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def parse_size(size: str) -> int:
+    """'10k' -> 10000; plain numbers are accepted too."""
+    size = size.strip().lower()
+    return SIZES.get(size) or int(float(size.rstrip("km")) * {"k": 1_000, "m": 1_000_000}.get(size[-1], 1))
+
+
+def iter_corpus(n: int, batch_size: int = 10_000, dup_rate: float = 0.2, seed: int = 0) -> Iterator[List[Dict]]:
+    """Yields n postings in batches of batch_size (reposts included; the last batch may be smaller)."""
+    produced, batch = 0, 0
+    while produced < n:
+        size = min(batch_size, n - produced)
+        originals = math.ceil(size / (1 + dup_rate))
+        jobs = with_reposts(synthetic_jobs(originals, seed=seed + batch, start=produced), dup_rate, seed=seed + batch)
+        jobs = jobs[:size]
+        for job in jobs:
+            for key in ("title_score", "skill_score", "exp_ok"):
+                job.pop(key, None)
+        produced += len(jobs)
+        batch += 1
+        yield jobs
+
+
+def synthetic_fixture(urls: List[str], per_page: int = 20, latency: float = 3.0, jitter: float = 2.0,
+                      seed: int = 0) -> Dict[str, Dict]:
+    """{url: {'job_postings', 'latency'}} for the given search pages, as RecordingExtractor would save it."""
+    rng = random.Random(seed)
+    fixture = {}
+    for i, url in enumerate(urls):
+        jobs = synthetic_jobs(per_page, seed=seed + i, start=i * per_page)
+        for job in jobs:
+            for key in ("title_score", "skill_score", "exp_ok"):
+                job.pop(key, None)
+        fixture[url] = {"job_postings": jobs, "latency": round(latency + rng.uniform(0, jitter), 3)}
+    return fixture
@@ -0,0 +1,223 @@
+"""
+Local stand-in for the OpenAI Responses API, for running the analysis code offline.
+
+Answers POST /v1/responses with a canned reply after an artificial delay,
+either as one JSON body or, with "stream": true, as server-sent events
+split into word-sized deltas spread over the same delay.
+Point the OpenAI clients at it through the environment:
+
+    python benchmarks/stub_llm_server.py --port 8765 --latency 2.0
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub streamlit run app.py
+
+It can also record and replay real responses. With --record it forwards each
+request to --upstream (using OPENAI_API_KEY) and saves the response and its
+latency, keyed by model and input; with --replay it answers recorded requests
+with the recorded text after the recorded latency, and anything else with the
+canned reply:
+
+    python benchmarks/stub_llm_server.py --record llm_responses.json
+    python benchmarks/stub_llm_server.py --replay llm_responses.json --latency-scale 0.1
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _prompt_text(body):
+    items = body.get("input")
+    if isinstance(items, str):
+        return items
+    parts = []
+    for item in items or []:
+        content = item.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(c.get("text", "") for c in content or [])
+    return "\n".join(parts)
+
+
+def request_key(body):
+    """Recordings are matched on what determines the answer: model, instructions and input."""
+    fields = {k: body.get(k) for k in ("model", "instructions", "input")}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def response_text(response):
+    return "".join(
+        part.get("text", "")
+        for item in response.get("output") or []
+        for part in item.get("content") or []
+        if part.get("type") == "output_text"
+    )
+
+
+def make_response(body, text):
+    input_tokens = len(_prompt_text(body)) // 4
+    output_tokens = len(text) // 4
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model", "stub"),
+        "status": "completed",
+        "output": [{
+            "id": f"msg_{uuid.uuid4().hex}",
+            "type": "message",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens_details": {"reasoning_tokens": 0},
+        },
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 1.0
+    reply = "Stub analysis.\n\n💼 **SELECTED JOB OPPORTUNITIES**\n• Stub Engineer at Stub Co (Remote)"
+    requests_seen = 0
+    replayed = 0
+    lock = threading.Lock()
+    # Record/replay state, set by serve()
+    recordings = {}
+    record_path = None
+    upstream = None
+    latency_scale = 1.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/responses"):
+            self._send_json(404, {"error": {"message": f"stub has no route {self.path}"}})
+            return
+
+        with StubHandler.lock:
+            StubHandler.requests_seen += 1
+        if self.record_path:
+            response, latency = self._forward(body)
+        else:
+            recorded = self.recordings.get(request_key(body))
+            if recorded:
+                with StubHandler.lock:
+                    StubHandler.replayed += 1
+                response, latency = recorded["response"], recorded["latency"] * self.latency_scale
+            else:
+                response, latency = make_response(body, self.reply), self.latency
+            if body.get("stream"):
+                self._stream(response, latency)
+                return
+            time.sleep(latency)
+        if body.get("stream"):
+            self._stream(response, 0)
+        else:
+            self._send_json(200, response)
+
+    # Record mode: ask the real API (without streaming, so the whole response can be saved)
+    def _forward(self, body):
+        request = urllib.request.Request(
+            self.upstream.rstrip("/") + "/responses",
+            data=json.dumps({**body, "stream": False}).encode("utf-8"),
+            headers={"Content-Type": "application/json", "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY', '')}"},
+        )
+        start = time.perf_counter()
+        with urllib.request.urlopen(request, timeout=300) as upstream_response:
+            response = json.loads(upstream_response.read())
+        latency = time.perf_counter() - start
+        with StubHandler.lock:
+            StubHandler.recordings[request_key(body)] = {"response": response, "latency": round(latency, 3)}
+            with open(self.record_path, "w", encoding="utf-8") as f:
+                json.dump(StubHandler.recordings, f)
+        return response, latency
+
+    def _send_event(self, payload):
+        self.wfile.write(f"event: {payload['type']}\ndata: {json.dumps(payload)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _stream(self, response, latency):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        item_id = response["output"][0]["id"]
+        words = [w + " " for w in response_text(response).split(" ")]
+        self._send_event({"type": "response.created", "sequence_number": 0, "response": {**response, "status": "in_progress", "output": []}})
+        for i, word in enumerate(words, start=1):
+            time.sleep(latency / len(words))
+            self._send_event({
+                "type": "response.output_text.delta", "sequence_number": i, "item_id": item_id,
+                "output_index": 0, "content_index": 0, "delta": word, "logprobs": [],
+            })
+        self._send_event({"type": "response.completed", "sequence_number": len(words) + 1, "response": response})
+
+
+def serve(port=8765, latency=1.0, reply=None, replay=None, record=None,
+          upstream="https://api.openai.com/v1", latency_scale=1.0):
+    """Starts the stub in a background thread and returns the server (call .shutdown() to stop)."""
+    StubHandler.latency = latency
+    if reply is not None:
+        StubHandler.reply = reply
+    StubHandler.latency_scale = latency_scale
+    StubHandler.upstream = upstream
+    StubHandler.record_path = record
+    StubHandler.recordings = {}
+    path = replay or record
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            StubHandler.recordings = json.load(f)
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per response")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--replay", help="answer recorded requests from this JSON file")
+    mode.add_argument("--record", help="forward requests to --upstream and save the responses to this JSON file")
+    parser.add_argument("--upstream", default="https://api.openai.com/v1")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier for replayed latencies")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, replay=args.replay, record=args.record,
+                   upstream=args.upstream, latency_scale=args.latency_scale)
+    mode = f"recording to {args.record}" if args.record else (
+        f"replaying {len(StubHandler.recordings)} responses" if args.replay else f"latency {args.latency}s")
+    print(f"Stub LLM server on http://127.0.0.1:{args.port}/v1 ({mode})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
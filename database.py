@@ -1,83 +1,598 @@
+import hashlib
+import json
+import os
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from scrape_engine import board_from_url
+from tracing import add_span, span
+
+
+# Small pool of long-lived connections per database file
+class ConnectionPool:
+    def __init__(self, db_path="jobs.db", size=4):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _new_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return self._new_connection()
+        return self._idle.get()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path="jobs.db") -> ConnectionPool:
+    with _pools_lock:
+        if db_path not in _pools:
+            _pools[db_path] = ConnectionPool(db_path)
+        return _pools[db_path]
+
+
+@contextmanager
+def connection(db_path="jobs.db"):
+    """Borrows a pooled connection for reads."""
+    pool = get_pool(db_path)
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+@contextmanager
+def transaction(db_path="jobs.db"):
+    """Borrows a pooled connection and commits (or rolls back) everything done with it."""
+    start, error, changes = time.perf_counter(), None, 0
+    try:
+        with connection(db_path) as conn:
+            before = conn.total_changes
+            with conn:
+                # Take the write lock up front: under WAL, a deferred transaction that has to upgrade
+                # while another connection writes fails at once with "database is locked"
+                conn.execute("BEGIN IMMEDIATE")
+                yield conn
+            changes = conn.total_changes - before
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        add_span("db.transaction", time.perf_counter() - start, error, db=os.path.basename(db_path), changes=changes)
+
 
 def init_db(db_path="jobs.db"):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS jobs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        job_title TEXT,
-        company TEXT,
-        location TEXT,
-        experience TEXT,
-        compensation TEXT,
-        link TEXT UNIQUE,
-        description TEXT,
-        title_score INTEGER,
-        skill_score INTEGER,
-        exp_ok BOOLEAN,
-        status TEXT DEFAULT 'Not Applied'   -- for tracking applications later
+    with transaction(db_path) as conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_title TEXT,
+            company TEXT,
+            location TEXT,
+            experience TEXT,
+            compensation TEXT,
+            link TEXT UNIQUE,
+            description TEXT,
+            title_score INTEGER,
+            skill_score INTEGER,
+            exp_ok BOOLEAN,
+            status TEXT DEFAULT 'Not Applied'   -- for tracking applications later
+        )
+        """)
+    migrate_db(db_path)
+
+
+# User of single-user installs, and of anything stored before per-user data existed
+DEFAULT_USER = "default"
+# Multi-user deployments (MULTI_USER=1, see search_worker.py) keep feedback and application status per user
+MULTI_USER = os.getenv("MULTI_USER", "0") == "1"
+
+
+# Schema migrations, applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    # 1: search context + scrape time, and indexes for the browse queries
+    [
+        "ALTER TABLE jobs ADD COLUMN search_query TEXT",
+        "ALTER TABLE jobs ADD COLUMN search_location TEXT",
+        "ALTER TABLE jobs ADD COLUMN scraped_at REAL",
+        "UPDATE jobs SET title_score = COALESCE(title_score, 0), skill_score = COALESCE(skill_score, 0), "
+        "exp_ok = COALESCE(exp_ok, 1), scraped_at = COALESCE(scraped_at, 0)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_score ON jobs(title_score DESC, skill_score DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_company ON jobs(company COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_location ON jobs(location COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_scraped_at ON jobs(scraped_at)",
+    ],
+    # 2: full-text index over title, company and description, kept in sync by triggers
+    [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+            job_title, company, description,
+            content='jobs', content_rowid='id', tokenize='porter unicode61'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+            INSERT INTO jobs_fts(rowid, job_title, company, description)
+            VALUES (new.id, new.job_title, new.company, new.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+            INSERT INTO jobs_fts(jobs_fts, rowid, job_title, company, description)
+            VALUES ('delete', old.id, old.job_title, old.company, old.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE OF job_title, company, description ON jobs BEGIN
+            INSERT INTO jobs_fts(jobs_fts, rowid, job_title, company, description)
+            VALUES ('delete', old.id, old.job_title, old.company, old.description);
+            INSERT INTO jobs_fts(rowid, job_title, company, description)
+            VALUES (new.id, new.job_title, new.company, new.description);
+        END""",
+        "INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')",
+    ],
+    # 3: every board link a (deduplicated) posting was found under, as a JSON list
+    [
+        "ALTER TABLE jobs ADD COLUMN source_links TEXT",
+    ],
+    # 4: change detection for scheduled re-scrapes (content hash, first/last seen, removal time)
+    [
+        "ALTER TABLE jobs ADD COLUMN content_hash TEXT",
+        "ALTER TABLE jobs ADD COLUMN first_seen REAL",
+        "ALTER TABLE jobs ADD COLUMN last_seen REAL",
+        "ALTER TABLE jobs ADD COLUMN removed_at REAL",
+        "UPDATE jobs SET first_seen = scraped_at, last_seen = scraped_at",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_search_seen ON jobs(search_query, search_location, last_seen)",
+    ],
+    # 5: application status per user; statuses set so far belong to the default user
+    [
+        """CREATE TABLE IF NOT EXISTS job_status (
+            user_id TEXT,
+            job_id INTEGER,
+            status TEXT,
+            updated_at REAL,
+            PRIMARY KEY (user_id, job_id)
+        )""",
+        f"INSERT OR IGNORE INTO job_status (user_id, job_id, status, updated_at) "
+        f"SELECT '{DEFAULT_USER}', id, status, scraped_at FROM jobs WHERE status IS NOT NULL AND status != 'Not Applied'",
+    ],
+]
+
+
+def migrate_db(db_path="jobs.db"):
+    with transaction(db_path) as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
+            print(f"🛠️ Applied database migration {number}")
+
+
+# Re-scraped jobs refresh their content and scores but keep their application status and first_seen
+UPSERT_JOB_SQL = """
+    INSERT INTO jobs
+    (job_title, company, location, experience, compensation, link, description, title_score, skill_score, exp_ok,
+     search_query, search_location, scraped_at, source_links, content_hash, first_seen, last_seen)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(link) DO UPDATE SET
+        job_title = excluded.job_title,
+        company = excluded.company,
+        location = excluded.location,
+        experience = excluded.experience,
+        compensation = excluded.compensation,
+        description = COALESCE(NULLIF(excluded.description, ''), jobs.description),
+        title_score = excluded.title_score,
+        skill_score = excluded.skill_score,
+        exp_ok = excluded.exp_ok,
+        search_query = COALESCE(excluded.search_query, jobs.search_query),
+        search_location = COALESCE(excluded.search_location, jobs.search_location),
+        scraped_at = excluded.scraped_at,
+        source_links = COALESCE(excluded.source_links, jobs.source_links),
+        content_hash = excluded.content_hash,
+        first_seen = COALESCE(jobs.first_seen, excluded.first_seen),
+        last_seen = excluded.last_seen,
+        removed_at = NULL
+"""
+
+# Fields that make up a posting's content; a change in any of them counts as an update
+CONTENT_FIELDS = ("job_title", "company", "location", "experience", "compensation", "description")
+
+
+def job_content_hash(job):
+    content = [job.get(f) or "" for f in CONTENT_FIELDS]
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+# A posting tagged with the query that found it (multi-query searches) is saved under that query
+def _job_row(job, search_query, search_location, scraped_at, content_hash=None):
+    return (
+        job.get("job_title"),
+        job.get("company"),
+        job.get("location"),
+        job.get("experience"),
+        job.get("compensation"),
+        job.get("link"),
+        job.get("description"),
+        job.get("title_score", 0),
+        job.get("skill_score", 0),
+        int(job.get("exp_ok", True)),
+        job.get("search_query") or search_query,
+        job.get("search_location") or search_location,
+        scraped_at,
+        json.dumps(job["source_links"]) if job.get("source_links") else None,
+        content_hash or job_content_hash(job),
+        scraped_at,
+        scraped_at,
     )
-    """)
-    conn.commit()
-    conn.close()
 
 
-def save_jobs_to_db(jobs, db_path="jobs.db"):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+def save_jobs_to_db(jobs, db_path="jobs.db", search_query=None, search_location=None):
+    scraped_at = time.time()
+    rows = [_job_row(job, search_query, search_location, scraped_at) for job in jobs]
+    if not rows:
+        return
+
+    with span("save_jobs_to_db", jobs=len(rows)):
+        _save_rows(rows, db_path)
+        _assign_ids(jobs, db_path)
 
+
+# Writes each saved job's row id onto its dict, so callers can keep ids instead of whole jobs
+def _assign_ids(jobs, db_path):
+    links = [job["link"] for job in jobs if job.get("link")]
+    ids = {}
+    with connection(db_path) as conn:
+        for i in range(0, len(links), 500):
+            batch = links[i:i + 500]
+            placeholders = ",".join("?" for _ in batch)
+            ids.update(conn.execute(f"SELECT link, id FROM jobs WHERE link IN ({placeholders})", batch).fetchall())
     for job in jobs:
-        try:
-            cursor.execute("""
-                INSERT OR IGNORE INTO jobs 
-                (job_title, company, location, experience, compensation, link, description, title_score, skill_score, exp_ok)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                job.get("job_title"),
-                job.get("company"),
-                job.get("location"),
-                job.get("experience"),
-                job.get("compensation"),
-                job.get("link"),
-                job.get("description"),
-                job.get("title_score", 0),
-                job.get("skill_score", 0),
-                int(job.get("exp_ok", True)),
-            ))
-        except Exception as e:
-            print(f"⚠️ Skipped job: {e}")
-
-    conn.commit()
-    conn.close()
+        if job.get("link") in ids:
+            job["id"] = ids[job["link"]]
+
+
+def _save_rows(rows, db_path):
+    try:
+        with transaction(db_path) as conn:
+            conn.executemany(UPSERT_JOB_SQL, rows)
+    except sqlite3.Error as e:
+        # Fall back to row-by-row so one bad posting doesn't drop the whole batch
+        print(f"⚠️ Batch save failed ({e}), retrying row by row")
+        with transaction(db_path) as conn:
+            for row in rows:
+                try:
+                    conn.execute(UPSERT_JOB_SQL, row)
+                except sqlite3.Error as row_error:
+                    print(f"⚠️ Skipped job: {row_error}")
+
+
+# Outcome of save_job_deltas: links of new and changed postings, counts for the rest
+@dataclass
+class JobDeltas:
+    new: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    unchanged: int = 0
+    skipped: int = 0
+    removed: int = 0
+
+    @property
+    def written(self):
+        return len(self.new) + len(self.changed)
+
+
+def save_job_deltas(jobs, db_path="jobs.db", search_query=None, search_location=None, seen_at=None,
+                    content_hashes=None):
+    """
+    Like save_jobs_to_db, but compares each posting's content hash with the stored
+    one first: only new and changed postings are written in full, unchanged ones
+    just get their last_seen time bumped. Postings without a link are skipped.
+    content_hashes ({link: hash}) overrides the hash of a job, e.g. with the hash
+    of the posting as scraped, before deduplication merged anything into it.
+    """
+    seen_at = seen_at or time.time()
+    content_hashes = content_hashes or {}
+    deltas = JobDeltas()
+    incoming = {}
+    for job in jobs:
+        if job.get("link"):
+            incoming[job["link"]] = (job, content_hashes.get(job["link"]) or job_content_hash(job))
+        else:
+            deltas.skipped += 1
+    if not incoming:
+        return deltas
+
+    links = list(incoming)
+    with span("save_job_deltas", jobs=len(incoming)) as delta_span, transaction(db_path) as conn:
+        stored = {}
+        for i in range(0, len(links), 500):
+            batch = links[i:i + 500]
+            placeholders = ",".join("?" for _ in batch)
+            stored.update(conn.execute(
+                f"SELECT link, content_hash FROM jobs WHERE link IN ({placeholders})", batch
+            ).fetchall())
+
+        rows, touched = [], []
+        for link, (job, digest) in incoming.items():
+            if link not in stored:
+                deltas.new.append(link)
+            elif stored[link] != digest:
+                deltas.changed.append(link)
+            else:
+                deltas.unchanged += 1
+                touched.append((seen_at, link))
+                continue
+            rows.append(_job_row(job, search_query, search_location, seen_at, digest))
+
+        conn.executemany(UPSERT_JOB_SQL, rows)
+        conn.executemany("UPDATE jobs SET last_seen = ?, removed_at = NULL WHERE link = ?", touched)
+        delta_span.set(new=len(deltas.new), changed=len(deltas.changed), unchanged=deltas.unchanged)
+    return deltas
+
+
+def mark_removed_jobs(search_query, search_location, seen_before, db_path="jobs.db", removed_at=None,
+                      boards=None):
+    """
+    Flags a search's postings that have not been seen since seen_before as removed.
+    With boards, only postings whose link is on one of those boards are flagged. Returns how many.
+    """
+    if boards is not None and not boards:
+        return 0
+    with transaction(db_path) as conn:
+        rows = conn.execute("""
+            SELECT id, link FROM jobs
+            WHERE search_query = ? COLLATE NOCASE AND search_location = ? COLLATE NOCASE
+              AND removed_at IS NULL AND last_seen < ?
+        """, (search_query, search_location, seen_before)).fetchall()
+        removed_at = removed_at or time.time()
+        flagged = [(removed_at, job_id) for job_id, link in rows if boards is None or board_from_url(link or "") in boards]
+        conn.executemany("UPDATE jobs SET removed_at = ? WHERE id = ?", flagged)
+        return len(flagged)
+
+
+JOB_COLUMNS = [
+    "id", "job_title", "company", "location", "experience", "compensation", "link",
+    "title_score", "skill_score", "exp_ok", "status", "search_query", "scraped_at", "source_links",
+    "first_seen", "last_seen", "removed_at",
+]
+
+
+# A job's status for one user; jobs the user has not marked are 'Not Applied'
+STATUS_SQL = ("COALESCE((SELECT s.status FROM job_status s WHERE s.user_id = ? AND s.job_id = {table}.id), "
+              "'Not Applied')")
+
+
+def _select_list(columns, table="jobs"):
+    """SELECT list for columns with status resolved per user; its one parameter is the user id."""
+    return ", ".join(
+        f"{STATUS_SQL.format(table=table)} AS status" if c == "status" else f"{table}.{c}" for c in columns
+    )
+
+
+def set_job_status(job_id, status, user_id=DEFAULT_USER, db_path="jobs.db"):
+    with transaction(db_path) as conn:
+        conn.execute("""
+            INSERT INTO job_status (user_id, job_id, status, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(user_id, job_id) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at
+        """, (user_id, job_id, status, time.time()))
+
+
+def _rows_to_jobs(rows, columns):
+    jobs = [dict(zip(columns, r)) for r in rows]
+    for job in jobs:
+        if "exp_ok" in job:
+            job["exp_ok"] = bool(job["exp_ok"])
+        if "source_links" in job:
+            job["source_links"] = json.loads(job["source_links"]) if job["source_links"] else []
+    return jobs
+
+
+def query_jobs(company=None, location=None, status=None, exp_ok=None, min_title_score=None,
+               min_skill_score=None, scraped_after=None, scraped_before=None, search_query=None,
+               include_removed=True, sort="score", limit=50, cursor=None, include_description=False,
+               user_id=DEFAULT_USER, db_path="jobs.db"):
+    """
+    Filtered, keyset-paginated job listing.
+
+    `sort` is 'score' (title score, skill score, newest first) or 'recent'.
+    Status, both the filter and the returned column, is user_id's own.
+    Returns (jobs, next_cursor); pass next_cursor back to get the following page.
+    It is None once there are no more rows.
+    """
+    where, params = [], []
+    if company:
+        where.append("company = ? COLLATE NOCASE")
+        params.append(company)
+    if location:
+        # A prefix range on the NOCASE index; unlike LIKE, '%' and '_' in the input match only themselves
+        where.append("location >= ? COLLATE NOCASE AND location < ? COLLATE NOCASE")
+        params.extend([location, location + "\U0010FFFF"])
+    if status:
+        where.append(f"{STATUS_SQL.format(table='jobs')} = ?")
+        params.extend([user_id, status])
+    if exp_ok is not None:
+        where.append("exp_ok = ?")
+        params.append(int(exp_ok))
+    if min_title_score is not None:
+        where.append("title_score >= ?")
+        params.append(min_title_score)
+    if min_skill_score is not None:
+        where.append("skill_score >= ?")
+        params.append(min_skill_score)
+    if scraped_after is not None:
+        where.append("scraped_at >= ?")
+        params.append(scraped_after)
+    if scraped_before is not None:
+        where.append("scraped_at < ?")
+        params.append(scraped_before)
+    if search_query:
+        where.append("search_query = ? COLLATE NOCASE")
+        params.append(search_query)
+    if not include_removed:
+        where.append("removed_at IS NULL")
+
+    if sort == "score":
+        order_by = "title_score DESC, skill_score DESC, id DESC"
+        if cursor:
+            where.append("(title_score, skill_score, id) < (?, ?, ?)")
+            params.extend(cursor)
+    elif sort == "recent":
+        order_by = "id DESC"
+        if cursor:
+            where.append("id < ?")
+            params.append(cursor[-1])
+    else:
+        raise ValueError(f"Unknown sort: {sort}")
+
+    columns = JOB_COLUMNS + (["description"] if include_description else [])
+    sql = f"SELECT {_select_list(columns)} FROM jobs"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order_by} LIMIT ?"
+    params.append(limit + 1)
+
+    with connection(db_path) as conn:
+        rows = conn.execute(sql, [user_id] + params).fetchall()
+
+    jobs = _rows_to_jobs(rows[:limit], columns)
+    next_cursor = None
+    if len(rows) > limit:
+        last = jobs[-1]
+        next_cursor = (last["title_score"], last["skill_score"], last["id"]) if sort == "score" else (last["id"],)
+    return jobs, next_cursor
+
+
+def get_job(job_id, user_id=DEFAULT_USER, db_path="jobs.db"):
+    columns = JOB_COLUMNS + ["description"]
+    with connection(db_path) as conn:
+        row = conn.execute(f"SELECT {_select_list(columns)} FROM jobs WHERE id = ?", (user_id, job_id)).fetchone()
+    return _rows_to_jobs([row], columns)[0] if row else None
+
+
+def get_jobs(job_ids, include_description=False, user_id=DEFAULT_USER, db_path="jobs.db"):
+    """Jobs by row id, in the order given (ids that no longer exist are left out)."""
+    columns = JOB_COLUMNS + (["description"] if include_description else [])
+    job_ids = list(job_ids)
+    by_id = {}
+    with connection(db_path) as conn:
+        for i in range(0, len(job_ids), 500):
+            batch = job_ids[i:i + 500]
+            placeholders = ",".join("?" for _ in batch)
+            rows = conn.execute(
+                f"SELECT {_select_list(columns)} FROM jobs WHERE id IN ({placeholders})", [user_id] + batch
+            ).fetchall()
+            by_id.update((job["id"], job) for job in _rows_to_jobs(rows, columns))
+    return [by_id[job_id] for job_id in job_ids if job_id in by_id]
+
+
+def get_job_description(job_id, db_path="jobs.db"):
+    with connection(db_path) as conn:
+        row = conn.execute("SELECT description FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return row[0] if row else None
+
+
+# Matches ranked per search. A query matching more rows (common words) ranks only the newest
+# ones: BM25 costs time per matching row and says little about words most postings contain.
+SEARCH_RANK_WINDOW = 20_000
+
+
+def _fts_query(text):
+    # Quote every term so user input can't be parsed as FTS5 syntax; terms are ANDed
+    terms = [t.replace('"', '""') for t in text.split()]
+    return " ".join(f'"{t}"' for t in terms if t)
+
+
+def search_jobs(text, limit=20, user_id=DEFAULT_USER, db_path="jobs.db"):
+    """
+    Full-text search over stored jobs, ranked by BM25 (title matches weigh most).
+    Very common queries are ranked among their newest SEARCH_RANK_WINDOW matches.
+    """
+    match = _fts_query(text)
+    if not match:
+        return []
+
+    with connection(db_path) as conn:
+        # Lowest rowid of the newest SEARCH_RANK_WINDOW matches (FTS5 walks rowids without scoring)
+        oldest = conn.execute("""
+            SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?
+        """, (match, SEARCH_RANK_WINDOW - 1)).fetchone()
+        # Rank first, then build snippets only for the rows that made the cut
+        top = conn.execute("""
+            SELECT rowid, bm25(jobs_fts, 5.0, 2.0, 1.0) AS rank
+            FROM jobs_fts
+            WHERE jobs_fts MATCH ? AND rowid >= ?
+            ORDER BY rank
+            LIMIT ?
+        """, (match, oldest[0] if oldest else 0, limit)).fetchall()
+        if not top:
+            return []
+
+        ids = [row[0] for row in top]
+        placeholders = ",".join("?" for _ in ids)
+        rows = conn.execute(f"""
+            SELECT j.id, j.job_title, j.company, j.location, j.compensation, j.link, {STATUS_SQL.format(table="j")},
+                   snippet(jobs_fts, 2, '**', '**', '…', 16)
+            FROM jobs_fts
+            JOIN jobs j ON j.id = jobs_fts.rowid
+            WHERE jobs_fts MATCH ? AND jobs_fts.rowid IN ({placeholders})
+        """, (user_id, match, *ids)).fetchall()
+
+    columns = ["id", "job_title", "company", "location", "compensation", "link", "status", "snippet"]
+    by_id = {job["id"]: job for job in _rows_to_jobs(rows, columns)}
+    results = []
+    for job_id, rank in top:
+        if job_id in by_id:
+            by_id[job_id]["rank"] = rank
+            results.append(by_id[job_id])
+    return results
+
+
+def count_jobs(db_path="jobs.db"):
+    with connection(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+def iter_jobs(batch_size=2000, include_description=True, db_path="jobs.db", **filters):
+    """Yields every matching job in keyset-paginated batches (newest first), so callers never hold one huge result."""
+    cursor = None
+    while True:
+        jobs, cursor = query_jobs(sort="recent", limit=batch_size, cursor=cursor,
+                                  include_description=include_description, db_path=db_path, **filters)
+        if jobs:
+            yield jobs
+        if cursor is None:
+            return
 
 
 def load_jobs_from_db(limit=30, db_path="jobs.db"):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT job_title, company, location, experience, compensation, link, description, status 
-        FROM jobs
-        ORDER BY id DESC
-        LIMIT ?
-    """, (limit,))
-    
-    rows = cursor.fetchall()
-    conn.close()
-
-    jobs = [
-        {
-            "job_title": r[0],
-            "company": r[1],
-            "location": r[2],
-            "experience": r[3],
-            "compensation": r[4],
-            "link": r[5],
-            "description": r[6],
-            "status": r[7],
-        }
-        for r in rows
-    ]
+    jobs, _ = query_jobs(sort="recent", limit=limit, include_description=True, db_path=db_path)
     return jobs
@@ -0,0 +1,177 @@
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ranking import EXPERIENCE_RE
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Fixed seed so signatures are comparable across runs
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+WORD_RE = re.compile(r"[a-z0-9+#]+")
+COMPANY_SUFFIXES = {"inc", "llc", "ltd", "corp", "corporation", "co", "company", "plc", "gmbh"}
+TITLE_NOISE = {"remote", "hybrid", "onsite", "on", "site", "full", "time", "fulltime"}
+# Title abbreviations boards spell differently
+TITLE_ALIASES = {"sr": "senior", "jr": "junior", "eng": "engineer", "dev": "developer", "mgr": "manager"}
+
+
+def _words(text: str) -> List[str]:
+    return WORD_RE.findall((text or "").lower())
+
+
+def normalize_company(company: str) -> str:
+    return " ".join(w for w in _words(company) if w not in COMPANY_SUFFIXES)
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(TITLE_ALIASES.get(w, w) for w in _words(title) if w not in TITLE_NOISE)
+
+
+def experience_years(experience: str) -> Optional[int]:
+    match = EXPERIENCE_RE.search(experience or "")
+    return int(match.group(1)) if match else None
+
+
+def normalize_location(location: str) -> str:
+    # City only: "Austin, TX 78701" and "Austin, Texas" both become "austin"
+    return " ".join(_words((location or "").split(",")[0]))
+
+
+def job_key(job: Dict) -> Tuple[str, str, str]:
+    return (
+        normalize_company(job.get("company")),
+        normalize_title(job.get("job_title")),
+        normalize_location(job.get("location")),
+    )
+
+
+def minhash(text: str, shingle_size: int = 3) -> Optional[np.ndarray]:
+    """MinHash signature over word shingles, or None when the text is too short to compare."""
+    words = _words(text)
+    if len(words) < shingle_size * 2:
+        return None
+    shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+
+def estimated_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class Deduplicator:
+    """
+    Merges postings of the same role across boards into one canonical record.
+
+    Two postings are duplicates when their normalized (company, title, city)
+    keys are equal and complete, or when they share a company and the same
+    title words, don't ask for different years of experience, and their
+    descriptions' MinHash similarity is at least `threshold` (templated
+    boilerplate makes different roles at one company look alike). Candidates
+    come from a key index and LSH buckets, so the work stays roughly linear in
+    the number of postings. State is kept across add() calls, so batches can
+    be fed in as they are scraped.
+    """
+
+    def __init__(self, threshold: float = 0.7):
+        self.threshold = threshold
+        self.canonical: List[Dict] = []
+        self._signatures: List[Optional[np.ndarray]] = []
+        self._companies: List[str] = []
+        self._titles: List[frozenset] = []
+        self._years: List[Optional[int]] = []
+        self._by_key: Dict[Tuple[str, str, str], int] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+
+    def _find_duplicate(self, key, company, signature, title, years) -> Optional[int]:
+        if all(key) and key in self._by_key:
+            return self._by_key[key]
+        if signature is None:
+            return None
+
+        seen = set()
+        for band in range(BANDS):
+            for idx in self._buckets.get(self._band_key(signature, band), ()):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                other = self._signatures[idx]
+                if (
+                    self._companies[idx] == company
+                    and self._titles[idx] == title
+                    and (years is None or self._years[idx] is None or self._years[idx] == years)
+                    and estimated_jaccard(signature, other) >= self.threshold
+                ):
+                    return idx
+        return None
+
+    @staticmethod
+    def _band_key(signature, band):
+        start = band * ROWS_PER_BAND
+        return band, signature[start:start + ROWS_PER_BAND].tobytes()
+
+    def _register(self, job, key, company, signature, title, years) -> int:
+        idx = len(self.canonical)
+        job.setdefault("source_links", [job["link"]] if job.get("link") else [])
+        self.canonical.append(job)
+        self._signatures.append(signature)
+        self._companies.append(company)
+        self._titles.append(title)
+        self._years.append(years)
+        # Postings missing a company, title or city would all share one key
+        if all(key):
+            self._by_key.setdefault(key, idx)
+        if signature is not None:
+            for band in range(BANDS):
+                self._buckets.setdefault(self._band_key(signature, band), []).append(idx)
+        return idx
+
+    @staticmethod
+    def _merge(canonical: Dict, dup: Dict):
+        for link in dup.get("source_links") or [dup.get("link")]:
+            if link and link not in canonical["source_links"]:
+                canonical["source_links"].append(link)
+        # Fill in fields the canonical posting lacks; its description is its own and is never replaced
+        for field in ("experience", "compensation", "location"):
+            if canonical.get(field) in (None, "", "N/A") and dup.get(field) not in (None, "", "N/A"):
+                canonical[field] = dup[field]
+
+    def add(self, jobs: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Returns (new, updated): postings not seen before, and previously returned
+        canonical records that just absorbed a duplicate (their source_links grew).
+        """
+        new, updated = [], {}
+        new_ids = set()
+        for job in jobs:
+            key = job_key(job)
+            company = key[0]
+            title = frozenset(key[1].split())
+            years = experience_years(job.get("experience"))
+            signature = minhash(job.get("description"))
+            idx = self._find_duplicate(key, company, signature, title, years)
+            if idx is None:
+                idx = self._register(job, key, company, signature, title, years)
+                new.append(job)
+                new_ids.add(idx)
+                continue
+
+            self._merge(self.canonical[idx], job)
+            if idx not in new_ids:
+                updated[idx] = self.canonical[idx]
+        return new, list(updated.values())
+
+
+def dedupe_jobs(jobs: List[Dict], threshold: float = 0.7) -> List[Dict]:
+    new, _ = Deduplicator(threshold).add(jobs)
+    print(f"🧹 Deduplicated {len(jobs)} postings into {len(new)} unique jobs")
+    return new
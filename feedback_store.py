@@ -0,0 +1,309 @@
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from database import DEFAULT_USER, connection, transaction
+from dedup import normalize_company
+from ranking import TermMatcher
+
+# Older versions appended feedback to this file; it is imported into the store once
+LEGACY_FEEDBACK_FILE = "agent_feedback.txt"
+
+CLAUSE_SPLIT_RE = re.compile(r"[.;,\n]+|\band\b|\bbut\b", re.IGNORECASE)
+LESS = r"(?:fewer|less|no|not|avoid|skip|exclude|without|stop showing|don'?t show)"
+MORE = r"(?:more|prefer|only|mostly|want|show me|focus on)"
+ROLE_WORDS = r"(?:jobs?|roles?|positions?|postings?|listings?|opportunities|openings)"
+SENIOR_WORDS = r"(?:senior|sr|staff|principal|lead|manager|director|experienced)"
+JUNIOR_WORDS = r"(?:junior|jr|entry[ -]level|new grad|graduate|intern|internships?)"
+ONSITE_WORDS = r"(?:on-?site|in[- ]office|in[- ]person)"
+
+SENIOR_TITLE_RE = re.compile(r"\b(?:senior|sr|staff|principal|lead|director|head|manager)\b", re.IGNORECASE)
+JUNIOR_TITLE_RE = re.compile(r"\b(?:junior|jr|entry|associate|graduate|intern)\b", re.IGNORECASE)
+REMOTE_RE = re.compile(r"\bremote\b", re.IGNORECASE)
+
+# (pattern, kind, weight); the first capture group, if any, is the value
+RULES = [
+    (re.compile(rf"\b{LESS}\b.*\b{SENIOR_WORDS}\b", re.I), "seniority", -1),
+    (re.compile(rf"\b{MORE}\b.*\b{JUNIOR_WORDS}\b", re.I), "seniority", -1),
+    (re.compile(rf"\b{MORE}\b.*\b{SENIOR_WORDS}\b", re.I), "seniority", 1),
+    # "no on-site jobs" asks for remote ones; a plain "on-site roles" for the opposite
+    (re.compile(rf"\b{LESS}\b.*\b{ONSITE_WORDS}\b", re.I), "remote", 1),
+    (re.compile(rf"\b{LESS}\b.*\bremote\b|\b{ONSITE_WORDS}\b", re.I), "remote", -1),
+    (re.compile(rf"\b{MORE}\b.*\bremote\b|\bremote\b.*\bonly\b", re.I), "remote", 1),
+    (re.compile(rf"\b{LESS}\b\s+(?:{ROLE_WORDS}\s+)?(?:from|at)\s+(.+)", re.I), "company", -1),
+    (re.compile(r"\b(?:exclude|block|hide|blacklist)\s+(?:company\s+|companies\s+)?(.+)", re.I), "company", -1),
+    (re.compile(rf"\b{MORE}\b\s+(?:{ROLE_WORDS}\s+)?(?:from|at)\s+(.+)", re.I), "company", 1),
+    (re.compile(rf"\b{MORE}\b\s+(?:{ROLE_WORDS}\s+)?in\s+(.+)", re.I), "location", 1),
+    (re.compile(rf"\b{LESS}\b\s+(.+?)\s+{ROLE_WORDS}\b", re.I), "term", -1),
+    (re.compile(rf"\b{MORE}\b\s+(.+?)\s+{ROLE_WORDS}\b", re.I), "term", 1),
+]
+
+# Preferences fields for the kinds that carry a value
+PREFERENCE_FIELDS = {"company": "companies", "location": "locations", "term": "terms"}
+
+# Points added to a job's title score in filter_jobs
+SENIORITY_WEIGHT = 2
+REMOTE_WEIGHT = 1
+COMPANY_WEIGHT = 2
+LOCATION_WEIGHT = 1
+TERM_WEIGHT = 1
+
+
+def _clean_value(value: str) -> str:
+    value = re.sub(r"\b(?:please|anymore|any more|thanks?)\b", "", value, flags=re.I)
+    return " ".join(value.strip(" '\"!?").split()).lower()
+
+
+def parse_feedback(text: str) -> List[Tuple[str, str, int]]:
+    """
+    Turns free-text feedback into (kind, value, weight) preferences, e.g.
+    "fewer senior jobs, more remote roles, no jobs from Acme" ->
+    [("seniority", "", -1), ("remote", "", 1), ("company", "acme", -1)].
+    Clauses that match no rule are ignored here (the raw note is kept in the store).
+    """
+    preferences = []
+    for clause in CLAUSE_SPLIT_RE.split(text or ""):
+        clause = clause.strip()
+        if not clause:
+            continue
+        for pattern, kind, weight in RULES:
+            match = pattern.search(clause)
+            if not match:
+                continue
+            value = _clean_value(match.group(1)) if pattern.groups else ""
+            if pattern.groups and not value:
+                continue
+            # "more remote roles" / "fewer senior roles" are handled by their own rules
+            if kind == "term" and re.fullmatch(rf"{SENIOR_WORDS}|{JUNIOR_WORDS}|remote", value, re.I):
+                continue
+            preferences.append((kind, value, weight))
+            break
+    return preferences
+
+
+@dataclass
+class Preferences:
+    seniority: int = 0
+    remote: int = 0
+    companies: Dict[str, int] = field(default_factory=dict)
+    locations: Dict[str, int] = field(default_factory=dict)
+    terms: Dict[str, int] = field(default_factory=dict)
+    notes: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        # Company names are compared normalized, so "acme inc" also matches "Acme, Inc." and "ACME Inc."
+        self._companies = {normalize_company(c): w for c, w in self.companies.items()}
+        self._boost = TermMatcher([t for t, w in self.terms.items() if w > 0])
+        self._avoid = TermMatcher([t for t, w in self.terms.items() if w < 0])
+
+    def __bool__(self):
+        return bool(self.seniority or self.remote or self.companies or self.locations or self.terms)
+
+    def company_weight(self, job: Dict) -> int:
+        return self._companies.get(normalize_company(job.get("company")), 0) if self._companies else 0
+
+    def excludes(self, job: Dict) -> bool:
+        return self.company_weight(job) < 0
+
+    def score(self, job: Dict) -> int:
+        """Ranking adjustment for one job; positive means the user would rather see it."""
+        title = job.get("job_title") or ""
+        adjustment = 0
+        if self.seniority:
+            if SENIOR_TITLE_RE.search(title):
+                adjustment += self.seniority * SENIORITY_WEIGHT
+            elif JUNIOR_TITLE_RE.search(title):
+                adjustment -= self.seniority * SENIORITY_WEIGHT
+        if self.remote and REMOTE_RE.search(f"{title} {job.get('location') or ''}"):
+            adjustment += self.remote * REMOTE_WEIGHT
+        adjustment += COMPANY_WEIGHT * self.company_weight(job)
+        if self.locations:
+            location = (job.get("location") or "").lower()
+            adjustment += LOCATION_WEIGHT * sum(w for loc, w in self.locations.items() if loc in location)
+        if self.terms:
+            text = f"{title} {job.get('description') or ''}"
+            adjustment += TERM_WEIGHT * (self._boost.count(text) - self._avoid.count(text))
+        return adjustment
+
+    def summary(self) -> str:
+        """Compact, deduplicated preference lines for prompts."""
+        lines = []
+        if self.seniority:
+            lines.append("Prefers more senior roles" if self.seniority > 0 else "Prefers fewer senior roles")
+        if self.remote:
+            lines.append("Prefers remote roles" if self.remote > 0 else "Prefers on-site roles")
+        for label, values in (("companies", self.companies), ("locations", self.locations), ("topics", self.terms)):
+            liked = sorted(v for v, w in values.items() if w > 0)
+            disliked = sorted(v for v, w in values.items() if w < 0)
+            if liked:
+                lines.append(f"Favors {label}: {', '.join(liked)}")
+            if disliked:
+                lines.append(f"Avoids {label}: {', '.join(disliked)}")
+        if self.notes:
+            lines.append("Other notes: " + "; ".join(self.notes))
+        return "\n".join(f"- {line}" for line in lines)
+
+
+class FeedbackStore:
+    """
+    User feedback in jobs.db: the raw entries (feedback) and the preferences
+    parsed from them (feedback_preferences, one row per user, kind and value,
+    so repeated feedback is deduplicated and newer feedback overrides older).
+    Every method takes the user_id whose feedback it reads or writes.
+
+    preferences() is memoized per user and rebuilt only when that user's
+    feedback changes; a cheap stamp query catches writes from other processes.
+    """
+
+    def __init__(self, db_path="jobs.db", legacy_file: Optional[str] = LEGACY_FEEDBACK_FILE, max_notes: int = 5):
+        self.db_path = db_path
+        self.legacy_file = legacy_file
+        self.max_notes = max_notes
+        self._initialized = False
+        self._lock = threading.Lock()
+        self._memo: Dict[str, Tuple[tuple, Preferences]] = {}
+
+    def _ensure_table(self):
+        if self._initialized:
+            return
+        with transaction(self.db_path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS feedback (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                text TEXT,
+                parsed INTEGER,
+                created_at REAL,
+                user_id TEXT DEFAULT 'default'
+            )
+            """)
+            upgraded = self._add_user_columns(conn)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_feedback_user ON feedback(user_id, id)")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS feedback_preferences (
+                user_id TEXT,
+                kind TEXT,
+                value TEXT,
+                weight INTEGER,
+                feedback_id INTEGER,
+                updated_at REAL,
+                PRIMARY KEY (user_id, kind, value)
+            )
+            """)
+            if upgraded:
+                conn.execute(f"""
+                    INSERT INTO feedback_preferences (user_id, kind, value, weight, feedback_id, updated_at)
+                    SELECT '{DEFAULT_USER}', kind, value, weight, feedback_id, updated_at FROM feedback_preferences_old
+                """)
+                conn.execute("DROP TABLE feedback_preferences_old")
+            conn.execute("CREATE TABLE IF NOT EXISTS feedback_meta (key TEXT PRIMARY KEY, value TEXT)")
+            imported = conn.execute("SELECT 1 FROM feedback_meta WHERE key = 'legacy_imported'").fetchone()
+            if not imported:
+                conn.execute("INSERT INTO feedback_meta (key, value) VALUES ('legacy_imported', ?)", (str(time.time()),))
+                if self.legacy_file and os.path.exists(self.legacy_file):
+                    with open(self.legacy_file, "r", encoding="utf-8") as f:
+                        lines = [line.strip() for line in f if line.strip()]
+                    for line in lines:
+                        self._insert(conn, line)
+                    print(f"📥 Imported {len(lines)} feedback entries from {self.legacy_file}")
+        self._initialized = True
+
+    # Stores from before per-user feedback: existing feedback becomes the default user's
+    @staticmethod
+    def _add_user_columns(conn) -> bool:
+        """Adds feedback.user_id; returns True if feedback_preferences was moved aside to be rebuilt."""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(feedback)")}
+        if "user_id" not in columns:
+            conn.execute(f"ALTER TABLE feedback ADD COLUMN user_id TEXT DEFAULT '{DEFAULT_USER}'")
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(feedback_preferences)")}
+        if columns and "user_id" not in columns:
+            conn.execute("ALTER TABLE feedback_preferences RENAME TO feedback_preferences_old")
+            return True
+        return False
+
+    def _insert(self, conn, text: str, user_id: str = DEFAULT_USER) -> List[Tuple[str, str, int]]:
+        parsed = parse_feedback(text)
+        now = time.time()
+        feedback_id = conn.execute(
+            "INSERT INTO feedback (text, parsed, created_at, user_id) VALUES (?, ?, ?, ?)",
+            (text, int(bool(parsed)), now, user_id),
+        ).lastrowid
+        conn.executemany("""
+            INSERT INTO feedback_preferences (user_id, kind, value, weight, feedback_id, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, kind, value) DO UPDATE SET
+                weight = excluded.weight, feedback_id = excluded.feedback_id, updated_at = excluded.updated_at
+        """, [(user_id, kind, value, weight, feedback_id, now) for kind, value, weight in parsed])
+        return parsed
+
+    def add(self, text: str, user_id: str = DEFAULT_USER) -> List[Tuple[str, str, int]]:
+        """Stores one piece of feedback and returns the preferences parsed from it."""
+        text = " ".join((text or "").split())
+        if not text:
+            return []
+        self._ensure_table()
+        with transaction(self.db_path) as conn:
+            parsed = self._insert(conn, text, user_id)
+        self._memo.pop(user_id, None)
+        return parsed
+
+    def reset(self, user_id: str = DEFAULT_USER):
+        self._ensure_table()
+        with transaction(self.db_path) as conn:
+            conn.execute("DELETE FROM feedback WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM feedback_preferences WHERE user_id = ?", (user_id,))
+        self._memo.pop(user_id, None)
+
+    def entries(self, limit: int = 50, user_id: str = DEFAULT_USER) -> List[Dict]:
+        self._ensure_table()
+        with connection(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT id, text, parsed, created_at FROM feedback WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                (user_id, limit),
+            ).fetchall()
+        return [{"id": r[0], "text": r[1], "parsed": bool(r[2]), "created_at": r[3]} for r in rows]
+
+    def _stamp(self, conn, user_id: str) -> tuple:
+        return conn.execute(
+            "SELECT COUNT(*), COALESCE(MAX(id), 0) FROM feedback WHERE user_id = ?", (user_id,)
+        ).fetchone()
+
+    def preferences(self, user_id: str = DEFAULT_USER) -> Preferences:
+        self._ensure_table()
+        with connection(self.db_path) as conn:
+            stamp = self._stamp(conn, user_id)
+            memo = self._memo.get(user_id)
+            if memo is not None and memo[0] == stamp:
+                return memo[1]
+
+            rows = conn.execute(
+                "SELECT kind, value, weight FROM feedback_preferences WHERE user_id = ?", (user_id,)
+            ).fetchall()
+            # Feedback that matched no rule is kept as short notes, newest first, without repeats
+            notes = {}
+            for (text,) in conn.execute(
+                "SELECT text FROM feedback WHERE user_id = ? AND parsed = 0 ORDER BY id DESC", (user_id,)
+            ):
+                notes.setdefault(text.lower().rstrip(". "), text[:120])
+                if len(notes) >= self.max_notes:
+                    break
+
+        fields = {"companies": {}, "locations": {}, "terms": {}}
+        for kind, value, weight in rows:
+            if kind in ("seniority", "remote"):
+                fields[kind] = weight
+            else:
+                fields[PREFERENCE_FIELDS[kind]][value] = weight
+        prefs = Preferences(notes=list(notes.values()), **fields)
+        with self._lock:
+            self._memo[user_id] = (stamp, prefs)
+        return prefs
+
+    def summary(self, user_id: str = DEFAULT_USER) -> str:
+        return self.preferences(user_id).summary()
+
+
+# Shared store used by the app and the analysis prompts
+feedback_store = FeedbackStore()
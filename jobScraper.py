@@ -1,55 +1,35 @@
 import os
 import asyncio
-from typing import List, Dict
-from dataclasses import dataclass
+import functools
+import time
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
-from firecrawl import FirecrawlApp
-from openai import OpenAI
-import re
+import heapq
+from llm_service import StreamMetrics, llm
+from scrape_cache import ScrapeCache, scrape_cache
+from prompt_builder import pack_jobs
+from ranking import RankingEngine
+from dedup import Deduplicator
+from database import DEFAULT_USER
+from feedback_store import Preferences, feedback_store
+from scrape_engine import ScrapeEngine, chunk_urls_by_board
+from tracing import add_span, span
 
 
 # Load environment variables
 load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
-firecrawl = FirecrawlApp(api_key=FIRECRAWL_API_KEY)
 
+# The Firecrawl SDK is slow to import, so the client is only built when a scrape needs it
+@functools.lru_cache(maxsize=None)
+def get_firecrawl():
+    from firecrawl import FirecrawlApp
+    return FirecrawlApp(api_key=FIRECRAWL_API_KEY)
 
-# Dataclass for jobs structure
-@dataclass
-class JobPost:
-    job_title: str
-    company: str
-    location: str
-    experience: str
-    compensation: str
-    link: str
-    description: str
 
-
-# Function to scrape jobs using Firecrawl
-async def scrape_jobs(job_title: str, location: str, skills: List[str], pages: int = 3) -> List[Dict]:
-    formatted_job_title = job_title.replace(" ", "+")
-    formatted_location = location.replace(" ", "+")
-    all_urls = []
-
-    for p in range(1, pages + 1):
-        all_urls.append(f"https://www.ziprecruiter.com/candidate/search?search={formatted_job_title}&location={formatted_location}&page={p}")
-        all_urls.append(f"https://www.glassdoor.com/Job/jobs.htm?sc.keyword={formatted_job_title}&locT=C&locKeyword={formatted_location}&p={p}")
-        all_urls.append(f"https://www.wayup.com/s/jobs/?title={formatted_job_title}&location={formatted_location}&page={p}")
-        all_urls.append(f"https://joinhandshake.com/students/jobs/?q={formatted_job_title}&location={formatted_location}&page={p}")
-
-    job_posts = []
-    chunk_size = 10
-    for i in range(0, len(all_urls), chunk_size):
-        urls_chunk = all_urls[i:i+chunk_size]
-        print(f"Scraping chunk {i//chunk_size + 1} with {len(urls_chunk)} URLs")
-
-        raw_response = firecrawl.extract(
-            urls=urls_chunk,
-            prompt="""
+# Firecrawl extraction prompt and schema
+EXTRACT_PROMPT = """
             Extract job postings. Fields:
             - job_title
             - company
@@ -59,41 +39,248 @@ async def scrape_jobs(job_title: str, location: str, skills: List[str], pages: i
             - link
             - description (FULL job description if available; if missing, summarize responsibilities and requirements from listing)
             Return as JSON under 'job_postings'.
-            """,
-            schema={
+            """
+
+EXTRACT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "job_postings": {
+            "type": "array",
+            "items": {
                 "type": "object",
                 "properties": {
-                    "job_postings": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "job_title": {"type": "string"},
-                                "company": {"type": "string"},
-                                "location": {"type": "string"},
-                                "experience": {"type": "string"},
-                                "compensation": {"type": "string"},
-                                "link": {"type": "string"},
-                                "description": {"type": "string"},
-                            },
-                            "required": ["job_title", "company", "location", "link"],
-                        },
-                    }
+                    "job_title": {"type": "string"},
+                    "company": {"type": "string"},
+                    "location": {"type": "string"},
+                    "experience": {"type": "string"},
+                    "compensation": {"type": "string"},
+                    "link": {"type": "string"},
+                    "description": {"type": "string"},
                 },
-                "required": ["job_postings"],
+                "required": ["job_title", "company", "location", "link"],
             },
-            enable_web_search=False,
-            ignore_invalid_urls=True,
-        )
+        }
+    },
+    "required": ["job_postings"],
+}
+
+# Scraping engine settings (overridable through the environment).
+SCRAPE_MAX_CONCURRENCY = int(os.getenv("SCRAPE_MAX_CONCURRENCY", "4"))
+SCRAPE_CHUNK_TIMEOUT = float(os.getenv("SCRAPE_CHUNK_TIMEOUT", "120"))
+SCRAPE_MAX_RETRIES = int(os.getenv("SCRAPE_MAX_RETRIES", "2"))
+# Cap on concurrent extract calls when a multi-query search fans out over several title/location pairs
+SCRAPE_MAX_FANOUT = int(os.getenv("SCRAPE_MAX_FANOUT", "16"))
+# Minimum seconds between two extract calls against the same board
+BOARD_RATE_LIMITS = {
+    "ziprecruiter": 1.0,
+    "glassdoor": 2.0,
+    "wayup": 0.5,
+    "handshake": 0.5,
+}
+
+# Search page URL per board
+SEARCH_URL_TEMPLATES = {
+    "ziprecruiter": "https://www.ziprecruiter.com/candidate/search?search={title}&location={location}&page={page}",
+    "glassdoor": "https://www.glassdoor.com/Job/jobs.htm?sc.keyword={title}&locT=C&locKeyword={location}&p={page}",
+    "wayup": "https://www.wayup.com/s/jobs/?title={title}&location={location}&page={page}",
+    "handshake": "https://joinhandshake.com/students/jobs/?q={title}&location={location}&page={page}",
+}
+
+
+def firecrawl_extract(urls: List[str]) -> Dict:
+    raw_response = get_firecrawl().extract(
+        urls=urls,
+        prompt=EXTRACT_PROMPT,
+        schema=EXTRACT_SCHEMA,
+        enable_web_search=False,
+        ignore_invalid_urls=True,
+    )
+    return getattr(raw_response, "data", None) or {}
+
+
+def build_engine(extract_fn=None, max_concurrency: int = None) -> ScrapeEngine:
+    return ScrapeEngine(
+        extract_fn or firecrawl_extract,
+        max_concurrency=max_concurrency or SCRAPE_MAX_CONCURRENCY,
+        board_intervals=BOARD_RATE_LIMITS,
+        chunk_timeout=SCRAPE_CHUNK_TIMEOUT,
+        max_retries=SCRAPE_MAX_RETRIES,
+    )
 
-        data = getattr(raw_response, "data", None)
-        if data:
-            job_posts.extend(data.get("job_postings", []))
+
+def build_search_targets(job_title: str, location: str, pages: int = 3) -> List[Dict]:
+    """One target per (board, page): {'board', 'page', 'url'}."""
+    formatted_job_title = job_title.replace(" ", "+")
+    formatted_location = location.replace(" ", "+")
+    return [
+        {
+            "board": board,
+            "page": p,
+            "url": template.format(title=formatted_job_title, location=formatted_location, page=p),
+        }
+        for p in range(1, pages + 1)
+        for board, template in SEARCH_URL_TEMPLATES.items()
+    ]
+
+
+def build_search_urls(job_title: str, location: str, pages: int = 3) -> List[str]:
+    return [t["url"] for t in build_search_targets(job_title, location, pages)]
+
+
+def unique_terms(terms: List[str]) -> List[str]:
+    """Stripped, non-empty terms in order, without case-insensitive repeats."""
+    seen = {}
+    for term in terms:
+        term = term.strip()
+        if term and term.lower() not in seen:
+            seen[term.lower()] = term
+    return list(seen.values())
+
+
+def build_multi_search_targets(job_titles: List[str], locations: List[str], pages: int = 3) -> List[Dict]:
+    """
+    Targets for every (title, location) pair, each URL once even if several pairs
+    build it. Each target also records the 'job_title' and 'location' it was built
+    for, and page 1 of every board and pair comes first so first results arrive early.
+    """
+    targets = {}
+    for job_title in unique_terms(job_titles):
+        for location in unique_terms(locations):
+            for target in build_search_targets(job_title, location, pages):
+                targets.setdefault(target["url"], {**target, "job_title": job_title, "location": location})
+    return sorted(targets.values(), key=lambda t: t["page"])
+
+
+def fanout_concurrency(queries: int) -> int:
+    """Extract calls to run at once so a multi-query search takes about as long as one query."""
+    return max(SCRAPE_MAX_CONCURRENCY, min(SCRAPE_MAX_CONCURRENCY * queries, SCRAPE_MAX_FANOUT))
+
+
+# Streaming scrape: yields cached pages first, then each extracted chunk as soon as it is done
+async def iter_scrape_jobs(job_title: str, location: str, skills: List[str], pages: int = 3,
+                           engine: ScrapeEngine = None, cache: ScrapeCache = None,
+                           use_cache: bool = True) -> AsyncIterator[List[Dict]]:
+    targets = build_search_targets(job_title, location, pages)
+    async for _, job_postings in iter_scrape_targets(targets, job_title, location, engine, cache, use_cache):
+        yield job_postings
+
+
+# Multi-query search: all title/location pairs are extracted in one engine run, so they overlap
+async def iter_multi_scrape_jobs(job_titles: List[str], locations: List[str], skills: List[str], pages: int = 3,
+                                 engine: ScrapeEngine = None, cache: ScrapeCache = None,
+                                 use_cache: bool = True) -> AsyncIterator[List[Dict]]:
+    job_titles, locations = unique_terms(job_titles), unique_terms(locations)
+    targets = build_multi_search_targets(job_titles, locations, pages)
+    if not targets:
+        return
+    queries = len(job_titles) * len(locations)
+    engine = engine or build_engine(max_concurrency=fanout_concurrency(queries))
+    if queries > 1:
+        print(f"🔀 {len(job_titles)} titles x {len(locations)} locations: {len(targets)} distinct search pages")
+    async for _, job_postings in iter_scrape_targets(targets, job_titles[0], locations[0], engine, cache, use_cache):
+        yield job_postings
+
+
+async def iter_scrape_targets(targets: List[Dict], job_title: str, location: str, engine: ScrapeEngine = None,
+                              cache: ScrapeCache = None, use_cache: bool = True,
+                              include_empty: bool = False) -> AsyncIterator[Tuple[List[str], List[Dict]]]:
+    """
+    Scrapes the given search targets (from build_search_targets) and yields
+    (urls, job_postings) per cached batch or extracted chunk, so callers can
+    tell which board pages the postings came from. Targets that carry their own
+    'job_title' and 'location' (build_multi_search_targets) have their pages
+    cached under those, and their postings tagged with them as 'search_query'
+    and 'search_location', which save_jobs_to_db stores. With
+    include_empty, pages extracted without error but with no postings are
+    yielded too, so an empty page can be told apart from a failed one.
+    """
+    engine = engine or build_engine()
+    cache = cache or scrape_cache
+    targets = {t["url"]: t for t in targets}
+
+    start = time.perf_counter()
+    cached = cache.get_fresh(list(targets)) if use_cache else {}
+    if use_cache:
+        add_span("scrape.cache", time.perf_counter() - start, urls=len(targets), cache_hits=len(cached))
+    if cached:
+        print(f"♻️ {len(cached)}/{len(targets)} search pages served from cache")
+        cached_posts = [post for url in targets if url in cached for post in _tag_postings(targets[url], cached[url])]
+        if cached_posts:
+            yield [url for url in targets if url in cached], cached_posts
+
+    stale_urls = [url for url in targets if url not in cached]
+    # One URL per extract call: postings of a multi-URL extract can't be attributed to a page to cache
+    chunks = chunk_urls_by_board(stale_urls, 1)
+
+    async for result in engine.run(chunks):
+        print(f"Scraped chunk {result.index + 1}/{len(chunks)} ({result.board}, {len(result.urls)} URLs): "
+              f"{len(result.job_postings)} jobs in {result.elapsed:.1f}s")
+        # Empty pages are cached too (usually the last page of a small board), so they aren't re-extracted
+        if result.error is None:
+            target = targets[result.urls[0]]
+            cache.store(target["url"], target["board"], target.get("job_title", job_title),
+                        target.get("location", location), target["page"], result.job_postings)
+        if result.job_postings or (include_empty and result.error is None):
+            yield result.urls, _tag_postings(targets[result.urls[0]], result.job_postings)
+
+
+def _tag_postings(target: Dict, job_postings: List[Dict]) -> List[Dict]:
+    """Copies of the postings tagged with the query of the target they were scraped for, if it records one."""
+    if "job_title" not in target:
+        return job_postings
+    return [{**post, "search_query": target["job_title"], "search_location": target["location"]}
+            for post in job_postings]
+
+
+# Function to scrape jobs using Firecrawl
+async def scrape_jobs(job_title: str, location: str, skills: List[str], pages: int = 3,
+                      engine: ScrapeEngine = None, use_cache: bool = True) -> List[Dict]:
+    job_posts = []
+    async for batch in iter_scrape_jobs(job_title, location, skills, pages, engine, use_cache=use_cache):
+        job_posts.extend(batch)
 
     print(f"✅ Raw Jobs Extracted: {len(job_posts)}")
     return job_posts
 
 
+async def multi_search_jobs(job_titles: List[str], locations: List[str], skills: List[str], experience_years: int,
+                            pages: int = 3, engine: ScrapeEngine = None, use_cache: bool = True,
+                            top_k: int = None, preferences: Optional[Preferences] = None) -> List[Dict]:
+    """
+    Searches every title/location pair concurrently and returns one ranked list:
+    postings found by several queries are merged by the Deduplicator, and jobs
+    are scored against whichever title variant they match best.
+    """
+    dedup = Deduplicator()
+    unique = []
+    async for batch in iter_multi_scrape_jobs(job_titles, locations, skills, pages, engine, use_cache=use_cache):
+        unique.extend(dedup.add(batch)[0])
+    return filter_jobs(unique, unique_terms(job_titles), skills, experience_years, top_k, preferences)
+
+
+async def warm_scrape_cache(searches: List[Dict], pages: int = 3, engine: ScrapeEngine = None,
+                            cache: ScrapeCache = None) -> Tuple[int, int, int]:
+    """
+    Extracts every stale or missing page for the given searches ahead of time,
+    all searches in one engine run. `searches` is a list of {'job_title', 'location'}
+    dicts, optionally with their own 'pages'. Returns (pages already fresh in the
+    cache, pages fetched, postings fetched); pages that failed are in neither count.
+    """
+    cache = cache or scrape_cache
+    targets = {}
+    for search in searches:
+        for target in build_search_targets(search["job_title"], search["location"], search.get("pages") or pages):
+            targets.setdefault(target["url"], dict(target, job_title=search["job_title"], location=search["location"]))
+    cached = cache.get_fresh(list(targets))
+    stale = [target for url, target in targets.items() if url not in cached]
+    engine = engine or build_engine(max_concurrency=fanout_concurrency(len(searches)))
+    fetched_pages = fetched_postings = 0
+    async for urls, jobs in iter_scrape_targets(stale, "", "", engine, cache, use_cache=False, include_empty=True):
+        fetched_pages += len(urls)
+        fetched_postings += len(jobs)
+    return len(cached), fetched_pages, fetched_postings
+
+
 # Display the jobs
 def display_jobs(jobs: List[Dict], limit: int = 30):
     """Prints first N jobs in a clean format."""
@@ -106,9 +293,51 @@ def display_jobs(jobs: List[Dict], limit: int = 30):
 
 
 # AI Analysis Function
-FEEDBACK_FILE = "agent_feedback.txt"
+# Prompt budget for the job list in analyze_jobs
+ANALYSIS_TOP_K = 40
+ANALYSIS_JOB_TOKEN_BUDGET = 6000
+# Map-reduce analysis: used automatically above MAP_REDUCE_MIN_JOBS jobs
+MAP_REDUCE_MIN_JOBS = 80
+MAP_REDUCE_BATCH_SIZE = 25
+MAP_REDUCE_CONCURRENCY = 4
+
+
+# Only the parsed, deduplicated preferences go into prompts, not the raw feedback log
+def load_feedback_context(user_id: str = DEFAULT_USER) -> str:
+    feedback_memory = feedback_store.summary(user_id)
+    return (
+        f"\nUser Preferences from past feedback:\n{feedback_memory}\n"
+        if feedback_memory else "\n(No prior feedback provided yet.)\n"
+    )
+
+
+ANALYSIS_SECTIONS = """
+    Please structure your analysis into clear sections:
+
+    💼 **SELECTED JOB OPPORTUNITIES**
+    • List 10 best-matching roles with title, company, and location.
+
+    🔍 **SKILLS MATCH ANALYSIS**
+    • Compare how well the user's skills align with job requirements.
+
+    💡 **RECOMMENDATIONS**
+    • Highlight top 3 roles based on the user's preferences and growth potential.
+    • Indicate why each role stands out given the feedback memory.
+
+    🧭 **NEXT STEPS**
+    • Personalized advice on refining search or resume based on observed trends.
+    • Suggest new skills or certifications aligned with their interests.
+    """
 
-async def analyze_jobs(jobs, job_title, location, experience_years, skills):
+
+async def analyze_jobs(jobs, job_title, location, experience_years, skills, mode="auto",
+                       batch_size=MAP_REDUCE_BATCH_SIZE, max_concurrency=MAP_REDUCE_CONCURRENCY,
+                       user_id=DEFAULT_USER):
+    """
+    mode: 'single' sends one packed prompt, 'map_reduce' analyzes batches concurrently
+    and merges them, 'auto' picks map_reduce for large job sets. The prompt includes
+    user_id's feedback preferences.
+    """
     if not jobs or len(jobs) == 0:
         print("⚠️ No jobs found initially. Retrying scrape...")
         try:
@@ -119,16 +348,20 @@ async def analyze_jobs(jobs, job_title, location, experience_years, skills):
         if not jobs:
             return "⚠️ Still no job listings found after retry. Try adjusting your search."
 
+    if mode == "auto":
+        mode = "map_reduce" if len(jobs) >= MAP_REDUCE_MIN_JOBS else "single"
+    if mode == "map_reduce":
+        return await analyze_jobs_map_reduce(
+            jobs, job_title, location, experience_years, skills, batch_size, max_concurrency, user_id
+        )
 
-    feedback_memory = ""
-    if os.path.exists(FEEDBACK_FILE):
-        with open(FEEDBACK_FILE, "r", encoding="utf-8") as f:
-            feedback_memory = f.read().strip()
+    memory_context = load_feedback_context(user_id)
 
-    memory_context = (
-        f"\nUser Preferences from past feedback:\n{feedback_memory}\n"
-        if feedback_memory else "\n(No prior feedback provided yet.)\n"
-    )
+    # Jobs arrive ranked (by filter_jobs or semantic_rank); keep that order
+    packed = pack_jobs(jobs, skills, budget_tokens=ANALYSIS_JOB_TOKEN_BUDGET, top_k=ANALYSIS_TOP_K,
+                       preserve_order=True)
+    print(f"🧮 Packed {packed.jobs_included}/{packed.jobs_total} jobs into "
+          f"{packed.tokens_used}/{packed.budget_tokens} prompt tokens")
 
     analysis_prompt = f"""
     You are an AI job analysis agent and career coach.
@@ -143,78 +376,150 @@ async def analyze_jobs(jobs, job_title, location, experience_years, skills):
     **Experience Level:** {experience_years} years or less
     **Key Skills:** {", ".join(skills)}
 
-    JOB DATA:
-    {jobs}
+    JOB DATA (top {packed.jobs_included} of {packed.jobs_total} scraped, one per line:
+    title | company | location | experience | pay | keyword match, then a description summary):
+    {packed.text}
+    {ANALYSIS_SECTIONS}"""
 
-    Please structure your analysis into clear sections:
+    return await llm.acomplete(
+        [{"role": "user", "content": analysis_prompt}],
+        model="gpt-4o",
+        purpose="analyze_jobs",
+        max_output_tokens=2000,
+    )
 
-    💼 **SELECTED JOB OPPORTUNITIES**
-    • List 10 best-matching roles with title, company, and location.
 
-    🔍 **SKILLS MATCH ANALYSIS**
-    • Compare how well the user's skills align with job requirements.
+# Map step: condense one batch of jobs into a short shortlist
+async def _analyze_batch(batch, number, total, job_title, experience_years, skills, semaphore):
+    packed = pack_jobs(batch, skills, budget_tokens=ANALYSIS_JOB_TOKEN_BUDGET, top_k=None, preserve_order=True)
+    batch_prompt = f"""
+    You are screening job listings for a candidate (batch {number} of {total}).
 
-    💡 **RECOMMENDATIONS**
-    • Highlight top 3 roles based on the user's preferences and growth potential.
-    • Indicate why each role stands out given the feedback memory.
+    **Job Title to Match:** {job_title}
+    **Experience Level:** {experience_years} years or less
+    **Key Skills:** {", ".join(skills)}
 
-    🧭 **NEXT STEPS**
-    • Personalized advice on refining search or resume based on observed trends.
-    • Suggest new skills or certifications aligned with their interests.
+    JOB DATA (one per line: title | company | location | experience | pay | keyword match,
+    then a description summary):
+    {packed.text}
+
+    Reply in under 250 words with:
+    1. The 5 best-matching roles (title, company, location, one-line reason).
+    2. Skills these jobs ask for most often, and which of them the candidate lacks.
+    3. Any notable trends (seniority, pay, remote options).
     """
+    async with semaphore:
+        return await llm.acomplete(
+            [{"role": "user", "content": batch_prompt}],
+            model="gpt-4o",
+            purpose="analyze_jobs.map",
+            max_output_tokens=500,
+        )
 
-    response = client.responses.create(
-        model="gpt-4o",
-        input=[{"role": "user", "content": analysis_prompt}],
-        max_output_tokens=2000,
-    )
 
-    return response.output_text
+async def analyze_jobs_map_reduce(jobs, job_title, location, experience_years, skills,
+                                  batch_size=MAP_REDUCE_BATCH_SIZE, max_concurrency=MAP_REDUCE_CONCURRENCY,
+                                  user_id=DEFAULT_USER):
+    # Batches follow the caller's ranking (keyword or semantic)
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+    print(f"🗺️ Map-reduce analysis: {len(jobs)} jobs in {len(batches)} batches, "
+          f"{max_concurrency} at a time")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    summaries = await asyncio.gather(
+        *(
+            _analyze_batch(batch, i, len(batches), job_title, experience_years, skills, semaphore)
+            for i, batch in enumerate(batches, start=1)
+        ),
+        return_exceptions=True,
+    )
+    batch_notes = [
+        f"--- Batch {i} ---\n{summary}"
+        for i, summary in enumerate(summaries, start=1)
+        if not isinstance(summary, Exception)
+    ]
+    failed = sum(isinstance(s, Exception) for s in summaries)
+    if failed:
+        print(f"⚠️ {failed} of {len(batches)} analysis batches failed")
+    if not batch_notes:
+        return "❌ Job analysis failed for every batch. Please try again."
+
+    reduce_prompt = f"""
+    You are an AI job analysis agent and career coach.
 
-def filter_jobs(jobs, job_title, skills, experience_years):
-    results = []
-    job_title_keywords = [w.lower() for w in job_title.split() if len(w) > 2]
-    skills = [s.strip().lower() for s in skills if s.strip()]
+    {load_feedback_context(user_id)}
 
-    for job in jobs:
-        title = (job.get("job_title") or "").lower()
-        desc = (job.get("description") or "").lower()
-        exp_text = (job.get("experience") or "").lower()
+    {len(jobs)} job listings were screened in {len(batches)} batches (best-ranked jobs first).
+    Merge the batch findings below into one analysis, tailored to the user's
+    preferences and feedback memory.
 
-        title_score = sum(1 for k in job_title_keywords if k in title)
+    **Job Title to Match:** {job_title}
+    **Preferred Location:** {location}
+    **Experience Level:** {experience_years} years or less
+    **Key Skills:** {", ".join(skills)}
 
-        skill_score = sum(1 for s in skills if s in desc)
+    BATCH FINDINGS:
+    {chr(10).join(batch_notes)}
+    {ANALYSIS_SECTIONS}"""
 
-        exp_ok = True
-        exp_match = re.findall(r"(\d+)\+?\s*year", exp_text)
-        if exp_match:
-            required_years = int(exp_match[0])
-            exp_ok = required_years <= (experience_years + 3) 
+    return await llm.acomplete(
+        [{"role": "user", "content": reduce_prompt}],
+        model="gpt-4o",
+        purpose="analyze_jobs.reduce",
+        max_output_tokens=2000,
+    )
 
-        results.append({
-            **job,
-            "title_score": title_score,
-            "skill_score": skill_score,
-            "exp_ok": exp_ok
-        })
 
-    results = sorted(
-        results,
-        key=lambda j: (j["title_score"], j["skill_score"], j["exp_ok"]),
-        reverse=True
+# Sort key shared by filter_jobs and merge_ranked; feedback preferences shift the title score
+def rank_key(job):
+    return (
+        job.get("title_score", 0) + job.get("pref_score", 0),
+        job.get("skill_score", 0),
+        job.get("exp_ok", True),
     )
 
-    print(f"✅ After ranking: showing top {len(results)} of {len(jobs)} scraped jobs")
-    return results
 
+def merge_ranked(ranked: List[Dict], new_ranked: List[Dict]) -> List[Dict]:
+    """Merges two lists already sorted by filter_jobs without re-sorting everything."""
+    return list(heapq.merge(ranked, new_ranked, key=rank_key, reverse=True))
 
 
+def filter_jobs(jobs, job_title, skills, experience_years, top_k=None, preferences: Optional[Preferences] = None):
+    """
+    Ranks jobs with a RankingEngine. Scores are written onto the job dicts
+    in place (no copies); with top_k only the best k jobs are returned.
+    With feedback preferences, excluded companies are dropped and each job's
+    pref_score is added to its title score for ordering.
+    """
+    scraped = len(jobs)
+    with span("filter_jobs", jobs=scraped, top_k=top_k) as filter_span:
+        if preferences:
+            jobs = [job for job in jobs if not preferences.excludes(job)]
+
+        engine = RankingEngine(job_title, skills, experience_years)
+        scores = engine.score(jobs)
+        pref_scores = [preferences.score(job) for job in jobs] if preferences else [0] * len(jobs)
+        for i, adjustment in enumerate(pref_scores):
+            scores.title_scores[i] += adjustment
+        order = engine.order(scores, top_k)
+
+        results = []
+        for i in order:
+            job = jobs[i]
+            job["title_score"] = scores.title_scores[i] - pref_scores[i]
+            job["pref_score"] = pref_scores[i]
+            job["skill_score"] = scores.skill_scores[i]
+            job["exp_ok"] = bool(scores.exp_ok[i])
+            results.append(job)
+        filter_span.set(returned=len(results), excluded=scraped - len(jobs))
+
+    excluded = f", {scraped - len(jobs)} excluded by feedback" if scraped != len(jobs) else ""
+    print(f"✅ After ranking: showing top {len(results)} of {scraped} scraped jobs{excluded}")
+    return results
 
-# Analyze selected job
-async def analyze_single_job(job: dict, skills: list) -> str:
-    if not job:
-        return "⚠️ No job selected."
 
+# Prompt for analyzing one selected job
+def single_job_prompt(job: dict) -> str:
     jd_text = job.get("description", "No description available.")
     company = job.get("company", "Unknown company")
     job_title = job.get("job_title", "Unknown role")
@@ -241,11 +546,33 @@ async def analyze_single_job(job: dict, skills: list) -> str:
     🌍 **Visa Sponsorship** (if any public data suggests this company sponsors visas)  
     💡 **Recommendations** for tailoring my resume to this role
     """
+    return analysis_prompt
+
+
+# Analyze selected job
+async def analyze_single_job(job: dict, skills: list) -> str:
+    if not job:
+        return "⚠️ No job selected."
 
-    response = client.responses.create(
+    return await llm.acomplete(
+        [{"role": "user", "content": single_job_prompt(job)}],
         model="gpt-4o",
-        input=[{"role": "user", "content": analysis_prompt}],
+        purpose="analyze_single_job",
         max_output_tokens=1200,
     )
 
-    return response.output_text
+
+# Same analysis, streamed chunk by chunk
+async def stream_single_job_analysis(job: dict, skills: list, metrics: StreamMetrics = None) -> AsyncIterator[str]:
+    if not job:
+        yield "⚠️ No job selected."
+        return
+
+    async for chunk in llm.astream(
+        [{"role": "user", "content": single_job_prompt(job)}],
+        model="gpt-4o",
+        purpose="analyze_single_job",
+        metrics=metrics,
+        max_output_tokens=1200,
+    ):
+        yield chunk
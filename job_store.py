@@ -0,0 +1,146 @@
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from database import get_job, get_job_description, get_jobs
+
+# Job records kept in memory across all sessions; older ones are reloaded from jobs.db on demand
+JOB_STORE_MAX_RECORDS = 20_000
+JOB_STORE_MAX_DESCRIPTIONS = 64
+
+# Columns whose values repeat across postings; interned so each distinct value is stored once
+INTERNED_FIELDS = ("job_title", "company", "location", "experience", "compensation")
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+# One saved job without its description (fetched lazily), a few hundred bytes per record
+@dataclass(slots=True)
+class JobPost:
+    id: int
+    job_title: str
+    company: str
+    location: str
+    experience: str
+    compensation: str
+    link: str
+    source_links: tuple = ()
+    # The store the record came from; its description is read from that store's database
+    store: Optional["JobStore"] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_dict(cls, job: Dict, store: Optional["JobStore"] = None) -> "JobPost":
+        return cls(
+            job["id"],
+            *(_intern(job.get(f)) for f in INTERNED_FIELDS),
+            job.get("link"),
+            tuple(job.get("source_links") or ()),
+            store,
+        )
+
+    @property
+    def description(self) -> Optional[str]:
+        return (self.store or job_store).description(self.id)
+
+    # Dict-style access, so display and prompt code written for job dicts works unchanged
+    def get(self, key, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+
+class JobStore:
+    """
+    Compact, process-wide cache of job records shared by every session.
+
+    Sessions keep only the row ids of their results (st.session_state["job_ids"])
+    and look the records up here; records that were evicted are reloaded from
+    jobs.db in one query. Descriptions are the bulk of a posting, so they are not
+    part of the record and are only read when a page needs one.
+    """
+
+    def __init__(self, db_path="jobs.db", max_records=JOB_STORE_MAX_RECORDS,
+                 max_descriptions=JOB_STORE_MAX_DESCRIPTIONS):
+        self.db_path = db_path
+        self.max_records = max_records
+        self.max_descriptions = max_descriptions
+        self._records = OrderedDict()
+        self._descriptions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, jobs: List[Dict]) -> List[int]:
+        """Stores saved jobs (dicts with the row id save_jobs_to_db set) and returns their ids in order."""
+        ids = []
+        with self._lock:
+            for job in jobs:
+                if job.get("id") is None:
+                    continue
+                self._records[job["id"]] = JobPost.from_dict(job, self)
+                self._records.move_to_end(job["id"])
+                # A re-scraped job may have a new description
+                self._descriptions.pop(job["id"], None)
+                ids.append(job["id"])
+            self._evict(self._records, self.max_records)
+        return ids
+
+    def get_many(self, job_ids: Iterable[int]) -> List[JobPost]:
+        """Records for the given ids, in order; ids missing from jobs.db are left out."""
+        job_ids = list(job_ids)
+        found = {}
+        with self._lock:
+            for job_id in job_ids:
+                if job_id in self._records:
+                    self._records.move_to_end(job_id)
+                    found[job_id] = self._records[job_id]
+        missing = [job_id for job_id in job_ids if job_id not in found]
+        if missing:
+            loaded = [JobPost.from_dict(job, self) for job in get_jobs(missing, db_path=self.db_path)]
+            with self._lock:
+                for record in loaded:
+                    self._records[record.id] = found[record.id] = record
+                self._evict(self._records, self.max_records)
+        return [found[job_id] for job_id in job_ids if job_id in found]
+
+    def get(self, job_id: Optional[int]) -> Optional[JobPost]:
+        if job_id is None:
+            return None
+        records = self.get_many([job_id])
+        return records[0] if records else None
+
+    def description(self, job_id: int) -> Optional[str]:
+        with self._lock:
+            if job_id in self._descriptions:
+                self._descriptions.move_to_end(job_id)
+                return self._descriptions[job_id]
+        description = get_job_description(job_id, db_path=self.db_path)
+        with self._lock:
+            self._descriptions[job_id] = description
+            self._evict(self._descriptions, self.max_descriptions)
+        return description
+
+    def full(self, job_id: int) -> Optional[Dict]:
+        """The complete stored job, description included (for LLM prompts)."""
+        return get_job(job_id, db_path=self.db_path)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._descriptions.clear()
+
+    @staticmethod
+    def _evict(cache: OrderedDict, limit: int):
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+
+# Shared store used by the app pages
+job_store = JobStore()
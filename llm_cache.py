@@ -0,0 +1,117 @@
+import hashlib
+import json
+import time
+from typing import Optional
+
+from database import transaction
+
+
+class LLMCache:
+    """
+    Persistent cache of LLM responses, keyed on a hash of model, prompt and parameters.
+
+    Entries expire after `ttl_seconds`; when the cache grows past `max_entries`
+    or `max_bytes`, the least recently used entries are evicted.
+    """
+
+    def __init__(self, db_path="jobs.db", ttl_seconds=7 * 24 * 3600, max_entries=2000, max_bytes=50_000_000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._initialized = False
+
+    def _transaction(self):
+        if not self._initialized:
+            self._create_tables()
+        return transaction(self.db_path)
+
+    def _create_tables(self):
+        with transaction(self.db_path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                size INTEGER,
+                created_at REAL,
+                last_access REAL
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER DEFAULT 0
+            )
+            """)
+        self._initialized = True
+
+    @staticmethod
+    def make_key(model: str, input, **params) -> str:
+        payload = json.dumps({"model": model, "input": input, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, conn, name: str):
+        conn.execute("""
+            INSERT INTO llm_cache_stats (name, value) VALUES (?, 1)
+            ON CONFLICT(name) DO UPDATE SET value = value + 1
+        """, (name,))
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                self._count(conn, "hits")
+                return row[0]
+
+            if row:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._count(conn, "misses")
+            return None
+
+    def set(self, key: str, model: str, response: str):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO llm_cache (key, model, response, size, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (key, model, response, len(response.encode("utf-8")), now, now))
+            self._evict(conn, now)
+
+    def _evict(self, conn, now: float):
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        # Keep the most recently used entries that fit within both limits
+        conn.execute("""
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM (
+                    SELECT key,
+                           ROW_NUMBER() OVER (ORDER BY last_access DESC) AS rank,
+                           SUM(size) OVER (ORDER BY last_access DESC) AS running_size
+                    FROM llm_cache
+                )
+                WHERE rank > ? OR running_size > ?
+            )
+        """, (self.max_entries, self.max_bytes))
+
+    def stats(self) -> dict:
+        with self._transaction() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM llm_cache_stats").fetchall())
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "entries": entries,
+            "size_bytes": size,
+        }
+
+    def clear(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM llm_cache")
+            conn.execute("DELETE FROM llm_cache_stats")
+
+
+# Shared cache used by every analysis function
+llm_cache = LLMCache()
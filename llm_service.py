@@ -0,0 +1,447 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional
+
+from database import connection, transaction
+from llm_cache import LLMCache, llm_cache
+from tracing import add_span
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_BACKOFF_BASE = 1.0
+LLM_BACKOFF_MAX = 20.0
+
+# USD per 1M tokens: (input, output)
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def call_cost(model: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+    """Cost in USD, or None for a model without a known price. Dated snapshots use their base model's price."""
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        base = max((m for m in MODEL_PRICES if model.startswith(m + "-")), key=len, default=None)
+        prices = MODEL_PRICES.get(base)
+    if prices is None:
+        return None
+    return (input_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+
+def is_retryable(error: Exception) -> bool:
+    import openai
+
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+
+def backoff_delay(attempt: int, error: Optional[Exception] = None) -> float:
+    """Full-jitter exponential backoff, but never shorter than a server's Retry-After."""
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return max(delay, min(float(retry_after), LLM_BACKOFF_MAX)) if retry_after else delay
+    except ValueError:
+        return delay
+
+
+class RequestRateLimiter:
+    """Spaces out request starts to at most `per_minute`, across every thread and event loop."""
+
+    def __init__(self, per_minute: float):
+        self.min_interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        if self.min_interval <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.min_interval
+        return delay
+
+    def wait(self):
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Latency of one streamed response
+@dataclass
+class StreamMetrics:
+    first_token_s: Optional[float] = None
+    total_s: Optional[float] = None
+    cached: bool = False
+
+
+# Outcome of one call, as stored in llm_calls
+@dataclass
+class CallRecord:
+    purpose: str
+    model: str
+    status: str = "ok"
+    latency_s: float = 0.0
+    first_token_s: Optional[float] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+    # API operation, for tracing only (not stored)
+    operation: str = "responses.create"
+
+    def add_usage(self, usage):
+        if usage is None:
+            return
+        self.input_tokens += getattr(usage, "input_tokens", None) or getattr(usage, "prompt_tokens", 0) or 0
+        self.output_tokens += getattr(usage, "output_tokens", 0) or 0
+
+
+class LLMService:
+    """
+    The one place the app talks to OpenAI.
+
+    One sync client and one async client per event loop are shared by every
+    caller, so HTTP connections are pooled. The SDK's own retries are turned
+    off; calls are retried here with jittered exponential backoff on timeouts,
+    connection errors, 429s and 5xx. Concurrency is capped per client (a
+    thread semaphore for sync calls, an asyncio semaphore per loop), and
+    request starts are rate limited process-wide. Responses go through the
+    LLM cache, and every call (cache hits included) is recorded in the
+    llm_calls table with its latency, token usage and cost.
+    """
+
+    def __init__(self, db_path="jobs.db", cache: LLMCache = llm_cache, timeout: float = LLM_TIMEOUT,
+                 max_retries: int = LLM_MAX_RETRIES, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 requests_per_minute: float = LLM_REQUESTS_PER_MINUTE):
+        self.db_path = db_path
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = RequestRateLimiter(requests_per_minute)
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency)
+        # Async clients hold connections bound to one event loop, and Streamlit starts a new loop per asyncio.run
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_slots = weakref.WeakKeyDictionary()
+        # Cacheable async requests in flight, per loop and cache key, so identical concurrent calls share one
+        self._inflight = weakref.WeakKeyDictionary()
+        self._initialized = False
+
+    def _client_options(self) -> dict:
+        import openai
+
+        return dict(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=openai.Timeout(self.timeout, connect=LLM_CONNECT_TIMEOUT),
+            max_retries=0,
+        )
+
+    @property
+    def client(self):
+        with self._client_lock:
+            if self._client is None:
+                from openai import OpenAI
+                self._client = OpenAI(**self._client_options())
+            return self._client
+
+    def async_client(self):
+        from openai import AsyncOpenAI
+
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_clients:
+            self._async_clients[loop] = AsyncOpenAI(**self._client_options())
+            self._async_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self._async_clients[loop]
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        self.async_client()
+        return self._async_slots[asyncio.get_running_loop()]
+
+    # ---- call log ----
+
+    def _ensure_table(self):
+        if self._initialized:
+            return
+        with transaction(self.db_path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_calls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL,
+                purpose TEXT,
+                model TEXT,
+                status TEXT,
+                latency_s REAL,
+                first_token_s REAL,
+                input_tokens INTEGER,
+                output_tokens INTEGER,
+                cost_usd REAL,
+                attempts INTEGER,
+                error TEXT
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_created_at ON llm_calls(created_at)")
+        self._initialized = True
+
+    def _record(self, record: CallRecord):
+        add_span(
+            record.operation, record.latency_s, record.error, purpose=record.purpose, model=record.model,
+            status=record.status, cache_hit=record.status == "cached", input_tokens=record.input_tokens,
+            output_tokens=record.output_tokens, attempts=record.attempts, first_token_s=record.first_token_s,
+        )
+        try:
+            self._ensure_table()
+            cost = call_cost(record.model, record.input_tokens, record.output_tokens)
+            with transaction(self.db_path) as conn:
+                conn.execute("""
+                    INSERT INTO llm_calls (created_at, purpose, model, status, latency_s, first_token_s,
+                                           input_tokens, output_tokens, cost_usd, attempts, error)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (time.time(), record.purpose, record.model, record.status, record.latency_s,
+                      record.first_token_s, record.input_tokens, record.output_tokens, cost,
+                      record.attempts, record.error))
+        except Exception as e:
+            print(f"⚠️ Could not record LLM call: {e}")
+
+    def recent_calls(self, limit: int = 100) -> List[Dict]:
+        self._ensure_table()
+        with connection(self.db_path) as conn:
+            cursor = conn.execute("SELECT * FROM llm_calls ORDER BY id DESC LIMIT ?", (limit,))
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def summary(self, since: float = 0.0) -> List[Dict]:
+        """Per purpose and model: calls, cache hits, errors, tokens, cost and p50/p95 latency of real calls."""
+        self._ensure_table()
+        with connection(self.db_path) as conn:
+            rows = conn.execute("""
+                SELECT purpose, model, status, latency_s, input_tokens, output_tokens, COALESCE(cost_usd, 0)
+                FROM llm_calls WHERE created_at >= ?
+            """, (since,)).fetchall()
+
+        groups = {}
+        for purpose, model, status, latency, input_tokens, output_tokens, cost in rows:
+            group = groups.setdefault((purpose, model), {
+                "purpose": purpose, "model": model, "calls": 0, "cache_hits": 0, "errors": 0,
+                "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "_latencies": [],
+            })
+            group["calls"] += 1
+            group["cache_hits"] += status == "cached"
+            group["errors"] += status == "error"
+            group["input_tokens"] += input_tokens or 0
+            group["output_tokens"] += output_tokens or 0
+            group["cost_usd"] += cost
+            if status == "ok":
+                group["_latencies"].append(latency)
+
+        for group in groups.values():
+            latencies = sorted(group.pop("_latencies"))
+            group["p50_s"] = latencies[len(latencies) // 2] if latencies else None
+            group["p95_s"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None
+        return sorted(groups.values(), key=lambda g: g["cost_usd"], reverse=True)
+
+    def _cached(self, key: str, record: CallRecord, start: float) -> Optional[str]:
+        cached = self.cache.get(key)
+        if cached is not None:
+            record.status = "cached"
+            record.latency_s = time.perf_counter() - start
+            self._record(record)
+        return cached
+
+    def _failed(self, record: CallRecord, start: float, error: Exception):
+        record.status = "error"
+        record.error = f"{type(error).__name__}: {error}"[:500]
+        record.latency_s = time.perf_counter() - start
+        self._record(record)
+
+    def _finished(self, key: str, record: CallRecord, model: str, text: str):
+        self._record(record)
+        if text:
+            self.cache.set(key, model, text)
+
+    # ---- calls ----
+
+    def complete(self, input, model: str = "gpt-4o", purpose: str = "other", use_cache: bool = True,
+                 **params) -> str:
+        """responses.create with caching, retries, limits and a call record. Returns the output text."""
+        start = time.perf_counter()
+        record = CallRecord(purpose, model)
+        key = LLMCache.make_key(model, input, **params)
+        if use_cache:
+            cached = self._cached(key, record, start)
+            if cached is not None:
+                return cached
+
+        while True:
+            record.attempts += 1
+            try:
+                self.rate_limiter.wait()
+                with self._sync_slots:
+                    response = self.client.responses.create(model=model, input=input, **params)
+                break
+            except Exception as e:
+                if record.attempts > self.max_retries or not is_retryable(e):
+                    self._failed(record, start, e)
+                    raise
+                time.sleep(backoff_delay(record.attempts - 1, e))
+
+        text = response.output_text
+        record.add_usage(getattr(response, "usage", None))
+        record.latency_s = time.perf_counter() - start
+        self._finished(key, record, model, text)
+        return text
+
+    async def acomplete(self, input, model: str = "gpt-4o", purpose: str = "other", use_cache: bool = True,
+                        **params) -> str:
+        """
+        Same as complete, on the current event loop's async client. A cacheable
+        request identical to one already in flight on this loop (another user's
+        search, say) waits for that call instead of making its own. Cache lookups
+        and call records write to SQLite, so they run in a thread off the loop.
+        """
+        start = time.perf_counter()
+        record = CallRecord(purpose, model)
+        key = LLMCache.make_key(model, input, **params)
+        if not use_cache:
+            return await self._acreate(key, record, start, model, input, params)
+
+        cached = await asyncio.to_thread(self._cached, key, record, start)
+        if cached is not None:
+            return cached
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.setdefault(loop, {})
+        call = inflight.get(key)
+        if call is None:
+            # Its own task, so a caller that is cancelled doesn't cancel the call for everyone else waiting on it
+            call = inflight[key] = loop.create_task(self._acreate(key, record, start, model, input, params))
+            call.add_done_callback(lambda done: self._call_done(inflight, key, done))
+            return await asyncio.shield(call)
+
+        text = await asyncio.shield(call)
+        record.status = "cached"
+        record.latency_s = time.perf_counter() - start
+        await asyncio.to_thread(self._record, record)
+        return text
+
+    @staticmethod
+    def _call_done(inflight: Dict, key: str, call: asyncio.Task):
+        inflight.pop(key, None)
+        # Retrieved here so an error nobody waited for is not logged again by asyncio
+        if not call.cancelled():
+            call.exception()
+
+    async def _acreate(self, key: str, record: CallRecord, start: float, model: str, input,
+                       params: dict) -> str:
+        client, slots = self.async_client(), self._async_semaphore()
+        while True:
+            record.attempts += 1
+            try:
+                await self.rate_limiter.wait_async()
+                async with slots:
+                    response = await client.responses.create(model=model, input=input, **params)
+                break
+            except Exception as e:
+                if record.attempts > self.max_retries or not is_retryable(e):
+                    await asyncio.to_thread(self._failed, record, start, e)
+                    raise
+                await asyncio.sleep(backoff_delay(record.attempts - 1, e))
+
+        text = response.output_text
+        record.add_usage(getattr(response, "usage", None))
+        record.latency_s = time.perf_counter() - start
+        await asyncio.to_thread(self._finished, key, record, model, text)
+        return text
+
+    async def astream(self, input, model: str = "gpt-4o", purpose: str = "other",
+                      metrics: Optional[StreamMetrics] = None, **params) -> AsyncIterator[str]:
+        """
+        Streams the response text as it is generated. A cached response is yielded
+        in one piece; a completed stream is stored in the cache. Only failures
+        before the first token are retried, since earlier chunks are already shown.
+        """
+        metrics = metrics if metrics is not None else StreamMetrics()
+        start = time.perf_counter()
+        record = CallRecord(purpose, model)
+        key = LLMCache.make_key(model, input, **params)
+        cached = await asyncio.to_thread(self._cached, key, record, start)
+        if cached is not None:
+            metrics.cached = True
+            metrics.first_token_s = metrics.total_s = record.latency_s
+            yield cached
+            return
+
+        client, slots = self.async_client(), self._async_semaphore()
+        parts = []
+        async with slots:
+            while True:
+                record.attempts += 1
+                try:
+                    await self.rate_limiter.wait_async()
+                    stream = await client.responses.create(model=model, input=input, stream=True, **params)
+                    async for event in stream:
+                        if event.type == "response.output_text.delta":
+                            if metrics.first_token_s is None:
+                                metrics.first_token_s = time.perf_counter() - start
+                            parts.append(event.delta)
+                            yield event.delta
+                        elif event.type == "response.completed":
+                            record.add_usage(getattr(event.response, "usage", None))
+                    break
+                except Exception as e:
+                    if parts or record.attempts > self.max_retries or not is_retryable(e):
+                        await asyncio.to_thread(self._failed, record, start, e)
+                        raise
+                    await asyncio.sleep(backoff_delay(record.attempts - 1, e))
+
+        metrics.total_s = record.latency_s = time.perf_counter() - start
+        record.first_token_s = metrics.first_token_s
+        await asyncio.to_thread(self._finished, key, record, model, "".join(parts))
+
+    def embed(self, texts: List[str], model: str = "text-embedding-3-small", purpose: str = "embedding") -> List:
+        """embeddings.create with the same retries, limits and call record (not cached)."""
+        start = time.perf_counter()
+        record = CallRecord(purpose, model, operation="embeddings.create")
+        while True:
+            record.attempts += 1
+            try:
+                self.rate_limiter.wait()
+                with self._sync_slots:
+                    response = self.client.embeddings.create(model=model, input=texts)
+                break
+            except Exception as e:
+                if record.attempts > self.max_retries or not is_retryable(e):
+                    self._failed(record, start, e)
+                    raise
+                time.sleep(backoff_delay(record.attempts - 1, e))
+
+        record.add_usage(getattr(response, "usage", None))
+        record.latency_s = time.perf_counter() - start
+        self._record(record)
+        return [item.embedding for item in response.data]
+
+
+# Shared service used by every LLM call in the app
+llm = LLMService()
@@ -0,0 +1,124 @@
+import time
+import streamlit as st
+from Nav_bar import Nav_bar
+from llm_cache import llm_cache
+from llm_service import llm
+from tracing import tracer
+
+Nav_bar()
+
+st.header("🩺 Diagnostics")
+
+windows = {"Last hour": 3600, "Last 24 hours": 24 * 3600, "Last 7 days": 7 * 24 * 3600, "All time": None}
+window = st.selectbox("Time window", list(windows))
+since = time.time() - windows[window] if windows[window] else 0.0
+
+# Spend and latency per call site
+summary = llm.summary(since)
+total_cost = sum(g["cost_usd"] for g in summary)
+total_calls = sum(g["calls"] for g in summary)
+total_hits = sum(g["cache_hits"] for g in summary)
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("LLM calls", total_calls)
+col2.metric("Cache hit rate", f"{total_hits / total_calls:.0%}" if total_calls else "–")
+col3.metric("Tokens", f"{sum(g['input_tokens'] + g['output_tokens'] for g in summary):,}")
+col4.metric("Estimated cost", f"${total_cost:,.4f}")
+
+st.subheader("📊 By call site")
+if summary:
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+else:
+    st.info("No LLM calls recorded in this window.")
+
+st.subheader("🕒 Recent calls")
+recent = llm.recent_calls(limit=100)
+if recent:
+    for call in recent:
+        call["created_at"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(call["created_at"]))
+    st.dataframe(recent, use_container_width=True, hide_index=True)
+
+st.subheader("🗄️ Response cache")
+cache_stats = llm_cache.stats()
+st.write(
+    f"{cache_stats['entries']} entries · {cache_stats['size_bytes'] / 1_000_000:.1f} MB · "
+    f"{cache_stats['hits']} hits / {cache_stats['misses']} misses since the last reset"
+)
+st.caption(
+    f"Limits: {llm.max_concurrency} concurrent calls, {llm.rate_limiter.min_interval:.2f} s between request starts, "
+    f"{llm.timeout:.0f} s timeout, {llm.max_retries} retries with jittered backoff"
+)
+
+# Where each search spent its time, from the spans tracing.py records
+st.subheader("🧭 Search traces")
+trace_names = {"All": None, "Searches": "search", "Re-scrapes": "rescrape"}
+col1, col2 = st.columns(2)
+trace_name = trace_names[col1.selectbox("Show", list(trace_names))]
+trace_limit = col2.number_input("Last N traces", min_value=1, max_value=200, value=20)
+traces = tracer.recent_traces(int(trace_limit), name=trace_name)
+
+
+def span_category(name):
+    # Leaf spans are named "<area>.<detail>"; top-level steps use their own name
+    return name.split(".")[0]
+
+
+def busy_ms(spans):
+    """Wall time covered by the spans, counting overlapping (concurrent) spans once."""
+    total, end = 0, 0
+    for start_ns, end_ns in sorted((s.start_ns, s.end_ns) for s in spans):
+        if end_ns > end:
+            total += end_ns - max(start_ns, end)
+            end = end_ns
+    return total / 1e6
+
+
+if not traces:
+    st.info("No traces recorded yet. Run a search or a re-scrape to record one.")
+else:
+    rows = []
+    for spans in traces:
+        root = spans[0]
+        row = {
+            "trace": root.name,
+            "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(root.start_ns / 1e9)),
+            "total_ms": round(root.duration_ms),
+        }
+        categories = {}
+        for s in spans[1:]:
+            categories.setdefault(span_category(s.name), []).append(s)
+        for category, members in sorted(categories.items()):
+            row[f"{category}_ms"] = round(busy_ms(members))
+        row["error"] = root.error or next((s.error for s in spans if s.error), None)
+        rows.append(row)
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+    labels = [f"{row['started']} · {row['trace']} · {row['total_ms']} ms" for row in rows]
+    selected = st.selectbox("Trace", range(len(traces)), format_func=lambda i: labels[i])
+    spans = traces[selected]
+    root = spans[0]
+    depth = {root.span_id: 0}
+    waterfall = []
+    for order, s in enumerate(spans):
+        depth[s.span_id] = depth.get(s.parent_id, 0) + 1 if s.parent_id else 0
+        waterfall.append({
+            "span": f"{order:03d} {'  ' * depth[s.span_id]}{s.name}",
+            "category": span_category(s.name),
+            "start_ms": round((s.start_ns - root.start_ns) / 1e6, 1),
+            "end_ms": round((s.end_ns - root.start_ns) / 1e6, 1),
+            "duration_ms": round(s.duration_ms, 1),
+            "error": s.error,
+            "attributes": ", ".join(f"{k}={v}" for k, v in s.attributes.items()),
+        })
+
+    import altair as alt
+
+    chart = alt.Chart(alt.Data(values=waterfall)).mark_bar().encode(
+        x=alt.X("start_ms:Q", title="ms since start"),
+        x2="end_ms:Q",
+        y=alt.Y("span:N", sort=None, title=None),
+        color="category:N",
+        tooltip=["span:N", "duration_ms:Q", "attributes:N", "error:N"],
+    ).properties(height=max(120, 18 * len(waterfall)))
+    st.altair_chart(chart, use_container_width=True)
+    st.dataframe(waterfall, use_container_width=True, hide_index=True)
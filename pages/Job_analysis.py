@@ -1,66 +1,27 @@
 import streamlit as st
 import asyncio
-from openai import OpenAI
-import os
-from dotenv import load_dotenv
 from Nav_bar import Nav_bar
+from jobScraper import stream_single_job_analysis
+from llm_service import StreamMetrics
+from ui_stream import render_stream, show_stream_metrics
+from analysis_queue import analysis_queue
+from database import MULTI_USER
+from job_store import job_store
 
 Nav_bar()
-
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
-
-
-# Analysis function (selected job)
-async def analyze_single_job(job: dict, skills: list) -> str:
-    if not job:
-        return "⚠️ No job selected."
-
-    jd_text = job.get("description", "No description available.")
-    company = job.get("company", "Unknown company")
-    job_title = job.get("job_title", "Unknown role")
-
-    analysis_prompt = f"""
-    You are a career coach and research assistant.
-
-    Analyze the following job:
-
-    **Job Title:** {job_title}  
-    **Company:** {company}  
-    **Location:** {job.get("location", "N/A")}  
-    **Experience Required:** {job.get("experience", "N/A")}  
-    **Compensation:** {job.get("compensation", "N/A")}  
-
-    **Job Description:**  
-    {jd_text}
-
-    Please provide:
-
-    🔑 **Key Skills & Technologies** the company is looking for  
-    🏢 **About the Company** (size, reputation, domain, etc.)  
-    📈 **Hiring Trends** (recent growth, how many people hired recently, signals of expansion)  
-    🌍 **Visa Sponsorship** (if any public data or hints suggest sponsorship opportunities)  
-    💡 **Recommendations** for tailoring my resume to this role
-    """
-
-    response = client.responses.create(
-        model="gpt-4o",
-        input=[{"role": "user", "content": analysis_prompt}],
-        max_output_tokens=1200,
-    )
-
-    return response.output_text
+# Resume any analyses still queued from an earlier run (the backend worker runs them in multi-user mode)
+if not MULTI_USER:
+    analysis_queue.start()
 
 
 # Streamlit UI
 st.header("📊 Job Analysis")
 
 # Check if jobs exist
-if "jobs" not in st.session_state or not st.session_state["jobs"]:
+if not st.session_state.get("job_ids"):
     st.warning("⚠️ No jobs available. Please run a search on the **Job Search** page first.")
 else:
-    jobs = st.session_state["jobs"]
+    jobs = job_store.get_many(st.session_state["job_ids"][:30])
 
     # Pick up search context
     job_title = st.session_state.get("job_title", "Role")
@@ -70,7 +31,7 @@ else:
     # Let user pick a job from the first 30
     job_options = [
         f"{i+1}. {job.get('job_title', 'N/A')} at {job.get('company', 'Unknown')} ({job.get('location', 'N/A')})"
-        for i, job in enumerate(jobs[:30])
+        for i, job in enumerate(jobs)
     ]
 
     selected_idx = st.selectbox(
@@ -90,10 +51,24 @@ else:
     🔗 [Job Link]({selected_job.get('link', '#')})
     """)
 
-    # Analysis button
-    if st.button("🔎 Analyze This Job"):
-        with st.spinner("Analyzing job details..."):
-            analysis = asyncio.run(analyze_single_job(selected_job, skills))
+    # Background analyses for the listed jobs
+    background = analysis_queue.get_many([job.link for job in jobs])
+    done = sum(1 for row in background.values() if row["status"] == "done")
+    pending = sum(1 for row in background.values() if row["status"] in ("queued", "running"))
+    if background:
+        st.caption(f"🧵 Background analyses: {done} ready, {pending} in progress")
+
+    precomputed = background.get(selected_job.get("link"))
+    if precomputed and precomputed["status"] == "done":
+        st.subheader("📄 Final Job Analysis")
+        st.markdown(precomputed["analysis"])
+        st.caption("⚡ Precomputed in the background")
+    elif precomputed and precomputed["status"] in ("queued", "running"):
+        st.info("⏳ This job is being analyzed in the background. Rerun the page to check, or analyze it now.")
 
+    # Analysis button
+    if not (precomputed and precomputed["status"] == "done") and st.button("🔎 Analyze This Job"):
         st.subheader("📄 Final Job Analysis")
-        st.markdown(analysis)
+        metrics = StreamMetrics()
+        asyncio.run(render_stream(stream_single_job_analysis(selected_job, skills, metrics), st.empty()))
+        show_stream_metrics(metrics)
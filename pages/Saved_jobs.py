@@ -0,0 +1,114 @@
+import datetime
+import streamlit as st
+from Nav_bar import Nav_bar, current_user
+from database import set_job_status
+from job_store import job_store
+from ui_cache import ensure_db, cached_count_jobs, cached_query_jobs, invalidate_job_queries
+
+Nav_bar()
+ensure_db()
+user_id = current_user()
+
+PAGE_SIZE = 50
+STATUSES = ["Not Applied", "Applied", "Interviewing", "Rejected", "Offer"]
+
+st.header("🗂️ Saved Jobs")
+st.caption(f"{cached_count_jobs()} jobs stored")
+
+# Filters
+col1, col2, col3 = st.columns(3)
+with col1:
+    company = st.text_input("Company")
+    status = st.selectbox("Status", ["Any"] + STATUSES)
+with col2:
+    location = st.text_input("Location starts with")
+    exp_only = st.checkbox("Only jobs matching my experience")
+    hide_removed = st.checkbox("Hide postings no longer listed")
+with col3:
+    min_title_score = st.number_input("Min title score", min_value=0, value=0)
+    min_skill_score = st.number_input("Min skill score", min_value=0, value=0)
+
+scraped_since = st.date_input("Scraped since", value=None)
+sort = st.radio("Sort by", ["score", "recent"], horizontal=True,
+                format_func=lambda s: "Best match" if s == "score" else "Most recent")
+
+filters = dict(
+    company=company.strip() or None,
+    location=location.strip() or None,
+    status=None if status == "Any" else status,
+    exp_ok=True if exp_only else None,
+    min_title_score=min_title_score or None,
+    min_skill_score=min_skill_score or None,
+    scraped_after=(
+        datetime.datetime.combine(scraped_since, datetime.time()).timestamp() if scraped_since else None
+    ),
+    include_removed=not hide_removed,
+    sort=sort,
+    user_id=user_id,
+)
+
+# Keyset pagination: keep the cursor of every page visited so we can go back
+if st.session_state.get("saved_jobs_filters") != filters:
+    st.session_state["saved_jobs_filters"] = filters
+    st.session_state["saved_jobs_cursors"] = [None]
+
+cursors = st.session_state["saved_jobs_cursors"]
+jobs, next_cursor = cached_query_jobs(**filters, limit=PAGE_SIZE, cursor=cursors[-1])
+
+if not jobs:
+    st.info("No saved jobs match these filters.")
+else:
+    st.dataframe(
+        [
+            {
+                "ID": job["id"],
+                "Title": job["job_title"],
+                "Company": job["company"],
+                "Location": job["location"],
+                "Title score": job["title_score"],
+                "Skill score": job["skill_score"],
+                "Experience OK": job["exp_ok"],
+                "Status": job["status"],
+                "First seen": datetime.datetime.fromtimestamp(job["first_seen"]) if job["first_seen"] else None,
+                "Removed": bool(job["removed_at"]),
+                "Link": job["link"],
+            }
+            for job in jobs
+        ],
+        column_config={"Link": st.column_config.LinkColumn("Link")},
+        hide_index=True,
+        use_container_width=True,
+    )
+
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if st.button("⬅️ Previous", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with page_col:
+        st.write(f"Page {len(cursors)}")
+    with next_col:
+        if st.button("Next ➡️", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+
+    # Select a stored job for resume optimization
+    job_id = st.selectbox(
+        "Select a job for Resume Optimization",
+        [job["id"] for job in jobs],
+        format_func=lambda i: next(f"{j['job_title']} at {j['company']}" for j in jobs if j["id"] == i),
+    )
+    select_col, status_col = st.columns(2)
+    with select_col:
+        if st.button("Select Job"):
+            job = job_store.get(job_id)
+            st.session_state["selected_job_id"] = job_id
+            st.success(f"✅ Selected: {job['job_title']} at {job['company']}")
+    with status_col:
+        # Application status is kept per user
+        current = next(j["status"] for j in jobs if j["id"] == job_id)
+        new_status = st.selectbox("Application status", STATUSES, index=STATUSES.index(current) if current in STATUSES else 0)
+        if new_status != current and st.button("Update status"):
+            set_job_status(job_id, new_status, user_id=user_id)
+            invalidate_job_queries()
+            st.rerun()
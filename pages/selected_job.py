@@ -1,37 +1,129 @@
-import tempfile
+import asyncio
 import streamlit as st
-from resume_opt import extract_resume_text, analyze_resume
+from ats import score_stored_jobs
+from database import get_job
+from job_store import job_store
+from resume_opt import BULK_LLM_TOP_K, bulk_analyze_resume, stream_resume_analysis
+from resume_parser import parse_resume
+from llm_service import StreamMetrics
+from ui_stream import render_stream, show_stream_metrics
+from ui_cache import ensure_db
 from Nav_bar import Nav_bar
 
 Nav_bar()
+ensure_db()
 st.header("📌 Resume Optimization")
 
-if "selected_job" not in st.session_state or not st.session_state["selected_job"]:
-    st.warning("⚠️ Please select a job on the main page first.")
-else:
-    job = st.session_state["selected_job"]
-    st.subheader(f"Selected Job: {job['job_title']} at {job['company']}")
-    st.write(f"📍 {job['location']}")
-    st.write(f"💰 {job.get('compensation', 'N/A')}")
-    st.write(f"[🔗 Job Link]({job.get('link')})")
 
-    # Upload resume
-    uploaded_resume = st.file_uploader("Upload Resume (PDF/DOCX/TXT)", type=["pdf", "docx", "txt"])
+# Parsed in memory; the same file is only parsed once across jobs and sessions
+def load_resume(uploaded):
+    resume = parse_resume(uploaded.getvalue(), uploaded.name)
+    st.caption(
+        f"📄 {resume.filename}: {len(resume.text):,} characters"
+        + (f" from {resume.pages} pages" if resume.pages else "")
+        + (" (cached)" if resume.cached else f" parsed in {resume.elapsed:.2f} s")
+    )
+    return resume
 
-    if uploaded_resume and st.button("⚡ Optimize Resume"):
-        with tempfile.NamedTemporaryFile(delete=False, suffix=uploaded_resume.name) as tmp:
-            tmp.write(uploaded_resume.getbuffer())
-            resume_path = tmp.name
 
-        resume_text = extract_resume_text(resume_path)
-        jd_text = job.get("description", "")
+mode = st.radio("Compare my resume against", ["Selected job", "All saved jobs"], horizontal=True)
 
-        if not jd_text:
-            st.warning("⚠️ This job doesn't have a description available for comparison.")
-        else:
-            st.subheader("📌 Resume Optimization Results")
+if mode == "Selected job":
+    job = job_store.get(st.session_state.get("selected_job_id"))
+    if not job:
+        st.warning("⚠️ Please select a job on the main page first.")
+    else:
+        st.subheader(f"Selected Job: {job['job_title']} at {job['company']}")
+        st.write(f"📍 {job['location']}")
+        st.write(f"💰 {job.get('compensation', 'N/A')}")
+        st.write(f"[🔗 Job Link]({job.get('link')})")
+
+        # Upload resume
+        uploaded_resume = st.file_uploader("Upload Resume (PDF/DOCX/TXT)", type=["pdf", "docx", "txt"])
+
+        if uploaded_resume and st.button("⚡ Optimize Resume"):
+            resume_text = load_resume(uploaded_resume).text
+            jd_text = job.description or ""
+
+            if not jd_text:
+                st.warning("⚠️ This job doesn't have a description available for comparison.")
+            else:
+                st.subheader("📌 Resume Optimization Results")
 
-            raw_analysis = analyze_resume(resume_text, jd_text)            
+                metrics = StreamMetrics()
+                with st.expander("🔎 Full AI Analysis", expanded=True):
+                    asyncio.run(render_stream(stream_resume_analysis(resume_text, jd_text, metrics), st.empty()))
+                show_stream_metrics(metrics)
+else:
+    # Bulk mode: local ATS score for every saved job, LLM suggestions only for the best matches
+    uploaded_resume = st.file_uploader("Upload Resume (PDF/DOCX/TXT)", type=["pdf", "docx", "txt"])
+    col1, col2 = st.columns(2)
+    with col1:
+        top_k = st.number_input("Detailed AI suggestions for the top", min_value=0, max_value=20, value=BULK_LLM_TOP_K)
+    with col2:
+        exp_only = st.checkbox("Only jobs matching my experience")
+
+    if uploaded_resume and st.button("📊 Score Against All Saved Jobs"):
+        resume = load_resume(uploaded_resume)
+        with st.spinner("Scoring saved jobs..."):
+            result = score_stored_jobs(
+                resume.text, st.session_state.get("skills", []), exp_ok=True if exp_only else None
+            )
+        suggestions = {}
+        if top_k and result.rows:
+            with st.spinner(f"Getting AI suggestions for the top {min(top_k, len(result.rows))} jobs..."):
+                top_jobs = [get_job(row["id"]) for row in result.rows[:top_k]]
+                suggestions = asyncio.run(bulk_analyze_resume(resume.text, [j for j in top_jobs if j]))
+        # Only ids and per-job scores are kept; titles and links come from the shared job store
+        st.session_state["bulk_ats"] = {
+            "hash": resume.content_hash,
+            "jobs_scored": result.jobs_scored,
+            "elapsed": result.elapsed,
+            "resume_terms": result.resume_terms,
+            "rows": [
+                {k: row[k] for k in ("id", "ats_score", "matched_terms", "missing_terms", "exp_ok")}
+                for row in result.rows
+            ],
+            "suggestions": suggestions,
+        }
+
+    bulk = st.session_state.get("bulk_ats")
+    if bulk:
+        st.caption(
+            f"Scored {bulk['jobs_scored']:,} jobs in {bulk['elapsed']:.2f} s · "
+            f"resume keywords: {', '.join(bulk['resume_terms']) or 'none found'}"
+        )
+        jobs = {job.id: job for job in job_store.get_many(row["id"] for row in bulk["rows"])}
+        rows = [(row, jobs[row["id"]]) for row in bulk["rows"] if row["id"] in jobs]
+        if not rows:
+            st.info("No saved jobs yet. Run a search on the Job Search page first.")
+        else:
+            # Click a column header to sort
+            st.dataframe(
+                [
+                    {
+                        "ATS score": row["ats_score"],
+                        "Title": job["job_title"],
+                        "Company": job["company"],
+                        "Location": job["location"],
+                        "Matched": ", ".join(row["matched_terms"]),
+                        "Missing": ", ".join(row["missing_terms"]),
+                        "Experience OK": row["exp_ok"],
+                        "Link": job["link"],
+                    }
+                    for row, job in rows
+                ],
+                column_config={
+                    "ATS score": st.column_config.ProgressColumn("ATS score", min_value=0, max_value=100, format="%.0f"),
+                    "Link": st.column_config.LinkColumn("Link"),
+                },
+                hide_index=True,
+                use_container_width=True,
+            )
 
-            with st.expander("🔎 Full AI Analysis"):
-                st.markdown(raw_analysis)
+            if bulk["suggestions"]:
+                st.subheader("💡 AI Suggestions for the Best Matches")
+                for row, job in rows:
+                    if row["id"] in bulk["suggestions"]:
+                        with st.expander(f"{row['ats_score']:.0f} · {job['job_title']} at {job['company']}"):
+                            st.markdown(bulk["suggestions"][row["id"]])
@@ -0,0 +1,129 @@
+import functools
+import heapq
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+WHITESPACE_RE = re.compile(r"\s+")
+
+_encoders = {}
+
+
+# tiktoken is imported on the first token count, not at app startup
+@functools.lru_cache(maxsize=None)
+def _tiktoken():
+    try:
+        import tiktoken
+    except ImportError:  # fall back to a character-based estimate
+        return None
+    return tiktoken
+
+
+def _encoder(model: str):
+    tiktoken = _tiktoken()
+    if tiktoken is None:
+        return None
+    if model not in _encoders:
+        try:
+            _encoders[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encoders[model] = tiktoken.get_encoding("o200k_base")
+    return _encoders[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    encoder = _encoder(model)
+    if encoder is None:
+        return (len(text) + 3) // 4
+    return len(encoder.encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    encoder = _encoder(model)
+    if encoder is None:
+        return text if len(text) <= max_tokens * 4 else text[:max_tokens * 4].rsplit(" ", 1)[0] + "…"
+    tokens = encoder.encode(text)
+    return text if len(tokens) <= max_tokens else encoder.decode(tokens[:max_tokens]) + "…"
+
+
+def summarize_description(description: str, skills: List[str], max_tokens: int, model: str = "gpt-4o") -> str:
+    """
+    Extractive summary: sentences that mention the user's skills first, then the
+    rest in their original order, until max_tokens is reached.
+    """
+    text = WHITESPACE_RE.sub(" ", description or "").strip()
+    if not text or count_tokens(text, model) <= max_tokens:
+        return text
+
+    skills = [s.strip().lower() for s in skills if s.strip()]
+    sentences = [s for s in SENTENCE_RE.split(text) if s.strip()]
+    relevant = [s for s in sentences if any(skill in s.lower() for skill in skills)]
+    ordered = relevant + [s for s in sentences if s not in relevant]
+
+    picked, used = [], 0
+    for sentence in ordered:
+        cost = count_tokens(sentence, model) + 1
+        if used + cost > max_tokens:
+            break
+        picked.append(sentence)
+        used += cost
+    if not picked:
+        return truncate_tokens(text, max_tokens, model)
+    # Keep the original sentence order for readability
+    picked.sort(key=sentences.index)
+    return " ".join(picked)
+
+
+def compact_job(job: Dict, number: int, skills: List[str], max_desc_tokens: int, model: str = "gpt-4o") -> str:
+    fields = [
+        f"#{number} {job.get('job_title') or 'N/A'}",
+        job.get("company") or "N/A",
+        job.get("location") or "N/A",
+        f"exp: {job.get('experience') or 'N/A'}",
+        f"pay: {job.get('compensation') or 'N/A'}",
+    ]
+    if "title_score" in job:
+        fields.append(
+            f"match: title {job.get('title_score', 0)}, skills {job.get('skill_score', 0)}, "
+            f"exp {'ok' if job.get('exp_ok', True) else 'too senior'}"
+        )
+    summary = summarize_description(job.get("description"), skills, max_desc_tokens, model)
+    return " | ".join(fields) + (f"\n   {summary}" if summary else "")
+
+
+@dataclass
+class PackedJobs:
+    text: str
+    jobs_included: int
+    jobs_total: int
+    tokens_used: int
+    budget_tokens: int
+
+
+def pack_jobs(jobs: List[Dict], skills: List[str], budget_tokens: int = 6000, top_k: Optional[int] = 40,
+              max_desc_tokens: int = 120, model: str = "gpt-4o", preserve_order: bool = False) -> PackedJobs:
+    """
+    Packs the best-scoring jobs into compact one-record-per-job text that fits
+    within budget_tokens. Jobs are preselected by (title, skill, exp) score,
+    or taken in the given order with preserve_order (already ranked, e.g. by
+    semantic_rank, whose order the keyword scores would undo).
+    """
+    def score(job):
+        return (job.get("title_score", 0) + job.get("pref_score", 0), job.get("skill_score", 0), job.get("exp_ok", True))
+
+    if preserve_order:
+        candidates = jobs[:top_k] if top_k else jobs
+    else:
+        candidates = heapq.nlargest(top_k, jobs, key=score) if top_k else sorted(jobs, key=score, reverse=True)
+
+    records, used = [], 0
+    for job in candidates:
+        record = compact_job(job, len(records) + 1, skills, max_desc_tokens, model)
+        cost = count_tokens(record, model) + 1
+        if used + cost > budget_tokens:
+            break
+        records.append(record)
+        used += cost
+
+    return PackedJobs("\n".join(records), len(records), len(jobs), used, budget_tokens)
@@ -0,0 +1,108 @@
+import heapq
+import re
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+EXPERIENCE_RE = re.compile(r"(\d+)\+?\s*year", re.IGNORECASE)
+
+
+# Characters that count as part of a word (so "c++" and "c#" stay whole terms)
+WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789_+#")
+
+
+class TermMatcher:
+    """
+    Counts how many distinct terms occur in a text as whole words, case-insensitively.
+
+    Terms are normalized once up front. Each lookup is a C-level substring
+    test; word boundaries are only checked for terms that were found.
+    """
+
+    def __init__(self, terms: List[str]):
+        self.terms = tuple(dict.fromkeys(t.strip().lower() for t in terms if t.strip()))
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        text = text.lower()
+        found = 0
+        for term in self.terms:
+            if term not in text:
+                continue
+            i = text.find(term)
+            while i != -1:
+                end = i + len(term)
+                if text[i - 1:i] not in WORD_CHARS and text[end:end + 1] not in WORD_CHARS:
+                    found += 1
+                    break
+                i = text.find(term, i + 1)
+        return found
+
+
+# Scores for a batch of jobs; index i belongs to jobs[i]
+@dataclass
+class Scores:
+    title_scores: array
+    skill_scores: array
+    exp_ok: array
+
+    def __len__(self):
+        return len(self.title_scores)
+
+    def key(self, i):
+        return (self.title_scores[i], self.skill_scores[i], self.exp_ok[i])
+
+
+class RankingEngine:
+    """
+    Scores jobs against a search: title keywords found in the title, skills found
+    in the description, and whether the required experience is within reach.
+    The keyword and skill lists are compiled once into TermMatchers.
+
+    `job_title` may also be a list of title variants (a multi-query search);
+    a job's title score is then its best score against any one of them.
+    """
+
+    def __init__(self, job_title: Union[str, List[str]], skills: List[str], experience_years: int):
+        titles = [job_title] if isinstance(job_title, str) else list(job_title)
+        self.title_keywords = [[w.lower() for w in title.split() if len(w) > 2] for title in titles]
+        self.skills = [s.strip().lower() for s in skills if s.strip()]
+        self.max_years = experience_years + 3
+        self._title_matchers = [TermMatcher(keywords) for keywords in self.title_keywords]
+        self._skill_matcher = TermMatcher(self.skills)
+
+    def count_title(self, title: str) -> int:
+        return max((matcher.count(title) for matcher in self._title_matchers), default=0)
+
+    def score(self, jobs: List[Dict]) -> Scores:
+        count_title, count_skills, max_years = self.count_title, self._skill_matcher.count, self.max_years
+        title_scores = array("i", bytes(4 * len(jobs)))
+        skill_scores = array("i", bytes(4 * len(jobs)))
+        exp_ok = array("b", b"\x01" * len(jobs))
+
+        # Titles and experience strings repeat a lot across postings, so score each distinct value once
+        title_memo, exp_memo = {}, {}
+        for i, job in enumerate(jobs):
+            title = job.get("job_title") or ""
+            if title not in title_memo:
+                title_memo[title] = count_title(title)
+            title_scores[i] = title_memo[title]
+
+            skill_scores[i] = count_skills(job.get("description") or "")
+
+            experience = job.get("experience") or ""
+            if experience not in exp_memo:
+                exp_match = EXPERIENCE_RE.search(experience)
+                exp_memo[experience] = not exp_match or int(exp_match.group(1)) <= max_years
+            exp_ok[i] = exp_memo[experience]
+
+        return Scores(title_scores, skill_scores, exp_ok)
+
+    @staticmethod
+    def order(scores: Scores, top_k: Optional[int] = None) -> List[int]:
+        """Job indices, best first. With top_k, only the best k are selected (no full sort)."""
+        indices = range(len(scores))
+        if top_k is not None and top_k < len(scores):
+            return heapq.nlargest(top_k, indices, key=scores.key)
+        return sorted(indices, key=scores.key, reverse=True)
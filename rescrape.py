@@ -0,0 +1,404 @@
+"""
+Headless re-scrape of saved searches, so the job index stays fresh without
+anyone clicking "Search Jobs".
+
+    python rescrape.py add "Software Engineer" "Austin, TX" --skills "Python, Django" --experience 3
+    python rescrape.py list
+    python rescrape.py run --all                  # one pass over every saved search
+    python rescrape.py daemon                     # re-scrape each search whenever it is due
+    python rescrape.py warm                       # fill the scrape cache with every page of every search
+    python rescrape.py run --all --fixtures benchmarks/fixtures/search_pages.json   # offline
+    python rescrape.py run --all --record search_pages.json                         # record live responses
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from database import init_db, job_content_hash, mark_removed_jobs, save_job_deltas, connection, transaction
+from dedup import Deduplicator
+from jobScraper import (build_engine, build_search_targets, filter_jobs, firecrawl_extract, iter_scrape_targets,
+                        warm_scrape_cache)
+from scrape_cache import ScrapeCache
+from scrape_engine import FixtureExtractor, RecordingExtractor, ScrapeEngine, board_from_url
+from tracing import span, trace
+
+RESCRAPE_INTERVAL = float(os.getenv("RESCRAPE_INTERVAL", str(6 * 3600)))
+RESCRAPE_POLL = float(os.getenv("RESCRAPE_POLL", "60"))
+# A posting not seen by its search for this long is flagged as removed. Paging usually stops
+# early on known links, so every so often a run pages through every board (a full crawl);
+# only boards seen in full are checked, and a posting on one is seen at least every full crawl.
+RESCRAPE_REMOVED_AFTER = float(os.getenv("RESCRAPE_REMOVED_AFTER", str(3 * 24 * 3600)))
+RESCRAPE_FULL_CRAWL_EVERY = float(os.getenv("RESCRAPE_FULL_CRAWL_EVERY", str(RESCRAPE_REMOVED_AFTER / 2)))
+
+
+class SavedSearches:
+    """
+    Searches to keep fresh (saved_searches), a log of each re-scrape
+    (rescrape_runs), and every posting link the re-scraper has seen
+    (seen_links), which is what paging stops on.
+    """
+
+    def __init__(self, db_path="jobs.db"):
+        self.db_path = db_path
+        self._initialized = False
+
+    def _ensure_table(self):
+        if self._initialized:
+            return
+        init_db(self.db_path)
+        with transaction(self.db_path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS saved_searches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                search_key TEXT UNIQUE,
+                job_title TEXT,
+                location TEXT,
+                skills TEXT,
+                experience_years INTEGER,
+                pages INTEGER,
+                interval_s REAL,
+                enabled INTEGER DEFAULT 1,
+                last_run_at REAL,
+                next_run_at REAL,
+                full_crawl_at REAL
+            )
+            """)
+            self._add_full_crawl_column(conn)
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS rescrape_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                search_id INTEGER,
+                started_at REAL,
+                finished_at REAL,
+                pages_fetched INTEGER,
+                postings INTEGER,
+                new INTEGER,
+                changed INTEGER,
+                unchanged INTEGER,
+                removed INTEGER,
+                stopped TEXT,
+                error TEXT
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_rescrape_runs_search ON rescrape_runs(search_id, id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS seen_links (link TEXT PRIMARY KEY, first_seen REAL, last_seen REAL)")
+        self._initialized = True
+
+    @staticmethod
+    def _add_full_crawl_column(conn):
+        # Tables created before full crawls don't record when the last one ran
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(saved_searches)")}
+        if "full_crawl_at" not in columns:
+            conn.execute("ALTER TABLE saved_searches ADD COLUMN full_crawl_at REAL")
+
+    def add(self, job_title: str, location: str, skills: List[str] = (), experience_years: int = 3,
+            pages: int = 3, interval_s: float = RESCRAPE_INTERVAL) -> int:
+        """Saves a search (or updates the saved one with the same title and location). Returns its id."""
+        self._ensure_table()
+        skills = [s.strip() for s in skills if s.strip()]
+        with transaction(self.db_path) as conn:
+            return conn.execute("""
+                INSERT INTO saved_searches
+                (search_key, job_title, location, skills, experience_years, pages, interval_s, enabled, next_run_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)
+                ON CONFLICT(search_key) DO UPDATE SET
+                    skills = excluded.skills,
+                    experience_years = excluded.experience_years,
+                    pages = excluded.pages,
+                    interval_s = excluded.interval_s,
+                    enabled = 1
+                RETURNING id
+            """, (
+                f"{job_title.strip().lower()}|{location.strip().lower()}", job_title.strip(), location.strip(),
+                json.dumps(skills), experience_years, pages, interval_s, time.time(),
+            )).fetchone()[0]
+
+    def remove(self, search_id: int) -> bool:
+        self._ensure_table()
+        with transaction(self.db_path) as conn:
+            return conn.execute("DELETE FROM saved_searches WHERE id = ?", (search_id,)).rowcount > 0
+
+    def _rows(self, where="", params=()) -> List[Dict]:
+        self._ensure_table()
+        columns = ["id", "job_title", "location", "skills", "experience_years", "pages", "interval_s",
+                   "enabled", "last_run_at", "next_run_at", "full_crawl_at"]
+        with connection(self.db_path) as conn:
+            rows = conn.execute(f"SELECT {', '.join(columns)} FROM saved_searches {where} ORDER BY id", params).fetchall()
+        searches = [dict(zip(columns, row)) for row in rows]
+        for search in searches:
+            search["skills"] = json.loads(search["skills"] or "[]")
+        return searches
+
+    def all(self) -> List[Dict]:
+        return self._rows()
+
+    def due(self, now: Optional[float] = None) -> List[Dict]:
+        return self._rows("WHERE enabled = 1 AND COALESCE(next_run_at, 0) <= ?", (now or time.time(),))
+
+    def next_due_at(self) -> Optional[float]:
+        self._ensure_table()
+        with connection(self.db_path) as conn:
+            return conn.execute("SELECT MIN(next_run_at) FROM saved_searches WHERE enabled = 1").fetchone()[0]
+
+    def known(self, links: List[str]) -> set:
+        """The subset of links the re-scraper has already seen."""
+        self._ensure_table()
+        links = [link for link in links if link]
+        known = set()
+        with connection(self.db_path) as conn:
+            for i in range(0, len(links), 500):
+                batch = links[i:i + 500]
+                placeholders = ",".join("?" for _ in batch)
+                known.update(row[0] for row in conn.execute(
+                    f"SELECT link FROM seen_links WHERE link IN ({placeholders})", batch
+                ))
+        return known
+
+    def mark_seen(self, links: List[str], seen_at: float):
+        self._ensure_table()
+        with transaction(self.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO seen_links (link, first_seen, last_seen) VALUES (?, ?, ?)
+                ON CONFLICT(link) DO UPDATE SET last_seen = excluded.last_seen
+            """, [(link, seen_at, seen_at) for link in links if link])
+
+    def record_run(self, search: Dict, result: "RescrapeResult"):
+        self._ensure_table()
+        with transaction(self.db_path) as conn:
+            conn.execute("""
+                INSERT INTO rescrape_runs
+                (search_id, started_at, finished_at, pages_fetched, postings, new, changed, unchanged, removed,
+                 stopped, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                search["id"], result.started_at, result.finished_at, result.pages_fetched, result.postings,
+                result.new, result.changed, result.unchanged, result.removed, json.dumps(result.stopped),
+                result.error,
+            ))
+            conn.execute(
+                "UPDATE saved_searches SET last_run_at = ?, next_run_at = ? WHERE id = ?",
+                (result.finished_at, result.finished_at + (search["interval_s"] or RESCRAPE_INTERVAL), search["id"]),
+            )
+            # A full crawl that missed a board is repeated on the next run
+            if result.full and not result.error and set(result.complete) == set(result.stopped):
+                conn.execute("UPDATE saved_searches SET full_crawl_at = ? WHERE id = ?",
+                             (result.started_at, search["id"]))
+
+    def recent_runs(self, limit: int = 20) -> List[Dict]:
+        self._ensure_table()
+        columns = ["id", "search_id", "started_at", "finished_at", "pages_fetched", "postings",
+                   "new", "changed", "unchanged", "removed", "stopped", "error"]
+        with connection(self.db_path) as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(columns)} FROM rescrape_runs ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+
+# Shared store used by the app ("keep this search fresh") and the CLI
+saved_searches = SavedSearches()
+
+
+@dataclass
+class RescrapeResult:
+    started_at: float
+    finished_at: float = 0.0
+    pages_fetched: int = 0
+    postings: int = 0
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    # board -> page it stopped after and why
+    stopped: Dict[str, str] = field(default_factory=dict)
+    # Whether this run was a full crawl, which doesn't stop on known links
+    full: bool = False
+    # Boards paged through to an empty page or the page limit, whose unseen postings can be flagged as removed
+    complete: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+async def crawl_search(search: Dict, engine: ScrapeEngine, store: SavedSearches, result: RescrapeResult) -> List[Dict]:
+    """
+    Pages through every board one page at a time (boards in parallel). A board
+    stops as soon as a page comes back empty, fails, or holds only links that
+    were seen before, so a quiet search costs one page per board. A full crawl
+    (result.full) doesn't stop on known links. Boards that reached an empty
+    page or the page limit were seen in full and are listed in result.complete.
+    """
+    targets = build_search_targets(search["job_title"], search["location"], search["pages"] or 1)
+    active = {t["board"] for t in targets}
+    seen_this_run, postings = set(), []
+
+    for page in range(1, (search["pages"] or 1) + 1):
+        page_targets = [t for t in targets if t["page"] == page and t["board"] in active]
+        if not page_targets:
+            break
+        by_board = {t["board"]: [] for t in page_targets}
+        extracted = set()
+        async for urls, job_postings in iter_scrape_targets(
+            page_targets, search["job_title"], search["location"], engine, use_cache=False, include_empty=True
+        ):
+            extracted.add(board_from_url(urls[0]))
+            by_board[board_from_url(urls[0])].extend(job_postings)
+
+        result.pages_fetched += len(page_targets)
+        for board, board_postings in by_board.items():
+            links = {post.get("link") for post in board_postings if post.get("link")}
+            fresh = links - seen_this_run - store.known(list(links))
+            seen_this_run |= links
+            postings.extend(board_postings)
+            if board not in extracted:
+                result.stopped[board] = f"page {page}: failed"
+            elif not board_postings:
+                result.stopped[board] = f"page {page}: no postings"
+                result.complete.append(board)
+            elif page == (search["pages"] or 1):
+                result.stopped[board] = f"page {page}: page limit"
+                result.complete.append(board)
+            elif not fresh and not result.full:
+                result.stopped[board] = f"page {page}: only known links"
+            else:
+                continue
+            active.discard(board)
+    return postings
+
+
+async def rescrape_search(search: Dict, engine: ScrapeEngine, store: SavedSearches = saved_searches,
+                          removed_after: float = RESCRAPE_REMOVED_AFTER,
+                          full_crawl_every: float = RESCRAPE_FULL_CRAWL_EVERY) -> RescrapeResult:
+    """
+    Re-scrapes one saved search, writes only new and changed postings, and logs the run.
+    The search is crawled in full when its last full crawl is older than full_crawl_every.
+    """
+    result = RescrapeResult(started_at=time.time())
+    result.full = (search.get("full_crawl_at") or 0) <= result.started_at - full_crawl_every
+    db_path = store.db_path
+    with trace("rescrape", job_title=search["job_title"], location=search["location"], full=result.full) as root:
+        try:
+            postings = await crawl_search(search, engine, store, result)
+            result.postings = len(postings)
+            if postings:
+                # Changes are detected on postings as scraped: what dedup merges into a record
+                # depends on which other pages this run happened to fetch
+                raw_hashes = {post["link"]: job_content_hash(post) for post in postings if post.get("link")}
+                with span("dedup", jobs=len(postings)):
+                    unique, _ = Deduplicator().add(postings)
+                ranked = filter_jobs(unique, search["job_title"], search["skills"], search["experience_years"] or 0)
+                deltas = save_job_deltas(ranked, db_path=db_path, search_query=search["job_title"],
+                                         search_location=search["location"], seen_at=result.started_at,
+                                         content_hashes=raw_hashes)
+                result.new, result.changed, result.unchanged = len(deltas.new), len(deltas.changed), deltas.unchanged
+                store.mark_seen([post.get("link") for post in postings], result.started_at)
+                result.removed = mark_removed_jobs(search["job_title"], search["location"],
+                                                   result.started_at - removed_after, db_path=db_path,
+                                                   boards=result.complete)
+            elif result.pages_fetched:
+                result.error = "no postings returned"
+        except Exception as e:
+            result.error = str(e) or e.__class__.__name__
+        root.set(pages=result.pages_fetched, new=result.new, changed=result.changed, error=result.error)
+    result.finished_at = time.time()
+    store.record_run(search, result)
+
+    print(f"🔁 {search['job_title']} in {search['location']}: {result.pages_fetched} pages"
+          f"{' (full crawl)' if result.full else ''}, "
+          f"{result.new} new, {result.changed} changed, {result.unchanged} unchanged, {result.removed} removed "
+          f"in {result.finished_at - result.started_at:.1f}s" + (f" ❌ {result.error}" if result.error else ""))
+    return result
+
+
+async def run_searches(searches: List[Dict], engine: ScrapeEngine, store: SavedSearches = saved_searches) -> List[RescrapeResult]:
+    # One search at a time; the engine already runs each search's boards in parallel
+    return [await rescrape_search(search, engine, store) for search in searches]
+
+
+async def run_daemon(engine: ScrapeEngine, store: SavedSearches = saved_searches, poll: float = RESCRAPE_POLL):
+    print(f"🕒 Re-scrape daemon started ({len(store.all())} saved searches)")
+    while True:
+        await run_searches(store.due(), engine, store)
+        next_due = store.next_due_at()
+        delay = poll if next_due is None else min(poll, max(1.0, next_due - time.time()))
+        await asyncio.sleep(delay)
+
+
+def make_engine(fixtures: Optional[str] = None, record: Optional[str] = None) -> ScrapeEngine:
+    if fixtures:
+        return build_engine(FixtureExtractor(fixtures))
+    if record:
+        return build_engine(RecordingExtractor(firecrawl_extract, record))
+    return build_engine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep saved job searches fresh.")
+    parser.add_argument("--db", default="jobs.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="save a search to re-scrape")
+    add.add_argument("job_title")
+    add.add_argument("location")
+    add.add_argument("--skills", default="")
+    add.add_argument("--experience", type=int, default=3)
+    add.add_argument("--pages", type=int, default=3)
+    add.add_argument("--interval-hours", type=float, default=RESCRAPE_INTERVAL / 3600)
+
+    commands.add_parser("list", help="show saved searches and recent runs")
+    remove = commands.add_parser("remove", help="delete a saved search")
+    remove.add_argument("search_id", type=int)
+
+    helps = {
+        "run": "re-scrape due searches once",
+        "daemon": "re-scrape forever",
+        "warm": "extract every stale page of every saved search into the scrape cache, so app searches hit it",
+    }
+    for name, help_text in helps.items():
+        command = commands.add_parser(name, help=help_text)
+        source = command.add_mutually_exclusive_group()
+        source.add_argument("--fixtures", help="replay recorded extract responses from this JSON file (offline)")
+        source.add_argument("--record", help="save every live extract response to this JSON file")
+        if name == "run":
+            command.add_argument("--all", action="store_true", help="run every saved search, not just the due ones")
+        elif name == "daemon":
+            command.add_argument("--poll", type=float, default=RESCRAPE_POLL)
+
+    args = parser.parse_args()
+    store = SavedSearches(args.db)
+
+    if args.command == "add":
+        search_id = store.add(args.job_title, args.location, args.skills.split(","), args.experience,
+                              args.pages, args.interval_hours * 3600)
+        print(f"💾 Saved search {search_id}: {args.job_title} in {args.location}")
+    elif args.command == "remove":
+        print("🗑️ Removed" if store.remove(args.search_id) else "Not found")
+    elif args.command == "list":
+        for s in store.all():
+            next_run = time.strftime("%Y-%m-%d %H:%M", time.localtime(s["next_run_at"])) if s["next_run_at"] else "now"
+            print(f"{s['id']:>3}  {s['job_title']} in {s['location']}  ({s['pages']} pages, "
+                  f"every {s['interval_s'] / 3600:g}h, next {next_run})")
+        for run in store.recent_runs(10):
+            print(f"  run {run['id']} search {run['search_id']}: {run['new']} new, {run['changed']} changed, "
+                  f"{run['removed']} removed" + (f", error: {run['error']}" if run["error"] else ""))
+    else:
+        engine = make_engine(args.fixtures, args.record)
+        try:
+            if args.command == "run":
+                asyncio.run(run_searches(store.all() if args.all else store.due(), engine, store))
+            elif args.command == "warm":
+                searches = store.all()
+                cached, fetched, postings = asyncio.run(warm_scrape_cache(searches, engine=engine,
+                                                                          cache=ScrapeCache(args.db)))
+                print(f"♨️ Scrape cache warmed for {len(searches)} saved searches: {cached} pages already cached, "
+                      f"{fetched} fetched ({postings} postings)")
+            else:
+                asyncio.run(run_daemon(engine, store, args.poll))
+        except KeyboardInterrupt:
+            print("👋 Re-scrape stopped")
+
+
+if __name__ == "__main__":
+    main()
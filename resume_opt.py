@@ -1,32 +1,20 @@
-import PyPDF2
-import docx
+import asyncio
 import os
-from openai import OpenAI
+from typing import AsyncIterator, Dict, List
+from llm_service import StreamMetrics, llm
+from resume_parser import parse_resume
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+BULK_LLM_TOP_K = 5
+BULK_LLM_CONCURRENCY = 4
 
 # Extract Resume Text
 def extract_resume_text(file_path: str) -> str:
-    text = ""
-    if file_path.endswith(".pdf"):
-        with open(file_path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-    elif file_path.endswith(".docx"):
-        doc = docx.Document(file_path)
-        for para in doc.paragraphs:
-            text += para.text + "\n"
-    elif file_path.endswith(".txt"):
-        with open(file_path, "r", encoding="utf-8") as f:
-            text = f.read()
-    else:
-        raise ValueError("Unsupported file format. Upload PDF, DOCX, or TXT.")
-    return text.strip()
-
-# Resume Optimization function 
-def analyze_resume(resume_text: str, job_description: str) -> str:
-    prompt = f"""
+    with open(file_path, "rb") as f:
+        return parse_resume(f.read(), os.path.basename(file_path)).text
+
+# Resume Optimization prompt
+def resume_prompt(resume_text: str, job_description: str) -> str:
+    return f"""
     You are a career coach. Compare the following resume to the job description. 
 
     Resume:
@@ -41,10 +29,47 @@ def analyze_resume(resume_text: str, job_description: str) -> str:
     3. 💡 Overall Resume Improvement Suggestions
     """
 
-    response = client.responses.create(
+
+# Resume Optimization function
+def analyze_resume(resume_text: str, job_description: str) -> str:
+    return llm.complete(
+        [{"role": "user", "content": resume_prompt(resume_text, job_description)}],
         model="gpt-4o",
-        input=[{"role": "user", "content": prompt}],
-        max_output_tokens=1200
+        purpose="analyze_resume",
+        max_output_tokens=1200,
     )
 
-    return response.output_text
+
+# Same comparison, streamed as it is generated
+async def stream_resume_analysis(resume_text: str, job_description: str,
+                                 metrics: StreamMetrics = None) -> AsyncIterator[str]:
+    async for chunk in llm.astream(
+        [{"role": "user", "content": resume_prompt(resume_text, job_description)}],
+        model="gpt-4o",
+        purpose="analyze_resume",
+        metrics=metrics,
+        max_output_tokens=1200,
+    ):
+        yield chunk
+
+
+# Detailed suggestions for several jobs at once (e.g. the best ATS matches), a few calls at a time
+async def bulk_analyze_resume(resume_text: str, jobs: List[Dict],
+                              max_concurrency: int = BULK_LLM_CONCURRENCY) -> Dict[int, str]:
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def analyze(job):
+        async with semaphore:
+            # Same prompt and parameters as analyze_resume, so single and bulk runs share cache entries
+            return await llm.acomplete(
+                [{"role": "user", "content": resume_prompt(resume_text, job.get("description") or "")}],
+                model="gpt-4o",
+                purpose="analyze_resume.bulk",
+                max_output_tokens=1200,
+            )
+
+    results = await asyncio.gather(*(analyze(job) for job in jobs), return_exceptions=True)
+    return {
+        job["id"]: f"❌ Analysis failed: {result}" if isinstance(result, Exception) else result
+        for job, result in zip(jobs, results)
+    }
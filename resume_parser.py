@@ -0,0 +1,147 @@
+import functools
+import hashlib
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import List, Optional
+
+from database import connection, transaction
+
+# PDFs with at least this many pages are split across worker processes; below that,
+# starting the workers costs more than it saves (a page takes a few ms to extract)
+PARALLEL_MIN_PAGES = int(os.getenv("RESUME_PARALLEL_MIN_PAGES", "40"))
+RESUME_WORKERS = int(os.getenv("RESUME_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# Runs in a worker process: parse the PDF from bytes and extract one range of pages
+def _extract_pdf_pages(data: bytes, start: int, end: int) -> List[str]:
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+# Spawned (not forked) workers, created on first use and reused for every resume
+@functools.lru_cache(maxsize=None)
+def _pool(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def extract_pdf(data: bytes, parallel_min_pages: int = PARALLEL_MIN_PAGES, workers: int = RESUME_WORKERS):
+    """Returns (text, page count). Large PDFs are extracted in page ranges across a process pool."""
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+    if page_count < parallel_min_pages or workers <= 1:
+        pages = [page.extract_text() or "" for page in reader.pages]
+    else:
+        step = -(-page_count // workers)
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        try:
+            futures = [_pool(workers).submit(_extract_pdf_pages, data, start, end) for start, end in ranges]
+            pages = [text for future in futures for text in future.result()]
+        except BrokenProcessPool as e:
+            print(f"⚠️ Resume worker pool failed ({e}); extracting in-process")
+            _pool.cache_clear()
+            pages = [page.extract_text() or "" for page in reader.pages]
+    return "\n".join(pages), page_count
+
+
+def extract_docx(data: bytes):
+    import docx
+
+    document = docx.Document(io.BytesIO(data))
+    return "\n".join(paragraph.text for paragraph in document.paragraphs), None
+
+
+def extract_txt(data: bytes):
+    return data.decode("utf-8", errors="replace"), None
+
+
+EXTRACTORS = {".pdf": extract_pdf, ".docx": extract_docx, ".txt": extract_txt}
+
+
+@dataclass
+class ParsedResume:
+    content_hash: str
+    filename: str
+    text: str
+    pages: Optional[int]
+    cached: bool = False
+    elapsed: float = 0.0
+
+
+class ResumeCache:
+    """Extracted resume text in jobs.db, keyed by a hash of the file's bytes."""
+
+    def __init__(self, db_path="jobs.db"):
+        self.db_path = db_path
+        self._initialized = False
+
+    def _ensure_table(self):
+        if self._initialized:
+            return
+        with transaction(self.db_path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS parsed_resumes (
+                content_hash TEXT PRIMARY KEY,
+                filename TEXT,
+                text TEXT,
+                pages INTEGER,
+                parsed_at REAL
+            )
+            """)
+        self._initialized = True
+
+    def get(self, digest: str) -> Optional[ParsedResume]:
+        self._ensure_table()
+        with connection(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT filename, text, pages FROM parsed_resumes WHERE content_hash = ?", (digest,)
+            ).fetchone()
+        return ParsedResume(digest, row[0], row[1], row[2], cached=True) if row else None
+
+    def store(self, resume: ParsedResume):
+        self._ensure_table()
+        with transaction(self.db_path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO parsed_resumes (content_hash, filename, text, pages, parsed_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (resume.content_hash, resume.filename, resume.text, resume.pages, time.time()))
+
+
+# Shared cache used by the resume pages
+resume_cache = ResumeCache()
+
+
+def parse_resume(data: bytes, filename: str, cache: Optional[ResumeCache] = resume_cache) -> ParsedResume:
+    """
+    Extracts text from an uploaded resume held in memory (PDF, DOCX or TXT).
+    The same file is only parsed once; later calls are served from the cache.
+    """
+    start = time.perf_counter()
+    extension = os.path.splitext(filename.lower())[1]
+    if extension not in EXTRACTORS:
+        raise ValueError("Unsupported file format. Upload PDF, DOCX, or TXT.")
+
+    digest = content_hash(data)
+    cached = cache.get(digest) if cache is not None else None
+    if cached is not None:
+        cached.elapsed = time.perf_counter() - start
+        return cached
+
+    text, pages = EXTRACTORS[extension](data)
+    resume = ParsedResume(digest, filename, text.strip(), pages, elapsed=time.perf_counter() - start)
+    if cache is not None:
+        cache.store(resume)
+    print(f"📄 Parsed {filename} ({pages or 1} pages) in {resume.elapsed:.2f}s")
+    return resume
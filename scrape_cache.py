@@ -0,0 +1,95 @@
+import json
+import time
+from typing import Dict, List, Optional
+
+from database import connection, transaction
+
+
+# How long (seconds) an extracted search page stays fresh, per board
+BOARD_FRESHNESS = {
+    "ziprecruiter": 6 * 3600,
+    "glassdoor": 12 * 3600,
+    "wayup": 24 * 3600,
+    "handshake": 24 * 3600,
+}
+DEFAULT_FRESHNESS = 6 * 3600
+
+
+class ScrapeCache:
+    """
+    URL-level cache of extracted postings, keyed by (board, query, location, page).
+
+    A page is served from the cache while it is younger than its board's
+    freshness window; stale or missing pages have to be extracted again.
+    """
+
+    def __init__(self, db_path="jobs.db", freshness: Optional[Dict[str, float]] = None,
+                 default_freshness: float = DEFAULT_FRESHNESS):
+        self.db_path = db_path
+        self.freshness = dict(BOARD_FRESHNESS, **(freshness or {}))
+        self.default_freshness = default_freshness
+        self._initialized = False
+
+    def _ensure_table(self):
+        if self._initialized:
+            return
+        with transaction(self.db_path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS scrape_cache (
+                url TEXT PRIMARY KEY,
+                board TEXT,
+                query TEXT,
+                location TEXT,
+                page INTEGER,
+                postings TEXT,
+                fetched_at REAL
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scrape_cache_search ON scrape_cache(board, query, location, page)")
+        self._initialized = True
+
+    def max_age(self, board: str) -> float:
+        return self.freshness.get(board, self.default_freshness)
+
+    def get_fresh(self, urls: List[str]) -> Dict[str, List[Dict]]:
+        """Returns {url: postings} for every URL that has a fresh cache entry."""
+        if not urls:
+            return {}
+        self._ensure_table()
+        placeholders = ",".join("?" for _ in urls)
+        with connection(self.db_path) as conn:
+            rows = conn.execute(
+                f"SELECT url, board, postings, fetched_at FROM scrape_cache WHERE url IN ({placeholders})",
+                urls,
+            ).fetchall()
+
+        now = time.time()
+        return {
+            url: json.loads(postings)
+            for url, board, postings, fetched_at in rows
+            if now - fetched_at <= self.max_age(board)
+        }
+
+    def store(self, url: str, board: str, query: str, location: str, page: int, postings: List[Dict]):
+        self._ensure_table()
+        with transaction(self.db_path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO scrape_cache (url, board, query, location, page, postings, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (url, board, query.lower(), location.lower(), page, json.dumps(postings), time.time()))
+
+    def purge_stale(self) -> int:
+        """Deletes entries older than their board's freshness window."""
+        self._ensure_table()
+        now = time.time()
+        with transaction(self.db_path) as conn:
+            stale = [
+                url for url, board, fetched_at in conn.execute("SELECT url, board, fetched_at FROM scrape_cache")
+                if now - fetched_at > self.max_age(board)
+            ]
+            conn.executemany("DELETE FROM scrape_cache WHERE url = ?", [(u,) for u in stale])
+        return len(stale)
+
+
+# Shared cache used by the scraper
+scrape_cache = ScrapeCache()
@@ -0,0 +1,304 @@
+import asyncio
+import json
+import os
+import random
+import time
+import weakref
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from tracing import add_span
+
+
+# Hostname -> board name, used to group URLs and apply per-board rate limits
+BOARD_HOSTS = {
+    "ziprecruiter.com": "ziprecruiter",
+    "glassdoor.com": "glassdoor",
+    "wayup.com": "wayup",
+    "joinhandshake.com": "handshake",
+}
+
+
+def board_from_url(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    for domain, board in BOARD_HOSTS.items():
+        if host == domain or host.endswith("." + domain):
+            return board
+    return host or "unknown"
+
+
+# Result of one extract call (one chunk of URLs from a single board)
+@dataclass
+class ChunkResult:
+    index: int
+    board: str
+    urls: List[str]
+    job_postings: List[Dict]
+    attempts: int
+    elapsed: float
+    error: Optional[str] = None
+
+
+class BoardRateLimiter:
+    """Spaces out request starts so a board sees at most one call per `min_interval` seconds."""
+
+    def __init__(self, min_interval: float = 0.0):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if self.min_interval <= 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.min_interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class ScrapeEngine:
+    """
+    Runs extract calls for many URL chunks concurrently.
+
+    `extract_fn(urls)` may be a plain function (run in a worker thread, e.g. the
+    synchronous Firecrawl client) or a coroutine function. It must return a dict
+    with a 'job_postings' list.
+
+    max_concurrency and the per-board intervals hold for the engine as a whole:
+    every run() on the same event loop shares one semaphore and one rate limiter
+    per board, so concurrent scrapes through one engine stay within them.
+    """
+
+    def __init__(
+        self,
+        extract_fn: Callable,
+        max_concurrency: int = 4,
+        board_intervals: Optional[Dict[str, float]] = None,
+        default_interval: float = 0.0,
+        chunk_timeout: float = 120.0,
+        max_retries: int = 2,
+        backoff_base: float = 1.0,
+        backoff_max: float = 15.0,
+    ):
+        self.extract_fn = extract_fn
+        self._extract_is_async = asyncio.iscoroutinefunction(extract_fn) or asyncio.iscoroutinefunction(
+            getattr(extract_fn, "__call__", None)
+        )
+        self.max_concurrency = max(1, max_concurrency)
+        self.board_intervals = board_intervals or {}
+        self.default_interval = default_interval
+        self.chunk_timeout = chunk_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Semaphore and per-board limiters per event loop (asyncio primitives belong to one loop)
+        self._limits = weakref.WeakKeyDictionary()
+
+    def _loop_limits(self) -> Tuple[asyncio.Semaphore, Dict[str, BoardRateLimiter]]:
+        loop = asyncio.get_running_loop()
+        if loop not in self._limits:
+            self._limits[loop] = (asyncio.Semaphore(self.max_concurrency), {})
+        return self._limits[loop]
+
+    def _limiter(self, board: str) -> BoardRateLimiter:
+        limiters = self._loop_limits()[1]
+        if board not in limiters:
+            limiters[board] = BoardRateLimiter(self.board_intervals.get(board, self.default_interval))
+        return limiters[board]
+
+    async def _call_extract(self, urls: List[str]) -> Dict:
+        """
+        One extract call, bounded by chunk_timeout. A plain extract_fn runs in a
+        thread that can't be cancelled, so after a timeout the call keeps its
+        concurrency slot until the thread finishes and its late result is used;
+        retrying next to it would pay for the same extract twice.
+        """
+        if self._extract_is_async:
+            return await asyncio.wait_for(self.extract_fn(urls), timeout=self.chunk_timeout)
+        call = asyncio.ensure_future(asyncio.to_thread(self.extract_fn, urls))
+        try:
+            return await asyncio.wait_for(asyncio.shield(call), timeout=self.chunk_timeout)
+        except asyncio.TimeoutError:
+            print(f"⏳ Extract of {len(urls)} URL(s) still running after {self.chunk_timeout}s, waiting for it...")
+            return await call
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _run_chunk(self, index, board, urls) -> ChunkResult:
+        semaphore, limiter = self._loop_limits()[0], self._limiter(board)
+        start = time.monotonic()
+        error = None
+        attempt = 0
+        while attempt <= self.max_retries:
+            attempt += 1
+            await limiter.wait()
+            async with semaphore:
+                try:
+                    data = await self._call_extract(urls)
+                    postings = (data or {}).get("job_postings", []) or []
+                    result = ChunkResult(index, board, urls, postings, attempt, time.monotonic() - start)
+                    add_span("scrape.extract", result.elapsed, board=board, urls=len(urls), jobs=len(postings),
+                             attempts=attempt)
+                    return result
+                except asyncio.TimeoutError:
+                    error = f"timed out after {self.chunk_timeout}s"
+                except Exception as e:
+                    error = str(e) or e.__class__.__name__
+            if attempt <= self.max_retries:
+                print(f"⚠️ Chunk {index + 1} ({board}) failed: {error}. Retrying (attempt {attempt + 1})...")
+                await asyncio.sleep(self._backoff(attempt))
+
+        print(f"❌ Chunk {index + 1} ({board}) gave up after {attempt} attempts: {error}")
+        result = ChunkResult(index, board, urls, [], attempt, time.monotonic() - start, error)
+        add_span("scrape.extract", result.elapsed, error, board=board, urls=len(urls), jobs=0, attempts=attempt)
+        return result
+
+    async def run(self, chunks: List[Tuple[str, List[str]]]) -> AsyncIterator[ChunkResult]:
+        """Extracts every (board, urls) chunk and yields each ChunkResult as soon as it finishes."""
+        if not chunks:
+            return
+        tasks = [
+            asyncio.create_task(self._run_chunk(i, board, urls))
+            for i, (board, urls) in enumerate(chunks)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def chunk_urls_by_board(urls: List[str], chunk_size: int = 10) -> List[Tuple[str, List[str]]]:
+    """Groups URLs per board (preserving order) and splits each group into chunks."""
+    grouped: Dict[str, List[str]] = {}
+    for url in urls:
+        grouped.setdefault(board_from_url(url), []).append(url)
+
+    chunks = []
+    for board, board_urls in grouped.items():
+        for i in range(0, len(board_urls), chunk_size):
+            chunks.append((board, board_urls[i:i + chunk_size]))
+    return chunks
+
+
+class FakeExtractor:
+    """
+    Local stand-in for Firecrawl's extract, for trying the engine offline.
+
+    Returns canned postings after an artificial delay. `postings` maps a URL to
+    its postings; URLs missing from the map get generated placeholder postings.
+    """
+
+    def __init__(self, postings: Optional[Dict[str, List[Dict]]] = None, latency: float = 0.5,
+                 jitter: float = 0.0, fail_rate: float = 0.0, per_url: int = 3):
+        self.postings = postings or {}
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.per_url = per_url
+        self.calls = 0
+
+    def _placeholder(self, url: str) -> List[Dict]:
+        board = board_from_url(url)
+        return [
+            {
+                "job_title": f"Software Engineer {n}",
+                "company": f"{board.title()} Co {abs(hash(url)) % 1000}",
+                "location": "Remote",
+                "experience": f"{n} years",
+                "compensation": "N/A",
+                "link": f"{url}#job-{n}",
+                "description": "Python, APIs and cloud services.",
+            }
+            for n in range(1, self.per_url + 1)
+        ]
+
+    async def __call__(self, urls: List[str]) -> Dict:
+        self.calls += 1
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        if self.fail_rate and random.random() < self.fail_rate:
+            raise RuntimeError("fake extractor failure")
+        job_postings = []
+        for url in urls:
+            job_postings.extend(self.postings.get(url) or self._placeholder(url))
+        return {"job_postings": job_postings}
+
+
+def _fixture_key(urls: List[str]) -> str:
+    return " ".join(urls)
+
+
+class RecordingExtractor:
+    """
+    Wraps a real extract function and saves every response (with its latency)
+    to a JSON fixture file that FixtureExtractor can replay offline.
+    """
+
+    def __init__(self, extract_fn: Callable, path: str):
+        self.extract_fn = extract_fn
+        self.path = path
+        self.responses = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.responses = json.load(f)
+
+    async def __call__(self, urls: List[str]) -> Dict:
+        start = time.monotonic()
+        if asyncio.iscoroutinefunction(self.extract_fn) or asyncio.iscoroutinefunction(
+            getattr(self.extract_fn, "__call__", None)
+        ):
+            data = await self.extract_fn(urls)
+        else:
+            data = await asyncio.to_thread(self.extract_fn, urls)
+        self.responses[_fixture_key(urls)] = {
+            "job_postings": (data or {}).get("job_postings", []) or [],
+            "latency": round(time.monotonic() - start, 3),
+        }
+        self.save()
+        return data
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.responses, f, indent=1)
+
+
+class FixtureExtractor:
+    """
+    Replays responses recorded by RecordingExtractor. URLs that were never
+    recorded return no postings, like a board that has run out of results.
+    With replay_latency, each response takes as long as it did when recorded
+    (times latency_scale).
+    """
+
+    def __init__(self, path_or_responses, replay_latency: bool = False, latency_scale: float = 1.0):
+        if isinstance(path_or_responses, str):
+            with open(path_or_responses, "r", encoding="utf-8") as f:
+                path_or_responses = json.load(f)
+        self.responses = path_or_responses
+        self.replay_latency = replay_latency
+        self.latency_scale = latency_scale
+        self.calls = 0
+        self.misses = 0
+
+    async def __call__(self, urls: List[str]) -> Dict:
+        self.calls += 1
+        response = self.responses.get(_fixture_key(urls))
+        if response is None and len(urls) > 1:
+            # Recorded one URL at a time but replayed in larger chunks
+            parts = [self.responses.get(_fixture_key([url])) for url in urls]
+            response = {
+                "job_postings": [post for part in parts if part for post in part["job_postings"]],
+                "latency": max((part.get("latency", 0) for part in parts if part), default=0),
+            }
+        if response is None:
+            self.misses += 1
+            return {"job_postings": []}
+        if self.replay_latency and response.get("latency"):
+            await asyncio.sleep(response["latency"] * self.latency_scale)
+        return {"job_postings": [dict(post) for post in response["job_postings"]]}
@@ -0,0 +1,371 @@
+"""
+Backend worker for multi-user deployments.
+
+With MULTI_USER=1 the Streamlit app does not scrape or call the LLM itself:
+a search is queued in the search_tasks table and the page polls its progress.
+This process claims queued searches and runs scrape -> dedup -> rank -> save ->
+analysis for several of them at once on its own event loop, plus the
+background per-job analyses (analysis_queue). Users searching the same title
+and location at the same time share one scrape, and identical LLM prompts
+share one call, on top of the scrape and LLM caches every user already shares.
+
+    MULTI_USER=1 streamlit run app.py
+    python search_worker.py
+    python search_worker.py --fixtures benchmarks/fixtures/search_pages.json   # offline
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Union
+
+from analysis_queue import ANALYSIS_TOP_N, analysis_queue
+from database import DEFAULT_USER, connection, init_db, save_jobs_to_db, transaction
+from dedup import Deduplicator
+from feedback_store import feedback_store
+from jobScraper import analyze_jobs, build_engine, filter_jobs, iter_multi_scrape_jobs, merge_ranked, unique_terms
+from scrape_engine import FixtureExtractor, ScrapeEngine
+from tracing import span, trace
+
+SEARCH_WORKER_CONCURRENCY = int(os.getenv("SEARCH_WORKER_CONCURRENCY", "16"))
+SEARCH_WORKER_POLL = float(os.getenv("SEARCH_WORKER_POLL", "0.5"))
+SEARCH_PAGES = 3
+
+TASK_COLUMNS = ["id", "user_id", "job_title", "location", "skills", "experience_years", "semantic", "status",
+                "stage", "scraped", "job_ids", "analysis", "error", "created_at", "started_at", "updated_at",
+                "finished_at", "job_titles", "locations"]
+
+
+class SearchTasks:
+    """
+    Queued searches (search_tasks), one row per search a user started.
+
+    status goes queued -> running -> done / failed; while running, stage
+    (scraping, analyzing) and the ranked job ids so far are updated after
+    every scraped batch, which is what the app shows. job_title and location
+    are the first of the search's title variants and locations (job_titles,
+    locations), which are all searched together. Claims are a single
+    UPDATE ... RETURNING, so several workers can share jobs.db. A worker bumps
+    updated_at of its running searches every stale_after / 3 seconds, so a
+    search left running by a crashed worker is claimed again after `stale_after`
+    seconds of silence.
+    """
+
+    def __init__(self, db_path="jobs.db", stale_after: float = 300):
+        self.db_path = db_path
+        self.stale_after = stale_after
+        self._initialized = False
+        # Wakes a worker in this process right away; other processes poll
+        self.wakeup = threading.Event()
+
+    def _ensure_table(self):
+        if self._initialized:
+            return
+        init_db(self.db_path)
+        with transaction(self.db_path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS search_tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT,
+                job_title TEXT,
+                location TEXT,
+                skills TEXT,
+                experience_years INTEGER,
+                semantic INTEGER,
+                status TEXT,
+                stage TEXT,
+                scraped INTEGER DEFAULT 0,
+                job_ids TEXT,
+                analysis TEXT,
+                error TEXT,
+                created_at REAL,
+                started_at REAL,
+                updated_at REAL,
+                finished_at REAL,
+                job_titles TEXT,
+                locations TEXT
+            )
+            """)
+            self._add_query_columns(conn)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_search_tasks_status ON search_tasks(status, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_search_tasks_user ON search_tasks(user_id, id)")
+        self._initialized = True
+
+    @staticmethod
+    def _add_query_columns(conn):
+        # Tables created before multi-query searches only have job_title and location
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(search_tasks)")}
+        for column in ("job_titles", "locations"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE search_tasks ADD COLUMN {column} TEXT")
+
+    def submit(self, user_id: str, job_title: Union[str, List[str]], location: Union[str, List[str]],
+               skills: List[str] = (), experience_years: int = 3, semantic: bool = False) -> int:
+        """Queues a search and returns its task id. Several titles and locations may be given as lists."""
+        self._ensure_table()
+        now = time.time()
+        titles = unique_terms([job_title] if isinstance(job_title, str) else job_title)
+        locations = unique_terms([location] if isinstance(location, str) else location)
+        skills = [s.strip() for s in skills if s.strip()]
+        with transaction(self.db_path) as conn:
+            task_id = conn.execute("""
+                INSERT INTO search_tasks
+                (user_id, job_title, location, job_titles, locations, skills, experience_years, semantic, status,
+                 created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?)
+            """, (user_id, titles[0] if titles else "", locations[0] if locations else "", json.dumps(titles),
+                  json.dumps(locations), json.dumps(skills), experience_years, int(semantic), now, now)).lastrowid
+        self.wakeup.set()
+        return task_id
+
+    def _rows_to_tasks(self, rows) -> List[Dict]:
+        tasks = [dict(zip(TASK_COLUMNS, row)) for row in rows]
+        for task in tasks:
+            task["skills"] = json.loads(task["skills"] or "[]")
+            task["job_ids"] = json.loads(task["job_ids"] or "[]")
+            task["job_titles"] = json.loads(task["job_titles"] or "[]") or [task["job_title"]]
+            task["locations"] = json.loads(task["locations"] or "[]") or [task["location"]]
+            task["semantic"] = bool(task["semantic"])
+        return tasks
+
+    def get(self, task_id: int) -> Optional[Dict]:
+        self._ensure_table()
+        with connection(self.db_path) as conn:
+            row = conn.execute(f"SELECT {', '.join(TASK_COLUMNS)} FROM search_tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._rows_to_tasks([row])[0] if row else None
+
+    def counts(self) -> Dict[str, int]:
+        self._ensure_table()
+        with connection(self.db_path) as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM search_tasks GROUP BY status").fetchall())
+
+    def claim(self, limit: int, exclude: Iterable[int] = ()) -> List[Dict]:
+        """Claims up to limit queued or stale searches; exclude holds ids the caller is already running."""
+        self._ensure_table()
+        now = time.time()
+        exclude = list(exclude)
+        not_excluded = f"AND id NOT IN ({', '.join('?' for _ in exclude)})" if exclude else ""
+        with transaction(self.db_path) as conn:
+            rows = conn.execute(f"""
+                UPDATE search_tasks SET status = 'running', stage = 'scraping', started_at = ?, updated_at = ?
+                WHERE id IN (
+                    SELECT id FROM search_tasks
+                    WHERE (status = 'queued' OR (status = 'running' AND updated_at < ?)) {not_excluded}
+                    ORDER BY id
+                    LIMIT ?
+                )
+                RETURNING {', '.join(TASK_COLUMNS)}
+            """, (now, now, now - self.stale_after, *exclude, limit)).fetchall()
+        return self._rows_to_tasks(rows)
+
+    def update(self, task_id: int, job_ids: Optional[List[int]] = None, **fields):
+        """Sets the given columns (stage, scraped, status, analysis, error, ...) and the ranked job ids."""
+        if job_ids is not None:
+            fields["job_ids"] = json.dumps(job_ids)
+        if fields.get("status") in ("done", "failed"):
+            fields["finished_at"] = time.time()
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with transaction(self.db_path) as conn:
+            conn.execute(f"UPDATE search_tasks SET {assignments} WHERE id = ?", (*fields.values(), task_id))
+
+
+# Shared task queue used by the app and the worker
+search_tasks = SearchTasks()
+
+
+class _SharedScrape:
+    """One in-flight scrape whose batches any number of searches can read, each from the start."""
+
+    def __init__(self):
+        self.batches: List[List[Dict]] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Condition()
+
+    async def produce(self, batches: AsyncIterator[List[Dict]]):
+        try:
+            async for batch in batches:
+                async with self.changed:
+                    self.batches.append(batch)
+                    self.changed.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            async with self.changed:
+                self.done = True
+                self.changed.notify_all()
+
+    async def read(self) -> AsyncIterator[List[Dict]]:
+        position = 0
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: position < len(self.batches) or self.done)
+                batches = self.batches[position:]
+            position += len(batches)
+            for batch in batches:
+                # Every search scores and annotates its own copies
+                yield [dict(job) for job in batch]
+            if not batches and self.done:
+                if self.error:
+                    raise self.error
+                return
+
+
+class SearchWorker:
+    """Runs queued searches, up to max_concurrency at a time, on one event loop."""
+
+    def __init__(self, tasks: SearchTasks = search_tasks, engine: Optional[ScrapeEngine] = None,
+                 max_concurrency: int = SEARCH_WORKER_CONCURRENCY, poll: float = SEARCH_WORKER_POLL,
+                 pages: int = SEARCH_PAGES, analyze: bool = True):
+        self.tasks = tasks
+        self.engine = engine or build_engine()
+        self.max_concurrency = max_concurrency
+        self.poll = poll
+        self.pages = pages
+        self.analyze = analyze
+        self.shared_scrapes = 0
+        self._scrapes: Dict[tuple, _SharedScrape] = {}
+        self._running: Set[int] = set()
+        self._stopped = threading.Event()
+
+    def scrape(self, job_titles: List[str], locations: List[str]) -> AsyncIterator[List[Dict]]:
+        """Batches for a search; joins a scrape already running for the same titles and locations."""
+        key = (tuple(sorted(t.lower() for t in job_titles)), tuple(sorted(place.lower() for place in locations)))
+        shared = self._scrapes.get(key)
+        if shared is None:
+            shared = self._scrapes[key] = _SharedScrape()
+            producer = asyncio.create_task(shared.produce(
+                iter_multi_scrape_jobs(job_titles, locations, [], pages=self.pages, engine=self.engine)
+            ))
+            # Later searches for the same key are served by the scrape cache
+            producer.add_done_callback(lambda _: self._scrapes.pop(key, None))
+        else:
+            self.shared_scrapes += 1
+        return shared.read()
+
+    async def heartbeat(self, task_id: int):
+        """Keeps a running search's updated_at fresh so no worker takes it for a crashed one."""
+        while True:
+            await asyncio.sleep(self.tasks.stale_after / 3)
+            try:
+                await asyncio.to_thread(self.tasks.update, task_id)
+            except Exception as e:
+                print(f"⚠️ Search {task_id} heartbeat failed: {e}")
+
+    async def run_search(self, task: Dict):
+        self._running.add(task["id"])
+        heartbeat = asyncio.create_task(self.heartbeat(task["id"]))
+        try:
+            await self._run_search(task)
+        finally:
+            heartbeat.cancel()
+            self._running.discard(task["id"])
+
+    async def _run_search(self, task: Dict):
+        user_id = task["user_id"] or DEFAULT_USER
+        title, location = task["job_title"], task["location"]
+        titles, locations = task["job_titles"], task["locations"]
+        skills, experience_years = task["skills"], task["experience_years"] or 0
+        db_path = self.tasks.db_path
+        with trace("search", job_title=title, location=location, queries=len(titles) * len(locations), user=user_id,
+                   task=task["id"]) as search_span:
+            try:
+                ranked, scraped = [], 0
+                dedup = Deduplicator()
+                preferences = feedback_store.preferences(user_id)
+                async for batch in self.scrape(titles, locations):
+                    scraped += len(batch)
+                    # Dedup and ranking are CPU-bound; in a thread they don't stall other searches or heartbeats
+                    with span("dedup", jobs=len(batch)):
+                        new_jobs, merged_jobs = await asyncio.to_thread(dedup.add, batch)
+                    batch_ranked = await asyncio.to_thread(filter_jobs, new_jobs, titles, skills, experience_years,
+                                                           preferences=preferences)
+                    # Postings carry the title and location they were scraped for
+                    await asyncio.to_thread(save_jobs_to_db, batch_ranked + merged_jobs, db_path)
+                    ranked = merge_ranked(ranked, batch_ranked)
+                    await asyncio.to_thread(self.tasks.update, task["id"], scraped=scraped,
+                                            job_ids=[job["id"] for job in ranked if "id" in job])
+
+                if task["semantic"] and ranked:
+                    from semantic import default_store, semantic_rank
+
+                    with span("semantic_rank", jobs=len(ranked)):
+                        query_text = f"{' / '.join(titles)}. Skills: {', '.join(skills)}"
+                        ranked = await asyncio.to_thread(semantic_rank, ranked, query_text, default_store(db_path))
+                job_ids = [job["id"] for job in ranked if "id" in job]
+
+                analysis = None
+                if self.analyze and ranked:
+                    await asyncio.to_thread(self.tasks.update, task["id"], stage="analyzing", job_ids=job_ids)
+                    await asyncio.to_thread(analysis_queue.enqueue, ranked[:ANALYSIS_TOP_N])
+                    with span("analyze_jobs", jobs=len(ranked)):
+                        analysis = await analyze_jobs(ranked, title, location, experience_years, skills,
+                                                      user_id=user_id)
+                await asyncio.to_thread(self.tasks.update, task["id"], status="done", stage=None,
+                                        job_ids=job_ids, analysis=analysis)
+                search_span.set(scraped=scraped, jobs=len(job_ids))
+                print(f"✅ Search {task['id']} ({user_id}): {len(job_ids)} jobs for {' / '.join(titles)} "
+                      f"in {' / '.join(locations)}")
+            except Exception as e:
+                search_span.error = str(e) or e.__class__.__name__
+                print(f"❌ Search {task['id']} ({user_id}) failed: {e}")
+                await asyncio.to_thread(self.tasks.update, task["id"], status="failed", stage=None,
+                                        error=str(e) or e.__class__.__name__)
+
+    async def run(self, until_empty: bool = False):
+        running = set()
+        while not self._stopped.is_set():
+            self.tasks.wakeup.clear()
+            free = self.max_concurrency - len(running)
+            try:
+                claimed = await asyncio.to_thread(self.tasks.claim, free, set(self._running)) if free > 0 else []
+            except Exception as e:
+                print(f"⚠️ Search worker could not claim work: {e}")
+                claimed = []
+            for task in claimed:
+                running.add(asyncio.create_task(self.run_search(task)))
+
+            if running:
+                _, running = await asyncio.wait(running, timeout=self.poll, return_when=asyncio.FIRST_COMPLETED)
+            elif until_empty:
+                return
+            else:
+                await asyncio.to_thread(self.tasks.wakeup.wait, self.poll)
+        if running:
+            await asyncio.wait(running)
+
+    def start(self) -> threading.Thread:
+        """Runs the worker in a daemon thread with its own event loop (for scripts and tests)."""
+        self._stopped.clear()
+        thread = threading.Thread(target=asyncio.run, args=(self.run(),), name="search-worker", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stops claiming searches; run() returns once the running ones finish."""
+        self._stopped.set()
+        self.tasks.wakeup.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued job searches for a multi-user deployment.")
+    parser.add_argument("--db", default="jobs.db")
+    parser.add_argument("--concurrency", type=int, default=SEARCH_WORKER_CONCURRENCY)
+    parser.add_argument("--fixtures", help="replay recorded search pages instead of calling Firecrawl")
+    args = parser.parse_args()
+
+    engine = build_engine(FixtureExtractor(args.fixtures)) if args.fixtures else None
+    worker = SearchWorker(SearchTasks(args.db), engine=engine, max_concurrency=args.concurrency)
+    print(f"🧑‍🤝‍🧑 Search worker running ({args.concurrency} searches at a time)")
+    analysis_queue.start()
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        print("👋 Search worker stopped")
+
+
+if __name__ == "__main__":
+    main()
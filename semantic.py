@@ -0,0 +1,251 @@
+import functools
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from database import connection, job_content_hash, transaction
+
+TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+# Common abbreviations folded onto one token before hashing
+ALIASES = {
+    "k8s": "kubernetes",
+    "js": "javascript",
+    "ts": "typescript",
+    "postgresql": "postgres",
+    "golang": "go",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "backend": "back end",
+    "frontend": "front end",
+    "gcp": "google cloud",
+}
+# Hyphenated phrases are replaced before tokenizing
+PHRASE_ALIASES = {
+    "server-side": "back end",
+    "client-side": "front end",
+}
+
+
+def job_text(job: Dict, max_chars: int = 8000) -> str:
+    return " ".join(
+        str(job.get(k) or "") for k in ("job_title", "company", "location", "description")
+    )[:max_chars]
+
+
+class HashingEmbedder:
+    """
+    Deterministic, offline embedder: hashed unigrams and bigrams, L2-normalized.
+    Good for tests and as a fallback when no embedding API is configured.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        text = text.lower()
+        for phrase, alias in PHRASE_ALIASES.items():
+            text = text.replace(phrase, alias)
+        tokens = []
+        for token in TOKEN_RE.findall(text):
+            tokens.extend(ALIASES.get(token, token).split())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vectors[i, value % self.dim] += 1.0 if (value >> 63) else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class OpenAIEmbedder:
+    name = "openai"
+
+    def __init__(self, service, model: str = "text-embedding-3-small", dim: int = 1536, batch_size: int = 128):
+        self.service = service
+        self.model = model
+        self.dim = dim
+        self.batch_size = batch_size
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.extend(self.service.embed(texts[i:i + self.batch_size], model=self.model))
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+def default_embedder():
+    """OpenAI embeddings when an API key is set (or EMBEDDING_BACKEND=openai), hashing otherwise."""
+    backend = os.getenv("EMBEDDING_BACKEND") or ("openai" if os.getenv("OPENAI_API_KEY") else "hashing")
+    if backend == "openai":
+        from llm_service import llm
+        return OpenAIEmbedder(llm)
+    return HashingEmbedder()
+
+
+class VectorStore:
+    """
+    Job embeddings in a float32 memory-mapped matrix next to jobs.db.
+    The job_vectors table maps (embedder, link) to a matrix row and the content
+    hash it was embedded from; a job is embedded again when its content changes.
+    Rows are appended inside a write transaction on jobs.db, so the app, the
+    search worker and rescrape.py can add vectors at the same time.
+    """
+
+    def __init__(self, embedder, db_path="jobs.db", vectors_path: Optional[str] = None):
+        self.embedder = embedder
+        self.db_path = db_path
+        self.vectors_path = vectors_path or f"{os.path.splitext(db_path)[0]}_vectors_{embedder.name}.f32"
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _ensure_table(self):
+        if self._initialized:
+            return
+        with transaction(self.db_path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_vectors (
+                embedder TEXT,
+                link TEXT,
+                row INTEGER,
+                content_hash TEXT,
+                PRIMARY KEY (embedder, link)
+            )
+            """)
+            # Tables created before vectors were re-embedded on change have no content_hash
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(job_vectors)")}
+            if "content_hash" not in columns:
+                conn.execute("ALTER TABLE job_vectors ADD COLUMN content_hash TEXT")
+        self._initialized = True
+
+    def __len__(self):
+        if not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // (4 * self.embedder.dim)
+
+    def matrix(self) -> np.ndarray:
+        rows = len(self)
+        if rows == 0:
+            return np.zeros((0, self.embedder.dim), dtype=np.float32)
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.embedder.dim))
+
+    def rows_for(self, links: List[str]) -> Dict[str, int]:
+        self._ensure_table()
+        rows = {}
+        with connection(self.db_path) as conn:
+            for i in range(0, len(links), 500):
+                batch = links[i:i + 500]
+                placeholders = ",".join("?" for _ in batch)
+                rows.update(conn.execute(
+                    f"SELECT link, row FROM job_vectors WHERE embedder = ? AND link IN ({placeholders})",
+                    (self.embedder.name, *batch),
+                ).fetchall())
+        return rows
+
+    def content_hashes(self, links: List[str]) -> Dict[str, str]:
+        self._ensure_table()
+        hashes = {}
+        with connection(self.db_path) as conn:
+            for i in range(0, len(links), 500):
+                batch = links[i:i + 500]
+                placeholders = ",".join("?" for _ in batch)
+                hashes.update(conn.execute(
+                    f"SELECT link, content_hash FROM job_vectors WHERE embedder = ? AND link IN ({placeholders})",
+                    (self.embedder.name, *batch),
+                ).fetchall())
+        return hashes
+
+    def add(self, jobs: List[Dict]) -> int:
+        """
+        Embeds and stores every job (by link) that has no vector yet or whose
+        content changed since it was embedded. Returns how many were added.
+        """
+        jobs = {job["link"]: job for job in jobs if job.get("link")}
+        with self._lock:
+            known = self.content_hashes(list(jobs))
+            digests = {link: job_content_hash(job) for link, job in jobs.items()}
+            new_jobs = [job for link, job in jobs.items() if link not in known or known[link] != digests[link]]
+            if not new_jobs:
+                return 0
+
+            vectors = self.embedder.embed([job_text(job) for job in new_jobs])
+            row_bytes = 4 * self.embedder.dim
+            # The write lock on jobs.db serializes appends across processes; rows are numbered
+            # from the file size under it, after dropping any partial row left by a crash
+            with transaction(self.db_path) as conn:
+                start = len(self)
+                with open(self.vectors_path, "ab") as f:
+                    f.truncate(start * row_bytes)
+                    f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                conn.executemany(
+                    "INSERT OR REPLACE INTO job_vectors (embedder, link, row, content_hash) VALUES (?, ?, ?, ?)",
+                    [(self.embedder.name, job["link"], start + i, digests[job["link"]])
+                     for i, job in enumerate(new_jobs)],
+                )
+        return len(new_jobs)
+
+    def search(self, query: str, k: int = 30, links: Optional[List[str]] = None,
+               block_rows: int = 65536) -> List[Tuple[str, float]]:
+        """
+        Top-k (link, cosine similarity) for the query text, brute force over the
+        memory-mapped matrix in blocks. `links` restricts the search to those jobs.
+        """
+        query_vec = self.embedder.embed([query])[0]
+        if links is not None:
+            row_map = self.rows_for(links)
+        else:
+            self._ensure_table()
+            with connection(self.db_path) as conn:
+                row_map = dict(conn.execute(
+                    "SELECT link, row FROM job_vectors WHERE embedder = ?", (self.embedder.name,)
+                ).fetchall())
+        if not row_map:
+            return []
+
+        link_by_row = {row: link for link, row in row_map.items()}
+        rows = np.fromiter(sorted(link_by_row), dtype=np.int64)
+        matrix = self.matrix()
+
+        scores = np.empty(len(rows), dtype=np.float32)
+        for i in range(0, len(rows), block_rows):
+            block = rows[i:i + block_rows]
+            scores[i:i + len(block)] = matrix[block] @ query_vec
+
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(link_by_row[int(rows[i])], float(scores[i])) for i in top]
+
+
+@functools.lru_cache(maxsize=None)
+def default_store(db_path="jobs.db") -> VectorStore:
+    return VectorStore(default_embedder(), db_path)
+
+
+def semantic_rank(jobs: List[Dict], query: str, store: VectorStore, top_k: Optional[int] = None) -> List[Dict]:
+    """
+    Embeds any new jobs, then orders them by similarity to the query (e.g. the
+    user's title, skills or resume text). Adds a 'semantic_score' to each job.
+    """
+    store.add(jobs)
+    by_link = {job["link"]: job for job in jobs if job.get("link")}
+    ranked = []
+    for link, score in store.search(query, k=top_k or len(by_link), links=list(by_link)):
+        job = by_link[link]
+        job["semantic_score"] = round(score, 4)
+        ranked.append(job)
+    # Jobs without a link can't be embedded; keep them, after the ranked ones
+    ranked.extend(job for job in jobs if not job.get("link"))
+    return ranked
@@ -0,0 +1,240 @@
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Finished traces are appended here as OTLP/JSON lines (one ExportTraceServiceRequest per trace).
+# Set TRACE_FILE to an empty string to keep traces in memory only.
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.otlp.jsonl")
+TRACE_FILE_MAX_BYTES = int(os.getenv("TRACE_FILE_MAX_BYTES", str(20_000_000)))
+SERVICE_NAME = "job-search-agent"
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class _NoopSpan:
+    """Returned outside a trace, so instrumented code never has to check."""
+
+    def set(self, **attributes):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+@dataclass
+class _Trace:
+    root: Span
+    spans: List[Span] = field(default_factory=list)
+
+
+# (trace, current span) for the running task or thread; asyncio tasks and to_thread copy it
+_current: ContextVar[Optional[tuple]] = ContextVar("current_span", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    return secrets.token_hex(nbytes)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _from_otlp_value(value: Dict):
+    if "intValue" in value:
+        return int(value["intValue"])
+    return next(iter(value.values()), None)
+
+
+def to_otlp(spans: List[Span]) -> Dict:
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{
+            "scope": {"name": SERVICE_NAME},
+            "spans": [
+                {
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    "parentSpanId": s.parent_id or "",
+                    "name": s.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items() if v is not None],
+                    "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+                }
+                for s in spans
+            ],
+        }],
+    }]}
+
+
+def from_otlp(payload: Dict) -> List[Span]:
+    spans = []
+    for resource in payload.get("resourceSpans", []):
+        for scope in resource.get("scopeSpans", []):
+            for s in scope.get("spans", []):
+                status = s.get("status") or {}
+                spans.append(Span(
+                    s["name"], s["traceId"], s["spanId"], s.get("parentSpanId") or None,
+                    int(s["startTimeUnixNano"]), int(s["endTimeUnixNano"]),
+                    {a["key"]: _from_otlp_value(a["value"]) for a in s.get("attributes", [])},
+                    status.get("message") if status.get("code") == 2 else None,
+                ))
+    return spans
+
+
+def _tail_lines(path: str, count: int, block: int = 65536) -> List[str]:
+    """The last `count` lines of a file, read backwards in blocks."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position, data = f.tell(), b""
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(block, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    return [line.decode("utf-8") for line in data.splitlines()[-count:] if line.strip()]
+
+
+class Tracer:
+    """
+    Lightweight spans for finding where a search spends its time.
+
+    trace() opens a root span (one per search, re-scrape, ...); span() nests
+    timed blocks under whatever span is current, and add_span() records a
+    finished leaf (a chunk extract, an LLM call, a DB transaction) without
+    touching the context, so it is safe from worker tasks and async
+    generators. Outside a trace, span() and add_span() do nothing. When the
+    root span ends, the whole trace is kept in memory and appended to the
+    OTLP/JSON file.
+    """
+
+    def __init__(self, path: Optional[str] = TRACE_FILE, max_bytes: int = TRACE_FILE_MAX_BYTES, keep: int = 50):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.recent = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        """Starts a new trace; inside an existing trace this is just a span."""
+        if _current.get() is not None:
+            with self.span(name, **attributes) as span:
+                yield span
+            return
+
+        root = Span(name, _new_id(16), _new_id(8), None, time.time_ns(), attributes=attributes)
+        trace = _Trace(root, [root])
+        token = _current.set((trace, root))
+        try:
+            yield root
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"[:300]
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            _current.reset(token)
+            self._export(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        current = _current.get()
+        if current is None:
+            yield NOOP_SPAN
+            return
+
+        trace, parent = current
+        span = Span(name, trace.root.trace_id, _new_id(8), parent.span_id, time.time_ns(), attributes=attributes)
+        token = _current.set((trace, span))
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"[:300]
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current.reset(token)
+            trace.spans.append(span)
+
+    def add_span(self, name: str, duration_s: float, error: Optional[str] = None, **attributes):
+        """Records a leaf span that ended just now and lasted duration_s."""
+        current = _current.get()
+        if current is None:
+            return
+        trace, parent = current
+        end = time.time_ns()
+        trace.spans.append(Span(
+            name, trace.root.trace_id, _new_id(8), parent.span_id, end - int(duration_s * 1e9), end,
+            attributes, error,
+        ))
+
+    def _export(self, trace: _Trace):
+        # Root first, then its spans in start order
+        spans = [trace.root] + sorted((s for s in trace.spans if s is not trace.root), key=lambda s: s.start_ns)
+        self.recent.append(spans)
+        if not self.path:
+            return
+        try:
+            line = json.dumps(to_otlp(spans), ensure_ascii=False)
+            with self._lock:
+                if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write trace: {e}")
+
+    def recent_traces(self, limit: int = 10, name: Optional[str] = None) -> List[List[Span]]:
+        """
+        The last `limit` traces, newest first, optionally only those whose root
+        has the given name. Read from the trace file when there is one, so
+        traces from other processes (e.g. the re-scrape daemon) show up too.
+        """
+        if self.path and os.path.exists(self.path):
+            traces = []
+            for line in _tail_lines(self.path, limit * 5 if name else limit):
+                try:
+                    traces.append(from_otlp(json.loads(line)))
+                except (ValueError, KeyError):
+                    continue
+        else:
+            traces = list(self.recent)
+        traces = [t for t in traces if t and (name is None or t[0].name == name)]
+        return traces[::-1][:limit]
+
+
+# Shared tracer; trace/span/add_span are what the instrumented modules import
+tracer = Tracer()
+trace = tracer.trace
+span = tracer.span
+add_span = tracer.add_span
@@ -0,0 +1,34 @@
+import streamlit as st
+from database import DEFAULT_USER, count_jobs, init_db, query_jobs, search_jobs
+
+# Saved-job queries are cached briefly so writes from other processes still show up
+JOB_QUERY_TTL = 60
+
+
+# Schema setup and migrations only need to run once per process, not on every rerun
+@st.cache_resource(show_spinner=False)
+def ensure_db(db_path="jobs.db"):
+    init_db(db_path)
+    return db_path
+
+
+@st.cache_data(ttl=JOB_QUERY_TTL, show_spinner=False)
+def cached_count_jobs(db_path="jobs.db"):
+    return count_jobs(db_path)
+
+
+@st.cache_data(ttl=JOB_QUERY_TTL, max_entries=256, show_spinner=False)
+def cached_query_jobs(**filters):
+    return query_jobs(**filters)
+
+
+@st.cache_data(ttl=JOB_QUERY_TTL, max_entries=256, show_spinner=False)
+def cached_search_jobs(text, limit=20, user_id=DEFAULT_USER, db_path="jobs.db"):
+    return search_jobs(text, limit=limit, user_id=user_id, db_path=db_path)
+
+
+# Call after saving jobs; st.cache_data is shared, so every session sees the new rows
+def invalidate_job_queries():
+    cached_count_jobs.clear()
+    cached_query_jobs.clear()
+    cached_search_jobs.clear()
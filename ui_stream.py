@@ -0,0 +1,25 @@
+import time
+import streamlit as st
+
+
+# Render an async stream of text chunks into a placeholder as they arrive
+async def render_stream(chunks, placeholder, refresh_every: float = 0.05) -> str:
+    parts = []
+    last_render = 0.0
+    async for chunk in chunks:
+        parts.append(chunk)
+        # Redraw at most every refresh_every seconds so long answers don't flood the browser
+        now = time.monotonic()
+        if now - last_render >= refresh_every:
+            placeholder.markdown("".join(parts) + " ▌")
+            last_render = now
+    text = "".join(parts)
+    placeholder.markdown(text)
+    return text
+
+
+def show_stream_metrics(metrics):
+    if metrics.cached:
+        st.caption(f"⚡ Cached analysis · {metrics.total_s * 1000:.0f} ms")
+    elif metrics.total_s is not None:
+        st.caption(f"⏱️ First token {metrics.first_token_s or 0:.2f} s · Total {metrics.total_s:.2f} s")